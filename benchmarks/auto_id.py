@@ -0,0 +1,58 @@
+"""
+Cost of `auto_id_field`: the same queries over the same documents with
+auto ids off and on, reading the value of every match (which is what
+resolves the id pseudopaths of auto-id matches).
+
+Run from the repository root with `python -m benchmarks.auto_id`.
+"""
+from __future__ import unicode_literals, print_function, absolute_import, division
+import sys
+import time
+import argparse
+
+from jsonpath_rw import parse
+from jsonpath_rw.jsonpath import EvaluationContext
+
+EXPRESSIONS = ['orders[*].*', 'orders[*].lines[*].*', 'orders[*].lines[*].id', '$..sku']
+
+def make_data(orders, lines):
+    # Every other order has an id of its own; the rest get a pseudopath
+    data = {'orders': []}
+    for i in range(orders):
+        order = {'customer': {'name': 'c%d' % i},
+                 'lines': [{'sku': 's%d' % j, 'qty': j, 'price': j * 1.5} for j in range(lines)]}
+        if i % 2:
+            order['id'] = 'o%d' % i
+        data['orders'].append(order)
+    return data
+
+def measure(expr, data, ctx, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        matches = [match.value for match in expr.find(data, ctx)]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(matches), best
+
+def main(*argv):
+    parser = argparse.ArgumentParser(description='Benchmark auto_id_field on and off')
+    parser.add_argument('--orders', type=int, default=2000)
+    parser.add_argument('--lines', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv[1:])
+
+    data = make_data(args.orders, args.lines)
+    off = EvaluationContext()
+    on = EvaluationContext(auto_id_field='id')
+
+    print('%-24s %10s %12s %10s %12s %7s' % ('expression', 'matches', 'off (ms)', 'matches', 'on (ms)', 'ratio'))
+    for string in EXPRESSIONS:
+        expr = parse(string)
+        count_off, time_off = measure(expr, data, off, args.repeat)
+        count_on, time_on = measure(expr, data, on, args.repeat)
+        print('%-24s %10d %12.1f %10d %12.1f %6.2fx' % (string, count_off, time_off * 1000,
+                                                        count_on, time_on * 1000, time_on / time_off))
+
+if __name__ == '__main__':
+    main(*sys.argv)
@@ -0,0 +1,48 @@
+"""
+Throughput of `JSONPath.find_batch` over many small documents,
+sequentially and with 1, 4 and 16 worker processes.
+
+Run from the repository root with `python -m benchmarks.find_batch`.
+"""
+from __future__ import unicode_literals, print_function, absolute_import, division
+import sys
+import time
+import random
+import argparse
+
+from jsonpath_rw import parse
+
+def make_docs(count, seed=0):
+    rng = random.Random(seed)
+    return [{'id': i,
+             'items': [{'sku': 'sku-%d' % rng.randint(0, 1000), 'qty': rng.randint(1, 9)}
+                       for _ in range(rng.randint(1, 8))],
+             'meta': {'source': rng.choice(['web', 'app', 'batch'])}}
+            for i in range(count)]
+
+def measure(label, func, count):
+    start = time.time()
+    func()
+    elapsed = time.time() - start
+    print('%-28s %10.0f docs/sec' % (label, count / elapsed))
+
+def main(*argv):
+    parser = argparse.ArgumentParser(description='Benchmark JSONPath.find_batch')
+    parser.add_argument('--docs', type=int, default=100000)
+    parser.add_argument('--chunksize', type=int, default=1000)
+    parser.add_argument('--expression', default='items[*].qty')
+    args = parser.parse_args(argv[1:])
+
+    docs = make_docs(args.docs)
+    expr = parse(args.expression)
+
+    measure('find() loop', lambda: [[m.value for m in expr.find(doc)] for doc in docs], len(docs))
+    measure('find_batch()', lambda: expr.find_batch(docs), len(docs))
+
+    for workers in [1, 4, 16]: # Including starting the pool, which find_batch() does on each call
+        measure('find_batch(), %d workers' % workers,
+                lambda: expr.find_batch(docs, workers=workers, chunksize=args.chunksize),
+                len(docs))
+
+if __name__ == '__main__':
+    main(*sys.argv)
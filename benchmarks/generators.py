@@ -0,0 +1,86 @@
+"""
+Seeded generators of synthetic JSON documents for the benchmarks.
+
+Every generator takes a `size` (roughly the number of leaf values) and a
+`seed`, and returns the same plain `dict`/`list` document for the same
+arguments, so results are comparable between runs and machines.
+"""
+from __future__ import unicode_literals, print_function, absolute_import, division
+import random
+
+SIZES = {
+    'small': 100,
+    'medium': 10000,
+    'large': 100000,
+}
+
+def _scalar(rng):
+    kind = rng.randint(0, 3)
+    if kind == 0:
+        return rng.randint(-1000, 1000)
+    elif kind == 1:
+        return rng.random()
+    elif kind == 2:
+        return 'v%d' % rng.randint(0, 100000)
+    else:
+        return rng.choice([True, False, None])
+
+def wide(size, seed=0):
+    """
+    One object with `size` fields, each an object with a couple of scalars.
+    """
+    rng = random.Random(seed)
+    return dict(('field%d' % i, {'id': i, 'value': _scalar(rng)}) for i in range(max(1, size // 2)))
+
+def deep(size, seed=0):
+    """
+    A chain of nested objects `size` levels deep, each with a scalar alongside
+    the next level, ending in a leaf with a `target` field.
+    """
+    rng = random.Random(seed)
+    doc = leaf = {}
+    for i in range(size):
+        leaf['value'] = _scalar(rng)
+        leaf['next'] = {}
+        leaf = leaf['next']
+    leaf['target'] = 'bottom'
+    return doc
+
+def array_heavy(size, seed=0):
+    """
+    An object holding long arrays of small records and of numbers.
+    """
+    rng = random.Random(seed)
+    count = max(1, size // 4)
+    return {
+        'records': [{'id': i, 'price': rng.randint(1, 500), 'tags': [rng.randint(0, 9)]} for i in range(count)],
+        'numbers': [rng.randint(0, 1000) for _ in range(count)],
+    }
+
+def mixed(size, seed=0):
+    """
+    A document resembling an API payload: a list of orders, each with nested
+    customer, line item and metadata objects of varying shape.
+    """
+    rng = random.Random(seed)
+    orders = []
+    leaves = 0
+    while leaves < size:
+        lines = [{'sku': 'sku-%d' % rng.randint(0, 500), 'qty': rng.randint(1, 9), 'price': _scalar(rng)}
+                 for _ in range(rng.randint(1, 6))]
+        order = {
+            'order_id': 'o%d' % len(orders),
+            'customer': {'name': 'c%d' % rng.randint(0, 1000), 'address': {'city': 'x', 'zip': rng.randint(10000, 99999)}},
+            'lines': lines,
+            'meta': dict(('k%d' % k, _scalar(rng)) for k in range(rng.randint(0, 4))),
+        }
+        orders.append(order)
+        leaves += 4 + 3 * len(lines) + len(order['meta'])
+    return {'orders': orders, 'count': len(orders)}
+
+GENERATORS = {
+    'wide': wide,
+    'deep': deep,
+    'array_heavy': array_heavy,
+    'mixed': mixed,
+}
@@ -0,0 +1,77 @@
+"""
+Import-time and CLI start-up benchmark.
+
+Measures the cumulative import time of `jsonpath_rw` reported by
+`python -X importtime`, and the wall time of a complete `jsonpath.py`
+invocation on a small document, each as the median of several fresh
+interpreters. Exits non-zero if either exceeds its budget.
+
+Run from the repository root with `python -m benchmarks.startup`.
+"""
+from __future__ import unicode_literals, print_function, absolute_import, division
+import os
+import re
+import sys
+import time
+import argparse
+import subprocess
+
+# Budgets in milliseconds
+IMPORT_BUDGET = 10.0
+CLI_BUDGET = 150.0
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CLI_SCRIPT = "from jsonpath_rw.bin.jsonpath import main; main('jsonpath.py', 'foo[*].bar')"
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+def environment():
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([ROOT, env.get('PYTHONPATH', '')])
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    return env
+
+def import_time(module):
+    """
+    Cumulative microseconds spent importing `module`, according to -X importtime
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import %s' % module],
+                            env=environment(), stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    for line in result.stderr.splitlines():
+        match = re.match(r'import time:\s+\d+ \|\s+(\d+) \|\s*(\S+)$', line)
+        if match and match.group(2) == module:
+            return int(match.group(1))
+    raise ValueError('No import time reported for %s' % module)
+
+def cli_time():
+    start = time.time()
+    subprocess.run([sys.executable, '-c', CLI_SCRIPT], env=environment(), input='{"foo": [{"bar": 1}]}',
+                   stdout=subprocess.PIPE, universal_newlines=True, check=True)
+    return time.time() - start
+
+def main(*argv):
+    parser = argparse.ArgumentParser(description='Measure jsonpath_rw import and CLI start-up time')
+    parser.add_argument('--runs', type=int, default=9)
+    parser.add_argument('--import-budget', type=float, default=IMPORT_BUDGET, help='Milliseconds')
+    parser.add_argument('--cli-budget', type=float, default=CLI_BUDGET, help='Milliseconds')
+    args = parser.parse_args(argv[1:])
+
+    import_time('jsonpath_rw') # Make sure the bytecode is compiled before measuring
+
+    import_ms = median([import_time('jsonpath_rw') for _ in range(args.runs)]) / 1000
+    cli_ms = median([cli_time() for _ in range(args.runs)]) * 1000
+
+    over_budget = False
+    for label, value, budget in [('import jsonpath_rw', import_ms, args.import_budget),
+                                 ('jsonpath.py start-up', cli_ms, args.cli_budget)]:
+        status = 'ok' if value <= budget else 'OVER BUDGET'
+        over_budget = over_budget or value > budget
+        print('%-24s %8.1f ms (budget %6.1f ms) %s' % (label, value, budget, status))
+
+    return 1 if over_budget else 0
+
+if __name__ == '__main__':
+    sys.exit(main(*sys.argv))
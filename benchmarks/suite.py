@@ -0,0 +1,166 @@
+"""
+Offline benchmark suite for jsonpath_rw.
+
+Measures lexing, parsing (with a fresh parser and with a reused one),
+`find()`, `update()` and descendant queries over the synthetic documents
+in `benchmarks.generators`, reporting operations per second and peak
+memory for each benchmark. Results can be saved as a baseline JSON file
+and later runs compared against it to flag regressions.
+
+Run from the repository root:
+
+    python -m benchmarks.suite --save baseline.json
+    python -m benchmarks.suite --compare baseline.json
+"""
+from __future__ import unicode_literals, print_function, absolute_import, division
+import io
+import re
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+from jsonpath_rw import parse
+from jsonpath_rw.lexer import JsonPathLexer
+from jsonpath_rw.parser import JsonPathParser
+
+from benchmarks.generators import GENERATORS, SIZES
+
+# Expressions to evaluate against each kind of document
+EXPRESSIONS = {
+    'wide': ['field5.value', '*.id', '$..value'],
+    'deep': ['next.next.next.value', '$..target'],
+    'array_heavy': ['records[*].price', 'records[10:20].id', 'numbers[5]', '$..tags'],
+    'mixed': ['orders[*].lines[*].sku', 'orders[*] where meta.k0', '$..order_id', 'orders[*].customer.address.city'],
+}
+
+# Expressions whose matches are updated in place by the `update` benchmarks
+UPDATES = {
+    'wide': ['field5.value', '*.id'],
+    'deep': ['$..target'],
+    'array_heavy': ['records[*].price', 'numbers[5]'],
+    'mixed': ['orders[*].lines[*].qty'],
+}
+
+# Deep documents are capped so that building them stays quick
+MAX_DEPTH = 5000
+
+class Benchmark(object):
+    def __init__(self, name, func):
+        self.name = name
+        self.func = func
+
+    def run(self, min_time, repeat):
+        """
+        Returns (operations per second, peak bytes allocated by one operation)
+        """
+        self.func() # Warm up
+
+        best = None
+        for _ in range(repeat):
+            count = 0
+            start = time.perf_counter()
+            elapsed = 0
+            while elapsed < min_time:
+                self.func()
+                count += 1
+                elapsed = time.perf_counter() - start
+            rate = count / elapsed
+            best = rate if best is None else max(best, rate)
+
+        tracemalloc.start()
+        try:
+            self.func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return best, peak
+
+def parsing_benchmarks():
+    strings = sorted(set(string for strings in EXPRESSIONS.values() for string in strings))
+    lexer = JsonPathLexer()
+    parser = JsonPathParser()
+
+    return [
+        Benchmark('lex', lambda: [list(lexer.tokenize(string)) for string in strings]),
+        Benchmark('parse/cold', lambda: [JsonPathParser().parse(string) for string in strings]),
+        Benchmark('parse/warm', lambda: [parser.parse(string) for string in strings]),
+    ]
+
+def evaluation_benchmarks(sizes):
+    benchmarks = []
+    for kind, generate in sorted(GENERATORS.items()):
+        for size_name in sizes:
+            size = SIZES[size_name]
+            doc = generate(min(size, MAX_DEPTH) if kind == 'deep' else size)
+
+            for string in EXPRESSIONS[kind]:
+                expr = parse(string)
+                category = 'descendants' if '..' in string else 'find'
+                benchmarks.append(Benchmark('%s/%s/%s/%s' % (category, kind, size_name, string),
+                                            lambda expr=expr, doc=doc: expr.find(doc)))
+
+            for string in UPDATES[kind]:
+                expr = parse(string)
+                benchmarks.append(Benchmark('update/%s/%s/%s' % (kind, size_name, string),
+                                            lambda expr=expr, doc=doc: expr.update(doc, 0)))
+    return benchmarks
+
+def compare(results, baseline, threshold):
+    """
+    Returns the names of benchmarks that are more than `threshold` (a
+    fraction) slower than in `baseline`.
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name in baseline and result['ops_per_sec'] < baseline[name]['ops_per_sec'] * (1 - threshold):
+            regressions.append(name)
+    return regressions
+
+def main(*argv):
+    parser = argparse.ArgumentParser(description='Run the jsonpath_rw benchmark suite')
+    parser.add_argument('--sizes', nargs='*', default=['small', 'medium'], choices=sorted(SIZES))
+    parser.add_argument('--filter', help='Only run benchmarks whose names match this regular expression')
+    parser.add_argument('--min-time', type=float, default=0.2, help='Seconds to spend on each timing run')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing runs per benchmark; the best is reported')
+    parser.add_argument('--save', metavar='FILE', help='Write the results to FILE as a baseline')
+    parser.add_argument('--compare', metavar='FILE', help='Compare the results against the baseline in FILE')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Slowdown (as a fraction) that counts as a regression')
+    args = parser.parse_args(argv[1:])
+
+    benchmarks = parsing_benchmarks() + evaluation_benchmarks(args.sizes)
+    if args.filter:
+        benchmarks = [b for b in benchmarks if re.search(args.filter, b.name)]
+
+    baseline = {}
+    if args.compare:
+        with io.open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results = {}
+    for benchmark in benchmarks:
+        ops, peak = benchmark.run(args.min_time, args.repeat)
+        results[benchmark.name] = {'ops_per_sec': ops, 'peak_bytes': peak}
+
+        change = ''
+        if benchmark.name in baseline:
+            change = '%+6.1f%%' % (100 * (ops / baseline[benchmark.name]['ops_per_sec'] - 1))
+        print('%-70s %12.1f ops/sec %10.1f KiB %s' % (benchmark.name, ops, peak / 1024, change))
+        sys.stdout.flush()
+
+    if args.save:
+        with io.open(args.save, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(results, indent=2, sort_keys=True))
+
+    if args.compare:
+        regressions = compare(results, baseline, args.threshold)
+        for name in regressions:
+            print('REGRESSION: %s' % name)
+        return 1 if regressions else 0
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(*sys.argv))
@@ -0,0 +1,70 @@
+"""
+Multi-threaded stress test of concurrent evaluations that use different
+`EvaluationContext`s against the same expressions and documents.
+
+Reports throughput per thread count and fails if any thread observes a
+result computed with another thread's options.
+
+Run from the repository root with `python -m benchmarks.threads`.
+"""
+from __future__ import unicode_literals, print_function, absolute_import, division
+import sys
+import time
+import threading
+import argparse
+
+from jsonpath_rw import parse
+from jsonpath_rw.jsonpath import EvaluationContext
+
+DATA = {'orders': [{'id': 'o%d' % i, 'lines': [{'sku': 's%d' % j, 'qty': j} for j in range(5)]}
+                   for i in range(50)]}
+
+EXPRESSIONS = ['orders[*].lines[*].id', 'orders[*].id', 'orders..qty']
+
+def expected_results():
+    results = {}
+    for id_field in [None, 'id', 'sku']:
+        ctx = EvaluationContext(auto_id_field=id_field)
+        for string in EXPRESSIONS:
+            results[id_field, string] = [m.value for m in parse(string).find(DATA, ctx)]
+    return results
+
+def run(thread_count, iterations, expected):
+    exprs = dict((string, parse(string)) for string in EXPRESSIONS)
+    id_fields = [None, 'id', 'sku']
+    errors = []
+
+    def worker(n):
+        ctx = EvaluationContext(auto_id_field=id_fields[n % len(id_fields)])
+        for i in range(iterations):
+            string = EXPRESSIONS[i % len(EXPRESSIONS)]
+            if [m.value for m in exprs[string].find(DATA, ctx)] != expected[ctx.auto_id_field, string]:
+                errors.append((ctx, string))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(thread_count)]
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start
+
+    return thread_count * iterations / elapsed, errors
+
+def main(*argv):
+    parser = argparse.ArgumentParser(description='Stress concurrent evaluation with per-call contexts')
+    parser.add_argument('--iterations', type=int, default=300)
+    parser.add_argument('--threads', type=int, nargs='*', default=[1, 2, 4, 8])
+    args = parser.parse_args(argv[1:])
+
+    expected = expected_results()
+    failed = False
+    for thread_count in args.threads:
+        ops, errors = run(thread_count, args.iterations, expected)
+        print('%2d threads %10.0f finds/sec %6d cross-talk errors' % (thread_count, ops, len(errors)))
+        failed = failed or bool(errors)
+
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main(*sys.argv))
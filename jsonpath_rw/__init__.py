@@ -1,4 +1,11 @@
 from .jsonpath import *
-from .parser import parse
 
 __version__ = '1.3.0'
+
+def parse(string):
+    """
+    Parses `string` into a `JSONPath`. The parser, and PLY with it, is only
+    imported the first time this is called.
+    """
+    from .parser import parse
+    return parse(string)
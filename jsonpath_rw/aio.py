@@ -0,0 +1,67 @@
+"""
+asyncio entry points for evaluating JSONPath expressions without
+monopolizing the event loop.
+
+Evaluation itself is synchronous; these coroutines drive the lazy
+`find_iter()` of an expression and hand control back to the event loop
+every `yield_every` datums visited, so a long traversal that matches
+little or nothing does not block it either. Documents for which
+`offload` is true are evaluated entirely in an executor instead.
+
+Requires Python 3.6+.
+"""
+import asyncio
+
+from jsonpath_rw.jsonpath import Budget, EvaluationContext, _PAUSE
+
+DEFAULT_YIELD_EVERY = 1000
+
+# Python 3.6 only has get_event_loop(), which returns the running loop inside a coroutine
+_running_loop = getattr(asyncio, 'get_running_loop', asyncio.get_event_loop)
+
+def _should_offload(offload, data):
+    return offload(data) if callable(offload) else bool(offload)
+
+async def _find_in_executor(expr, data, executor, ctx):
+    loop = _running_loop()
+    return await loop.run_in_executor(executor, expr.find, data, ctx)
+
+async def afind(expr, data, yield_every=DEFAULT_YIELD_EVERY, offload=False, executor=None, ctx=None):
+    """
+    Returns the same list of matches as `expr.find(data)`.
+
+    `offload` may be a boolean or a predicate on the document; when it is
+    true the evaluation runs in `executor` (the loop's default executor if
+    `None`). Otherwise the matches are collected inline, yielding to the
+    event loop after every `yield_every` datums visited or matches found.
+
+    `ctx` is an optional `EvaluationContext`, as for `find()`; its budget,
+    if any, is replaced by one that counts the visits.
+    """
+    if _should_offload(offload, data):
+        return await _find_in_executor(expr, data, executor, ctx)
+
+    ctx = EvaluationContext.resolve(ctx).replace(budget=Budget(pause_every=yield_every))
+    matches = []
+    for match in expr.find_iter(data, ctx):
+        if match is _PAUSE:
+            await asyncio.sleep(0)
+            continue
+        matches.append(match)
+        if len(matches) % yield_every == 0:
+            await asyncio.sleep(0)
+    return matches
+
+async def afind_iter(expr, docs, yield_every=DEFAULT_YIELD_EVERY, offload=False, executor=None, ctx=None):
+    """
+    Asynchronously iterates over `docs` (an async iterable, or a plain
+    iterable) and produces the list of matches for each document in turn,
+    as `afind()` would.
+    """
+    if hasattr(docs, '__aiter__'):
+        async for doc in docs:
+            yield await afind(expr, doc, yield_every=yield_every, offload=offload, executor=executor, ctx=ctx)
+    else:
+        for doc in docs:
+            yield await afind(expr, doc, yield_every=yield_every, offload=offload, executor=executor, ctx=ctx)
+            await asyncio.sleep(0)
@@ -9,22 +9,144 @@
 from __future__ import unicode_literals, print_function, absolute_import
 
 # Standard Library imports
+import os
 import json
 import sys
 import glob
 import argparse
+from collections import namedtuple
 
 # JsonPath-RW imports
 from jsonpath_rw import parse
+from jsonpath_rw.jsonpath import Len, Sum
+from jsonpath_rw.profiling import ProfileStats
 
-def find_matches_for_file(expr, f):
-    return expr.find(json.load(f))
+OUTPUT_FORMATS = ['raw', 'json', 'ndjson', 'path-value']
+
+def find_matches_for_data(expr, data, stats=None):
+    if stats is None:
+        return expr.find_iter(data)
+    else:
+        return expr.profile(data, stats)
+
+def find_matches_for_file(expr, f, stats=None):
+    return find_matches_for_data(expr, json.load(f), stats)
+
+def find_matches_for_files(expr, glob_patterns, stats=None):
+    for pattern in glob_patterns:
+        for filename in glob.glob(pattern):
+            with open(filename) as f:
+                matches = find_matches_for_file(expr, f, stats)
+            for match in matches:
+                yield match
+
+def find_matches_with_index(expr, index, glob_patterns, stats=None):
+    filenames = [filename for pattern in glob_patterns for filename in glob.glob(pattern)]
+    for data in index.documents(expr, filenames):
+        for match in find_matches_for_data(expr, data, stats):
+            yield match
+
+def format_match(match, output='raw'):
+    if output == 'raw':
+        return '{0}'.format(match.value)
+    elif output == 'path-value':
+        return '%s\t%s' % (match.json_pointer, json.dumps(match.value))
+    else:
+        return json.dumps(match.value)
+
+def write_matches(matches, output='raw', stream=None, flush_every=100):
+    """
+    Writes each match to `stream` as soon as it is found, one per line,
+    flushing every `flush_every` matches. With `output='json'` the lines
+    are the elements of a single JSON array.
+    """
+    stream = stream or sys.stdout
+    separator = ',\n' if output == 'json' else '\n'
+
+    if output == 'json':
+        stream.write('[\n')
+
+    count = 0
+    for match in matches:
+        if count > 0:
+            stream.write(separator)
+        stream.write(format_match(match, output))
+        count += 1
+        if count % flush_every == 0:
+            stream.flush()
+
+    if output == 'json':
+        stream.write('\n]\n' if count else ']\n')
+    elif count:
+        stream.write('\n')
+    stream.flush()
 
 def print_matches(matches):
-    print('\n'.join(['{0}'.format(match.value) for match in matches]))
+    write_matches(matches)
+
+# A match as returned by a query server
+RemoteMatch = namedtuple('RemoteMatch', ['json_pointer', 'value'])
+
+def query_server(socket_path, expression, glob_patterns, aggregate=None, paths=False):
+    """
+    Has the server on `socket_path` (see `jsonpath_rw.server`) evaluate
+    `expression` over the files matching `glob_patterns`, or over stdin if
+    there are none. Returns the count or sum for an aggregate, and
+    otherwise the matches as `RemoteMatch`es.
+    """
+    from jsonpath_rw.server import query
+    request = {'expression': expression, 'aggregate': aggregate, 'paths': paths}
+    if glob_patterns:
+        request['files'] = [os.path.abspath(filename) for pattern in glob_patterns for filename in glob.glob(pattern)]
+    else:
+        request['stdin'] = sys.stdin.read()
+
+    response = query(socket_path, request)
+    if aggregate is not None:
+        return response[aggregate]
+    return [RemoteMatch(pointer, value) for pointer, value in response['matches']]
 
+def serve_main(*argv):
+    parser = argparse.ArgumentParser(
+        prog='%s serve' % argv[0],
+        description='Answer queries from `--server SOCKET` on a Unix socket, keeping expressions and documents in memory.')
+    parser.add_argument('socket', help='The path of the Unix socket to listen on')
+    parser.add_argument('--max-documents', type=int, default=64, help='How many decoded files to keep (default: 64)')
+    parser.add_argument('--max-expressions', type=int, default=1024, help='How many parsed expressions to keep (default: 1024)')
+
+    args = parser.parse_args(argv[1:])
+    from jsonpath_rw.server import serve, JsonPathServerError
+    print('Serving queries on %s' % args.socket, file=sys.stderr)
+    try:
+        serve(args.socket, max_expressions=args.max_expressions, max_documents=args.max_documents)
+    except JsonPathServerError as exc:
+        parser.error(str(exc))
+    except KeyboardInterrupt:
+        pass
+
+
+def index_main(*argv):
+    parser = argparse.ArgumentParser(
+        prog='%s index' % argv[0],
+        description='Build or refresh an index of JSON files, for use with --index.')
+    parser.add_argument('database', help='The index file to create or update')
+    parser.add_argument('files', metavar='file', nargs='+', help='Files to index (unchanged files already in the index are skipped)')
+    parser.add_argument('--values', action='store_true', help='Also index scalar values')
+
+    args = parser.parse_args(argv[1:])
+    from jsonpath_rw.index import CorpusIndex # sqlite3 is slow to import, and only needed here
+    filenames = [filename for pattern in args.files for filename in glob.glob(pattern)]
+
+    with CorpusIndex(args.database) as index:
+        count = index.add(filenames, values=args.values)
+    print('Indexed %d of %d files' % (count, len(filenames)), file=sys.stderr)
 
 def main(*argv):
+    if len(argv) > 1 and argv[1] == 'index':
+        return index_main(argv[0], *argv[2:])
+    if len(argv) > 1 and argv[1] == 'serve':
+        return serve_main(argv[0], *argv[2:])
+
     parser = argparse.ArgumentParser(
         description='Search JSON files (or stdin) according to a JSONPath expression.',
         formatter_class=argparse.RawTextHelpFormatter,
@@ -45,27 +167,66 @@ def main(*argv):
             *               - any field
             [_start_?:_end_?] - array slice
             [*]             - any array index
+
+        Run '%(prog)s index DATABASE FILE...' to build an index for --index,
+        and '%(prog)s serve SOCKET' to start a server for --server.
     """)
 
 
 
     parser.add_argument('expression', help='A JSONPath expression.')
     parser.add_argument('files', metavar='file', nargs='*', help='Files to search (if none, searches stdin)')
+    parser.add_argument('--profile', action='store_true', help='Print the expression tree annotated with per-node statistics to stderr')
+    parser.add_argument('--index', metavar='DATABASE', help='Use an index built with the index subcommand to skip files and records that cannot match')
+    parser.add_argument('--server', metavar='SOCKET', help='Have a server started with the serve subcommand answer the query, from its cache')
+    aggregate = parser.add_mutually_exclusive_group()
+    aggregate.add_argument('--count', action='store_true', help='Print only the number of matches')
+    aggregate.add_argument('--sum', action='store_true', help='Print only the sum of the numbers among the matched values')
+    parser.add_argument('--output', choices=OUTPUT_FORMATS, default='raw',
+                        help='How to print each match: its value as Python text (raw), as elements of a JSON array (json),\n'
+                             'one JSON value per line (ndjson), or its JSON Pointer and JSON value separated by a tab (path-value)')
 
     args = parser.parse_args(argv[1:])
 
+    if args.server:
+        if args.profile or args.index:
+            parser.error('--server cannot be combined with --profile or --index')
+        aggregate = 'count' if args.count else 'sum' if args.sum else None
+        result = query_server(args.server, args.expression, args.files, aggregate, paths=args.output == 'path-value')
+        if aggregate is not None:
+            print(result)
+        else:
+            write_matches(result, args.output)
+        return
+
     expr = parse(args.expression)
     glob_patterns = args.files
+    stats = ProfileStats() if args.profile else None
+    index = None
 
     if len(glob_patterns) == 0:
         # stdin mode
-        print_matches(find_matches_for_file(expr, sys.stdin))
+        matches = find_matches_for_file(expr, sys.stdin, stats)
+    elif args.index:
+        from jsonpath_rw.index import CorpusIndex
+        index = CorpusIndex(args.index)
+        matches = find_matches_with_index(expr, index, glob_patterns, stats)
     else:
         # file paths mode
-        for pattern in glob_patterns:
-            for filename in glob.glob(pattern):
-                with open(filename) as f:
-                    print_matches(find_matches_for_file(expr, f))
+        matches = find_matches_for_files(expr, glob_patterns, stats)
+
+    if args.count:
+        print(Len().fold(matches))
+    elif args.sum:
+        print(Sum().fold(matches))
+    else:
+        write_matches(matches, args.output)
+
+    if index is not None:
+        index.close()
+
+    if stats is not None:
+        print(expr.explain(stats), file=sys.stderr)
 
 def entry_point():
     main(*sys.argv)
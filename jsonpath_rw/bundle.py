@@ -0,0 +1,123 @@
+"""
+Bundles of pre-parsed JSONPath expressions stored on disk, so that a
+process can load many expressions without running the parser.
+
+A bundle maps names to expressions, and records for each the source it
+was parsed from and a hash of that source. It starts with a header,
+pickled separately, that identifies the version of jsonpath_rw and of
+its AST classes that wrote it; loading a bundle written with different
+ones raises `JsonPathBundleError` before any expression is unpickled.
+"""
+from __future__ import unicode_literals, print_function, absolute_import, division, generators, nested_scopes
+import io
+import pickle
+import hashlib
+
+from jsonpath_rw.jsonpath import JSONPath, _text_type
+
+BUNDLE_FORMAT = 2
+
+class JsonPathBundleError(Exception):
+    pass
+
+def _version():
+    """
+    The version of jsonpath_rw, with a digest of the names and constructor
+    arguments of the AST classes that pickled expressions refer to, so
+    that changing those classes also changes it.
+    """
+    from jsonpath_rw import __version__, jsonpath
+
+    signatures = []
+    for name, value in sorted(vars(jsonpath).items()):
+        if isinstance(value, type) and issubclass(value, JSONPath):
+            code = getattr(value.__init__, '__code__', None) # None for object.__init__
+            arguments = code.co_varnames[:code.co_argcount] if code is not None else ()
+            signatures.append('%s(%s)' % (name, ','.join(arguments)))
+    digest = hashlib.sha1(';'.join(signatures).encode('utf-8')).hexdigest()
+    return '%s+%s' % (__version__, digest[:12])
+
+def source_hash(source):
+    """
+    The key under which the expression parsed from `source` is stored.
+    """
+    return hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+def save_bundle(path, expressions):
+    """
+    Writes `expressions`, a mapping from names to either source strings or
+    `JSONPath` objects, to the file at `path`. Source strings are parsed
+    here; for `JSONPath` objects the source recorded is `str(expr)`, but
+    only if it parses back to `expr` -- otherwise the expression is stored
+    under its name alone and never matches a source passed to
+    `load_bundle()`. Expressions with the same source are stored once.
+    """
+    from jsonpath_rw.parser import parse
+
+    by_hash = {}
+    names = {}
+    for name, expr in expressions.items():
+        if isinstance(expr, JSONPath):
+            source = _text_type(expr)
+            try:
+                round_trips = parse(source) == expr
+            except Exception:
+                round_trips = False
+            if not round_trips:
+                # A sha1 hex digest never contains a colon
+                key = 'name:%s' % name
+                by_hash[key] = (None, expr)
+                names[name] = key
+                continue
+        else:
+            source, expr = expr, parse(expr)
+
+        key = source_hash(source)
+        by_hash[key] = (source, expr)
+        names[name] = key
+
+    header = {'format': BUNDLE_FORMAT, 'version': _version()}
+    bundle = {'expressions': by_hash, 'names': names}
+    with io.open(path, 'wb') as f:
+        pickle.dump(header, f, pickle.HIGHEST_PROTOCOL)
+        pickle.dump(bundle, f, pickle.HIGHEST_PROTOCOL)
+
+def load_bundle(path, sources=None):
+    """
+    Reads a bundle written by `save_bundle()` and returns a dict from names
+    to expressions.
+
+    If `sources` (a mapping from names to source strings) is given, the
+    result has exactly those names: expressions whose source hash matches
+    come from the bundle, and only the others are parsed.
+    """
+    with io.open(path, 'rb') as f:
+        try:
+            header = pickle.load(f)
+        except Exception as exc:
+            raise JsonPathBundleError('Could not read JSONPath bundle %s: %s' % (path, exc))
+
+        if not isinstance(header, dict) or header.get('format') != BUNDLE_FORMAT:
+            raise JsonPathBundleError('%s is not a JSONPath bundle in format %d' % (path, BUNDLE_FORMAT))
+        if header['version'] != _version():
+            raise JsonPathBundleError('JSONPath bundle %s was written by jsonpath-rw %s, not %s'
+                                      % (path, header['version'], _version()))
+
+        try:
+            bundle = pickle.load(f)
+        except Exception as exc:
+            raise JsonPathBundleError('Could not read JSONPath bundle %s: %s' % (path, exc))
+
+    expressions = bundle['expressions']
+    if sources is None:
+        return dict((name, expressions[key][1]) for name, key in bundle['names'].items())
+
+    result = {}
+    for name, source in sources.items():
+        entry = expressions.get(source_hash(source))
+        if entry is not None:
+            result[name] = entry[1]
+        else:
+            from jsonpath_rw.parser import parse
+            result[name] = parse(source)
+    return result
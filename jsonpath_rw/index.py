@@ -0,0 +1,296 @@
+"""
+An on-disk inverted index over a corpus of JSON files, used to skip files
+and records that cannot match a query.
+
+A file may hold one JSON document or several (one per line, as in
+NDJSON, or simply concatenated); each document is a record. For every
+record the index stores its byte span in the file, the field names that
+occur anywhere in it, the key paths it contains (JSON Pointers with `*`
+in place of array indices, such as `/orders/*/order_id`) with the byte
+span of their first occurrence, and optionally its scalar values by key
+path. It is kept in an SQLite database.
+
+Before evaluating an expression, `CorpusIndex` works out which field
+names and which key path a record must contain for the expression to
+match anything, and reads and decodes only the records that have them.
+Files that are not in the index, or have changed since they were
+indexed, are always searched in full.
+
+    >>> index = CorpusIndex('corpus.idx')
+    >>> index.add(glob.glob('archive/*.json'))
+    >>> matches = list(index.find(parse('$..order_id'), glob.glob('archive/*.json')))
+"""
+from __future__ import unicode_literals, print_function, absolute_import, division, generators, nested_scopes
+import io
+import os
+import json
+import sqlite3
+
+from jsonpath_rw.jsonpath import (Root, This, Child, Where, Descendants, Union, Intersect, Fields, Index, Aggregate,
+                                  to_json_pointer, _string_types, _auto_id_field)
+from jsonpath_rw.lazy import LazyObject, LazyArray, _decode, _skip_value, _skip_whitespace
+
+INDEX_FORMAT = 1
+
+# Scalars with longer JSON text than this are not indexed by value
+MAX_VALUE_LENGTH = 256
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT UNIQUE, mtime REAL, size INTEGER);
+CREATE TABLE IF NOT EXISTS records (id INTEGER PRIMARY KEY, file_id INTEGER, start INTEGER, end INTEGER);
+CREATE TABLE IF NOT EXISTS names (name TEXT, record_id INTEGER);
+CREATE TABLE IF NOT EXISTS paths (path TEXT, record_id INTEGER, start INTEGER, end INTEGER);
+CREATE TABLE IF NOT EXISTS vals (path TEXT, value TEXT, record_id INTEGER);
+CREATE INDEX IF NOT EXISTS records_by_file ON records (file_id);
+CREATE INDEX IF NOT EXISTS names_by_name ON names (name);
+CREATE INDEX IF NOT EXISTS paths_by_path ON paths (path);
+CREATE INDEX IF NOT EXISTS vals_by_value ON vals (path, value);
+'''
+
+class JsonPathIndexError(Exception):
+    pass
+
+def record_spans(buffer):
+    """
+    The `(start, end)` byte spans of the JSON documents in `buffer`.
+    """
+    spans = []
+    pos = _skip_whitespace(buffer, 0)
+    while pos < len(buffer):
+        end = _skip_value(buffer, pos)
+        spans.append((pos, end))
+        pos = _skip_whitespace(buffer, end)
+    return spans
+
+def key_paths(buffer, start, end):
+    """
+    Yields `(segments, start, end, scalar)` for every value in the record
+    at `buffer[start:end]`, where `segments` are the field names leading to
+    it, with `*` for array elements, and `scalar` is the JSON text of the
+    value if it is not an object or array. Only the structure is scanned;
+    nothing but object keys is decoded.
+    """
+    stack = [((), start, end)]
+    while stack:
+        segments, start, end = stack.pop()
+        value = _decode(buffer, start, end) if buffer[start:start + 1] in (b'{', b'[') else None
+        if isinstance(value, LazyObject):
+            value._scan()
+            children = [(segments + (key,), span) for key, span in value._spans.items()]
+        elif isinstance(value, LazyArray):
+            value._scan()
+            children = [(segments + ('*',), span) for span in value._spans]
+        else:
+            children = []
+
+        scalar = None if value is not None else buffer[start:end]
+        yield segments, start, end, scalar
+
+        for child_segments, (child_start, child_end) in reversed(children):
+            stack.append((child_segments, child_start, child_end))
+
+def _lead(expr):
+    """
+    Returns `(segments, complete)`: the key path `expr` must pass through
+    from the root, and whether that is all of `expr`.
+    """
+    if isinstance(expr, (Root, This)):
+        return (), True
+    elif isinstance(expr, Fields):
+        if len(expr.fields) == 1 and isinstance(expr.fields[0], _string_types) and expr.fields[0] != '*':
+            return (expr.fields[0],), True
+        return (), False
+    elif isinstance(expr, Index):
+        return ('*',), True
+    elif isinstance(expr, Child):
+        if isinstance(expr.right, Aggregate):
+            # An aggregate matches even when its left side does not
+            return (), False
+        left, complete = _lead(expr.left)
+        if not complete:
+            return left, False
+        right, complete = _lead(expr.right)
+        return left + right, complete
+    elif isinstance(expr, (Where, Descendants)):
+        return _lead(expr.left)[0], False
+    else:
+        return (), False
+
+def _names(expr):
+    if isinstance(expr, Fields):
+        if len(expr.fields) == 1 and isinstance(expr.fields[0], _string_types) and expr.fields[0] != '*':
+            return set(expr.fields)
+        return set()
+    elif isinstance(expr, Child) and isinstance(expr.right, Aggregate):
+        return set()
+    elif isinstance(expr, (Child, Where, Descendants, Intersect)):
+        return _names(expr.left) | _names(expr.right)
+    elif isinstance(expr, Union):
+        return _names(expr.left) & _names(expr.right)
+    else:
+        return set()
+
+def requirements(expr, ctx=None):
+    """
+    Returns `(names, key path)`: field names that must all occur in a
+    document, and a key path (as a JSON Pointer, possibly empty) it must
+    contain, for `expr` evaluated at the root to match anything.
+
+    With an auto id field any field name may be matched without occurring
+    in the document, so nothing is required.
+    """
+    if _auto_id_field(ctx) is not None:
+        return set(), ''
+    return _names(expr), to_json_pointer(_lead(expr)[0])
+
+class CorpusIndex(object):
+    """
+    An index of JSON files stored in the SQLite database at `path`.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(_SCHEMA)
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'format'").fetchone()
+        if row is None:
+            self.db.execute("INSERT INTO meta VALUES ('format', ?)", (str(INDEX_FORMAT),))
+            self.db.commit()
+        elif row[0] != str(INDEX_FORMAT):
+            raise JsonPathIndexError('%s is an index in format %s, not %s' % (path, row[0], INDEX_FORMAT))
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _file(self, filename):
+        """
+        The id of `filename` in the index if it is there and up to date.
+        """
+        row = self.db.execute('SELECT id, mtime, size FROM files WHERE path = ?', (filename,)).fetchone()
+        if row is None:
+            return None
+        stat = os.stat(filename)
+        return row[0] if (row[1], row[2]) == (stat.st_mtime, stat.st_size) else None
+
+    def _forget(self, file_id):
+        records = '(SELECT id FROM records WHERE file_id = ?)'
+        for table in ('names', 'paths', 'vals'):
+            self.db.execute('DELETE FROM %s WHERE record_id IN %s' % (table, records), (file_id,))
+        self.db.execute('DELETE FROM records WHERE file_id = ?', (file_id,))
+        self.db.execute('DELETE FROM files WHERE id = ?', (file_id,))
+
+    def add(self, filenames, values=False):
+        """
+        Indexes the files in `filenames` that are not indexed yet or have
+        changed since, and returns how many it indexed. With `values=True`
+        scalar values are indexed too, for `lookup()`.
+        """
+        count = 0
+        with self.db:
+            for filename in filenames:
+                filename = os.path.abspath(filename)
+                if self._file(filename) is not None:
+                    continue
+                row = self.db.execute('SELECT id FROM files WHERE path = ?', (filename,)).fetchone()
+                if row is not None:
+                    self._forget(row[0])
+                self._index_file(filename, values)
+                count += 1
+        return count
+
+    def _index_file(self, filename, values):
+        stat = os.stat(filename)
+        with io.open(filename, 'rb') as f:
+            buffer = f.read()
+
+        file_id = self.db.execute('INSERT INTO files (path, mtime, size) VALUES (?, ?, ?)',
+                                  (filename, stat.st_mtime, stat.st_size)).lastrowid
+        for start, end in record_spans(buffer):
+            record_id = self.db.execute('INSERT INTO records (file_id, start, end) VALUES (?, ?, ?)',
+                                        (file_id, start, end)).lastrowid
+            names = set()
+            paths = {}
+            vals = set()
+            for segments, value_start, value_end, scalar in key_paths(buffer, start, end):
+                pointer = to_json_pointer(segments)
+                if pointer not in paths:
+                    paths[pointer] = (value_start, value_end)
+                if segments and segments[-1] != '*':
+                    names.add(segments[-1])
+                if values and scalar is not None and len(scalar) <= MAX_VALUE_LENGTH:
+                    vals.add((pointer, json.dumps(json.loads(scalar.decode('utf-8')), sort_keys=True)))
+
+            self.db.executemany('INSERT INTO names VALUES (?, ?)', ((name, record_id) for name in names))
+            self.db.executemany('INSERT INTO paths VALUES (?, ?, ?, ?)',
+                                ((pointer, record_id, s, e) for pointer, (s, e) in paths.items()))
+            self.db.executemany('INSERT INTO vals VALUES (?, ?, ?)', ((p, v, record_id) for p, v in vals))
+
+    def _records(self, query, args):
+        return self.db.execute(
+            'SELECT files.path, records.start, records.end FROM records JOIN files ON files.id = records.file_id '
+            'WHERE records.id IN (%s) ORDER BY files.path, records.start' % query, args).fetchall()
+
+    def lookup(self, pointer, value):
+        """
+        Returns `(filename, start, end)` for the records that have the scalar
+        `value` at the key path `pointer`. Needs an index built with `values=True`.
+        """
+        return self._records('SELECT record_id FROM vals WHERE path = ? AND value = ?',
+                             (pointer, json.dumps(value, sort_keys=True)))
+
+    def candidates(self, expr, ctx=None):
+        """
+        Returns `(filename, start, end)` for the indexed records that contain
+        everything `expr` needs to match.
+        """
+        names, pointer = requirements(expr, ctx)
+        queries = ['SELECT record_id FROM paths WHERE path = ?']
+        args = [pointer]
+        for name in sorted(names):
+            queries.append('SELECT record_id FROM names WHERE name = ?')
+            args.append(name)
+        return self._records(' INTERSECT '.join(queries), args)
+
+    def documents(self, expr, filenames, ctx=None):
+        """
+        Yields the decoded documents in `filenames` that `expr` might match:
+        only the candidate records of files that are indexed and up to date,
+        and every document of the rest.
+        """
+        indexed = {}
+        for filename, start, end in self.candidates(expr, ctx):
+            indexed.setdefault(filename, []).append((start, end))
+
+        for filename in filenames:
+            path = os.path.abspath(filename)
+            with io.open(filename, 'rb') as f:
+                if self._file(path) is not None:
+                    buffer = None
+                    spans = indexed.get(path, [])
+                else:
+                    buffer = f.read()
+                    spans = record_spans(buffer)
+
+                for start, end in spans:
+                    if buffer is None:
+                        f.seek(start)
+                        text = f.read(end - start)
+                    else:
+                        text = buffer[start:end]
+                    yield json.loads(text.decode('utf-8'))
+
+    def find(self, expr, filenames, ctx=None):
+        """
+        Yields the matches of `expr` in the documents of `filenames`, reading
+        only those that `documents()` cannot rule out.
+        """
+        for data in self.documents(expr, filenames, ctx):
+            for match in expr.find_iter(data, ctx):
+                yield match
@@ -1,14 +1,170 @@
 from __future__ import unicode_literals, print_function, absolute_import, division, generators, nested_scopes
-import logging
-import six
-from six.moves import xrange
-from itertools import *
+import sys
+import time
+from itertools import chain, islice
+
+try:
+    from collections.abc import Mapping, Sequence
+except ImportError: # Python 2
+    from collections import Mapping, Sequence
+
+# Kept to a minimum (no `six`, `logging` or `pickle` at import time) so that
+# importing jsonpath_rw stays cheap for short-lived processes
+if sys.version_info[0] >= 3:
+    _string_types = (str,)
+    _integer_types = (int,)
+    _text_type = str
+    xrange = range
+else:
+    _string_types = (basestring,)
+    _integer_types = (int, long)
+    _text_type = unicode
+    xrange = xrange
+
+# Turn on/off the automatic creation of id attributes. This is only the
+# default for evaluations that are not given an `EvaluationContext`; pass
+# one to `find()` instead when different callers need different settings.
+auto_id_field = None
 
-logger = logging.getLogger(__name__)
+# Marks the absence of a value where None is a valid one
+_NOTHING = object()
 
-# Turn on/off the automatic creation of id attributes
-# ... could be a kwarg pervasively but uses are rare and simple today
-auto_id_field = None
+class EvaluationContext(object):
+    """
+    Immutable options for evaluating a JSONPath. It is passed as `ctx` to
+    `find()`, `find_iter()` and `update()` and handed unchanged to every
+    subexpression, so concurrent evaluations with different options do
+    not see each other's settings.
+
+    When no context is given, the module-level defaults (such as
+    `auto_id_field`) are read instead.
+
+    The `budget` is the one mutable part: a `Budget` that traversal charges
+    for the datums it visits. It belongs to a single call, so it is set by
+    `find_bounded()` rather than by hand.
+    """
+    __slots__ = ('auto_id_field', 'budget')
+
+    def __init__(self, auto_id_field=None, budget=None):
+        object.__setattr__(self, 'auto_id_field', auto_id_field)
+        object.__setattr__(self, 'budget', budget)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('%s is immutable; use replace() to derive a new one' % self.__class__.__name__)
+
+    def replace(self, **changes):
+        """
+        Returns a copy of this context with the given options changed.
+        """
+        options = dict((name, getattr(self, name)) for name in self.__slots__)
+        options.update(changes)
+        return self.__class__(**options)
+
+    @classmethod
+    def resolve(cls, ctx):
+        """
+        Returns `ctx`, or a context built from the module-level defaults if it is `None`.
+        """
+        return ctx if ctx is not None else cls(auto_id_field=auto_id_field)
+
+    def __reduce__(self):
+        return (self.__class__, (), dict((name, getattr(self, name)) for name in self.__slots__))
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+    def __eq__(self, other):
+        return isinstance(other, EvaluationContext) and all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, name) for name in self.__slots__))
+
+    def __repr__(self):
+        return '%s(%s)' % (self.__class__.__name__, ', '.join('%s=%r' % (name, getattr(self, name)) for name in self.__slots__))
+
+def _is_sequence(value):
+    """
+    Whether `value` is indexed like a JSON array: any sequence but a string.
+    """
+    if isinstance(value, list):
+        return True
+    if value is None or isinstance(value, _string_types + (bytes, bytearray, Mapping)):
+        return False
+    # Some sequence-like objects do not register as a Sequence, but we can still index them
+    return isinstance(value, Sequence) or (hasattr(value, '__len__') and hasattr(value, '__getitem__'))
+
+def _auto_id_field(ctx):
+    return auto_id_field if ctx is None else ctx.auto_id_field
+
+def _budget(ctx):
+    return None if ctx is None else ctx.budget
+
+class JsonPathBudgetExceeded(Exception):
+    """
+    Raised when an evaluation visits more datums than allowed or runs past
+    its deadline. `matches` holds whatever was found before stopping.
+    """
+    def __init__(self, message, matches=None):
+        super(JsonPathBudgetExceeded, self).__init__(message)
+        self.matches = matches if matches is not None else []
+
+class Budget(object):
+    """
+    Tracks the work done by one evaluation against a maximum number of
+    visited datums and a deadline (an absolute `time.time()`), raising
+    `JsonPathBudgetExceeded` as soon as either is exceeded. The clock is
+    only read every `clock_interval` visits.
+
+    With `pause_every`, lazy traversal also produces a pause in place of a
+    match after every that many visits, for an asynchronous caller to hand
+    control back to its event loop; see `jsonpath_rw.aio.afind`.
+    """
+    clock_interval = 256
+
+    def __init__(self, max_nodes_visited=None, deadline=None, pause_every=None):
+        self.max_nodes_visited = max_nodes_visited
+        self.deadline = deadline
+        self.pause_every = pause_every
+        self.visited = 0
+        self.next_clock_check = 0
+        self.next_pause = pause_every
+
+    def visit(self, count=1):
+        self.visited += count
+        if self.max_nodes_visited is not None and self.visited > self.max_nodes_visited:
+            raise JsonPathBudgetExceeded('Visited more than %d datums' % self.max_nodes_visited)
+        if self.deadline is not None and self.visited >= self.next_clock_check:
+            self.next_clock_check = self.visited + self.clock_interval
+            if time.time() > self.deadline:
+                raise JsonPathBudgetExceeded('Deadline exceeded after visiting %d datums' % self.visited)
+
+    def pause_due(self):
+        """
+        Whether `pause_every` more datums have been visited since the last pause.
+        """
+        if self.pause_every is None or self.visited < self.next_pause:
+            return False
+        self.next_pause = self.visited + self.pause_every
+        return True
+
+# Produced by `find_iter()` in place of a match when the budget is due a pause; never returned by `find()`
+_PAUSE = object()
+
+def _without_pauses(matches):
+    return (match for match in matches if match is not _PAUSE)
+
+def _collect(matches, ctx):
+    """
+    The list of `matches` from a `find_iter()`, for `find()`.
+    """
+    budget = _budget(ctx)
+    if budget is None or budget.pause_every is None:
+        return list(matches)
+    return list(_without_pauses(matches))
 
 class JSONPath(object):
     """
@@ -17,15 +173,50 @@ class JSONPath(object):
     JSONPath semantics.
     """
 
-    def find(self, data):
+    def find(self, data, ctx=None):
         """
         All `JSONPath` types support `find()`, which returns an iterable of `DatumInContext`s.
         They keep track of the path followed to the current location, so if the calling code
         has some opinion about that, it can be passed in here as a starting point.
+
+        The optional `ctx` is an `EvaluationContext` that must be passed along
+        to any subexpressions.
         """
         raise NotImplementedError()
 
-    def update(self, data, val):
+    def find_iter(self, data, ctx=None):
+        """
+        Like `find()`, but returns an iterator that produces the matches
+        lazily where the node supports it. Nodes that do not override this
+        simply iterate over the result of `find()`.
+        """
+        return iter(self.find(data, ctx))
+
+    def afind(self, data, **kwargs):
+        """
+        Coroutine version of `find()` for use with asyncio; see
+        `jsonpath_rw.aio.afind` for the options. Requires Python 3.
+        """
+        from jsonpath_rw.aio import afind
+        return afind(self, data, **kwargs)
+
+    def profile(self, data, stats, ctx=None):
+        """
+        Like `find()`, but records per-node counts and timings into `stats`, a
+        `jsonpath_rw.profiling.ProfileStats`. Only an instrumented copy of
+        the expression is evaluated, so plain `find()` pays nothing for this.
+        """
+        return stats.instrument(self).find(data, ctx)
+
+    def explain(self, stats=None):
+        """
+        Returns the AST as an indented tree, annotated with the numbers from
+        `stats` if it has been passed to `profile()`.
+        """
+        from jsonpath_rw.profiling import explain
+        return explain(self, stats)
+
+    def update(self, data, val, ctx=None):
         """
         Returns `data` with the specified path replaced by `val`. Only updates
         if the specified path exists.
@@ -33,6 +224,226 @@ class JSONPath(object):
 
         raise NotImplementedError()
 
+    def delete(self, data, ctx=None):
+        """
+        Removes every location matched in `data` and returns `data`. All the
+        matches are found first, then object keys are deleted and each array
+        that loses elements is compacted once, so the positions of the
+        matches cannot shift under each other. The root itself, automatic
+        ids and aggregates are not locations and are left alone.
+        """
+        _remove_all((container.value, key) for container, key in self._deletion_targets(data, ctx))
+        return data
+
+    def deleted(self, data, ctx=None):
+        """
+        Like `delete()`, but leaves `data` alone and returns a new document
+        without the matched locations. Only the objects and arrays along
+        the paths to them are copied; everything else is shared with `data`.
+        """
+        root = DatumInContext.wrap(data).root.value
+        targets = list(self._deletion_targets(data, ctx))
+        if not targets:
+            return root
+
+        result = _shallow_copy(root)
+        copies = {id(result): result}
+        removals = []
+        for container, key in targets:
+            try:
+                path = container.path_tuple
+            except ValueError:
+                continue
+            node = result
+            for segment in path:
+                child = node[segment]
+                if id(child) not in copies:
+                    child = node[segment] = _shallow_copy(child)
+                    copies[id(child)] = child
+                node = child
+            removals.append((node, key))
+
+        _remove_all(removals)
+        return result
+
+    def _deletion_targets(self, data, ctx):
+        """
+        Yields `(container, key)` for each match that can be deleted: the
+        datum holding it and its key or index there.
+        """
+        for match in self.find(data, ctx):
+            target = _deletion_target(match)
+            if target is not None:
+                yield target
+
+    def find_bounded(self, data, limit=None, max_nodes_visited=None, deadline=None, partial=False, ctx=None):
+        """
+        Like `find()`, but bounds the work done: at most `limit` matches are
+        returned (evaluation stops as soon as they are found), and if more
+        than `max_nodes_visited` datums are visited or the clock passes
+        `deadline` (an absolute `time.time()`), `JsonPathBudgetExceeded` is
+        raised, or with `partial=True` the matches found so far are returned.
+        """
+        budget = Budget(max_nodes_visited=max_nodes_visited, deadline=deadline)
+        ctx = EvaluationContext.resolve(ctx).replace(budget=budget)
+
+        matches = []
+        try:
+            budget.visit(0) # The deadline may already have passed
+            for match in islice(self.find_iter(data, ctx), limit):
+                matches.append(match)
+        except JsonPathBudgetExceeded as exc:
+            if partial:
+                return matches
+            exc.matches = matches
+            raise
+
+        return matches
+
+    def find_memoized(self, data, ctx=None):
+        """
+        Like `find()`, but remembers the matches of each subexpression at each
+        datum for the length of the call, and evaluates structurally equal
+        subexpressions only once; see `jsonpath_rw.memo.Memo`. This pays off
+        for queries that evaluate the same thing repeatedly, such as unions
+        with a common prefix or `where` clauses on `$` or `` `parent` ``.
+        """
+        from jsonpath_rw.memo import Memo
+        return list(Memo().wrap(self).find(DatumInContext.wrap(data), ctx))
+
+    def specialize(self, schema_or_samples):
+        """
+        Returns an equivalent expression specialized to documents described
+        by a JSON Schema (a dict) or resembling some sample documents (any
+        other iterable of them): steps skip the generic type checks where
+        the shape guarantees the types, falling back to them for documents
+        that do not conform, and with a schema, descendant queries skip
+        subtrees that cannot contain what they look for. See
+        `jsonpath_rw.specialize`.
+        """
+        from jsonpath_rw.specialize import specialize, infer_shape
+        return specialize(self, infer_shape(schema_or_samples), prune=isinstance(schema_or_samples, Mapping))
+
+    def count(self, data, ctx=None):
+        """
+        The number of matches, counted as they are found.
+        """
+        return Len().fold(self.find_iter(data, ctx))
+
+    def sum(self, data, ctx=None):
+        """
+        The sum of the numbers among the matched values, as for `sum`.
+        """
+        return Sum().fold(self.find_iter(data, ctx))
+
+    def reduce(self, data, function, initial, ctx=None):
+        """
+        Folds `function(accumulator, value)` over the matched values, starting
+        from `initial`, as the matches are found.
+        """
+        result = initial
+        for match in self.find_iter(data, ctx):
+            result = function(result, match.value)
+        return result
+
+    def min(self, data, ctx=None):
+        """
+        The smallest matched number, or if none matches, the smallest
+        matched string, or None; see `_extremum()`.
+        """
+        return self._extremum(data, lambda value, best: value < best, ctx)
+
+    def max(self, data, ctx=None):
+        """
+        The largest matched number, or if none matches, the largest
+        matched string, or None; see `_extremum()`.
+        """
+        return self._extremum(data, lambda value, best: value > best, ctx)
+
+    def _extremum(self, data, better, ctx):
+        """
+        The matched number that is `better` than all the others, or failing
+        that the string that is. Other values, including booleans, cannot
+        be ordered against these, so as with `sum` they are skipped.
+        """
+        best_number = best_string = _NOTHING
+        for match in self.find_iter(data, ctx):
+            value = match.value
+            if isinstance(value, bool):
+                continue
+            elif isinstance(value, _integer_types + (float,)):
+                if best_number is _NOTHING or better(value, best_number):
+                    best_number = value
+            elif isinstance(value, _string_types):
+                if best_string is _NOTHING or better(value, best_string):
+                    best_string = value
+
+        if best_number is not _NOTHING:
+            return best_number
+        return None if best_string is _NOTHING else best_string
+
+    def distinct(self, data, ctx=None):
+        """
+        The distinct matched values, in the order they are first found.
+        Unhashable values (objects and arrays) are compared by their content.
+        """
+        seen = set()
+        values = []
+        for match in self.find_iter(data, ctx):
+            value = match.value
+            try:
+                key = (isinstance(value, bool), value) # Keep True apart from 1
+                hash(key)
+            except TypeError:
+                import json
+                key = (None, json.dumps(value, sort_keys=True, default=repr))
+            if key not in seen:
+                seen.add(key)
+                values.append(value)
+        return values
+
+    def find_set(self, data, ctx=None):
+        """
+        Like `find()`, but returns a `jsonpath_rw.matchset.MatchSet`, which
+        stores the matches in shared arrays instead of as separate
+        `DatumInContext`s; use it when there may be very many matches.
+        """
+        from jsonpath_rw.matchset import MatchSet
+        return MatchSet.from_matches(self.find_iter(data, ctx))
+
+    def find_batch(self, docs, mode='values', executor=None, chunksize=64, ctx=None, workers=None):
+        """
+        Runs `find()` over every document in `docs`, returning one list of
+        results per document, in order. With `mode='values'` the results are
+        the matched values, with `mode='datums'` they are the `DatumInContext`s.
+
+        With `workers`, the documents are spread across a pool of that many
+        processes, started for this call, in chunks of `chunksize`. The
+        expression is pickled once and handed to each worker as it starts,
+        so only the documents travel with the chunks. Requires Python 3.7+.
+
+        A `concurrent.futures` executor of your own, such as a thread pool,
+        can be given instead; a process pool then receives the expression
+        along with every chunk.
+        """
+        if mode not in ('values', 'datums'):
+            raise ValueError('Unknown find_batch mode %r (expected \'values\' or \'datums\')' % (mode,))
+
+        ctx = EvaluationContext.resolve(ctx) # The defaults in this process, not the workers'
+        if workers is not None:
+            import pickle
+            from concurrent.futures import ProcessPoolExecutor
+            payload = pickle.dumps(self, pickle.HIGHEST_PROTOCOL)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_find_batch_init,
+                                     initargs=(payload, mode, ctx)) as pool:
+                futures = [pool.submit(_find_batch_worker, chunk) for chunk in _chunked(docs, chunksize)]
+                return [result for future in futures for result in future.result()]
+        elif executor is not None:
+            futures = [executor.submit(_find_batch_chunk, self, chunk, mode, ctx) for chunk in _chunked(docs, chunksize)]
+            return [result for future in futures for result in future.result()]
+        else:
+            return _find_batch_chunk(self, docs, mode, ctx)
+
     def child(self, child):
         """
         Equivalent to Child(self, next) but with some canonicalization
@@ -52,6 +463,35 @@ class JSONPath(object):
         else:
             return DatumInContext(value, path=Root(), context=None)
 
+def _chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _find_batch_chunk(expr, docs, mode, ctx):
+    find = expr.find
+    if mode == 'values':
+        return [[match.value for match in find(doc, ctx)] for doc in docs]
+    else:
+        return [find(doc, ctx) for doc in docs]
+
+# The `(expr, mode, ctx)` of the `find_batch()` that started this worker process
+_worker_batch = None
+
+def _find_batch_init(payload, mode, ctx):
+    global _worker_batch
+    import pickle
+    _worker_batch = (pickle.loads(payload), mode, ctx)
+
+def _find_batch_worker(docs):
+    expr, mode, ctx = _worker_batch
+    return _find_batch_chunk(expr, docs, mode, ctx)
+
 class DatumInContext(object):
     """
     Represents a datum along a path from a context.
@@ -68,7 +508,17 @@ class DatumInContext(object):
     which extends the path. If the datum already has a context, it places the entire
     context within that passed in, so an object can be built from the inside
     out.
+
+    Datums are not modified once built, so each one keeps a direct pointer to
+    the `root` of its context chain and computes its `full_path` and
+    `id_pseudopath` only once. These walk up the chain iteratively and reuse
+    whatever their ancestors have already computed, so sibling matches share
+    the work done for their common parent.
     """
+    # Whether this is the one-element array that `Slice` puts a non-array
+    # value in, rather than a value that is actually in the document
+    coerced = False
+
     @classmethod
     def wrap(cls, data):
         if isinstance(data, cls):
@@ -80,6 +530,10 @@ class DatumInContext(object):
         self.value = value
         self.path = path or This()
         self.context = None if context is None else DatumInContext.wrap(context)
+        self.root = self if self.context is None else self.context.root
+        self._full_path = None
+        self._path_tuple = None
+        self._id_pseudopath = None # (id_field, pseudopath) for the latest id field asked for
 
     def in_context(self, context, path):
         context = DatumInContext.wrap(context)
@@ -91,22 +545,102 @@ class DatumInContext(object):
 
     @property
     def full_path(self):
-        return self.path if self.context is None else self.context.full_path.child(self.path)
+        if self._full_path is None:
+            pending = []
+            datum = self
+            while datum is not None and datum._full_path is None:
+                pending.append(datum)
+                datum = datum.context
+
+            full_path = None if datum is None else datum._full_path
+            for datum in reversed(pending):
+                full_path = datum.path if full_path is None else full_path.child(datum.path)
+                datum._full_path = full_path
+
+        return self._full_path
+
+    @property
+    def path_tuple(self):
+        """
+        The field names and array indices leading from the root to this datum,
+        as a tuple; a normalized, hashable alternative to `full_path`. The
+        positions in the arrays that a slice wraps non-arrays in are left
+        out, since they are not in the document.
+        """
+        if self._path_tuple is None:
+            segments = []
+            datum = self
+            while datum is not None and datum._path_tuple is None:
+                if datum.context is None or not datum.context.coerced:
+                    segments.extend(reversed(path_segments(datum.path)))
+                datum = datum.context
+
+            prefix = () if datum is None else datum._path_tuple
+            self._path_tuple = prefix + tuple(reversed(segments))
+
+        return self._path_tuple
+
+    @property
+    def json_pointer(self):
+        """
+        The path from the root to this datum as an RFC 6901 JSON Pointer.
+        """
+        return to_json_pointer(self.path_tuple)
 
     @property
     def id_pseudopath(self):
         """
         Looks like a path, but with ids stuck in when available
         """
-        try:
-            pseudopath = Fields(str(self.value[auto_id_field]))
-        except (TypeError, AttributeError, KeyError): # This may not be all the interesting exceptions
-            pseudopath = self.path
+        return self.get_id_pseudopath(auto_id_field)
 
-        if self.context:
-            return self.context.id_pseudopath.child(pseudopath)
-        else:
-            return pseudopath
+    def get_id_pseudopath(self, id_field):
+        """
+        Like `id_pseudopath` but for an explicit id field.
+        """
+        return self._id_entry(id_field)[1]
+
+    def _id_entry(self, id_field):
+        """
+        `(id_field, pseudopath, str(pseudopath))` for this datum, computed for
+        it and any ancestors that lack it and cached on each of them. The
+        string is built up alongside, so it is never rendered from the whole
+        pseudopath again.
+        """
+        pending = []
+        datum = self
+        while datum is not None:
+            cached = datum._id_pseudopath
+            if cached is not None and cached[0] == id_field:
+                break
+            pending.append(datum)
+            datum = datum.context
+
+        entry = None if datum is None else datum._id_pseudopath
+        for datum in reversed(pending):
+            value = datum.value
+            if isinstance(value, dict): # The common case, without the cost of an exception
+                id_value = value.get(id_field, _NOTHING)
+            else:
+                try:
+                    id_value = value[id_field]
+                except (TypeError, AttributeError, KeyError, IndexError): # This may not be all the interesting exceptions
+                    id_value = _NOTHING
+            segment = datum.path if id_value is _NOTHING else Fields(str(id_value))
+
+            if entry is None:
+                entry = (id_field, segment, str(segment))
+            else:
+                pseudopath = entry[1].child(segment)
+                if pseudopath is segment:
+                    entry = (id_field, segment, str(segment))
+                elif pseudopath is entry[1]:
+                    entry = (id_field, pseudopath, entry[2])
+                else:
+                    entry = (id_field, pseudopath, '%s.%s' % (entry[2], segment))
+            datum._id_pseudopath = entry
+
+        return entry
 
     def __repr__(self):
         return '%s(value=%r, path=%r, context=%r)' % (self.__class__.__name__, self.value, self.path, self.context)
@@ -125,7 +659,8 @@ class AutoIdForDatum(DatumInContext):
     that behaves like DatumInContext(value="foo.bar", path="foo.bar.id").
 
     This is disabled by default; it can be turned on by
-    settings the `auto_id_field` global to a value other
+    passing an `EvaluationContext` with an `auto_id_field`,
+    or by setting the `auto_id_field` global to a value other
     than `None`. 
     """
     
@@ -140,10 +675,16 @@ class AutoIdForDatum(DatumInContext):
         """
         self.datum = datum
         self.id_field = id_field or auto_id_field
+        self._full_path = None
+        self._path_tuple = None
+        self._id_pseudopath = None
+        self._value = None
 
     @property
     def value(self):
-        return str(self.datum.id_pseudopath)
+        if self._value is None:
+            self._value = self.datum._id_entry(self.id_field)[2]
+        return self._value
 
     @property
     def path(self):
@@ -153,11 +694,15 @@ class AutoIdForDatum(DatumInContext):
     def context(self):
         return self.datum
 
+    @property
+    def root(self):
+        return self.datum.root
+
     def __repr__(self):
         return '%s(%r)' % (self.__class__.__name__, self.datum)
 
     def in_context(self, context, path):
-        return AutoIdForDatum(self.datum.in_context(context=context, path=path))
+        return AutoIdForDatum(self.datum.in_context(context=context, path=path), id_field=self.id_field)
 
     def __eq__(self, other):
         return isinstance(other, AutoIdForDatum) and other.datum == self.datum and self.id_field == other.id_field
@@ -169,16 +714,16 @@ class Root(JSONPath):
     The root is the topmost datum without any context attached.
     """
 
-    def find(self, data):
+    def __reduce__(self):
+        return (self.__class__, ())
+
+    def find(self, data, ctx=None):
         if not isinstance(data, DatumInContext):
             return [DatumInContext(data, path=Root(), context=None)]
         else:
-            if data.context is None:
-                return [DatumInContext(data.value, context=None, path=Root())]
-            else:
-                return Root().find(data.context)
+            return [DatumInContext(data.root.value, context=None, path=Root())]
 
-    def update(self, data, val):
+    def update(self, data, val, ctx=None):
         return val
 
     def __str__(self):
@@ -195,10 +740,13 @@ class This(JSONPath):
     The JSONPath referring to the current datum. Concrete syntax is '@'.
     """
 
-    def find(self, datum):
+    def __reduce__(self):
+        return (self.__class__, ())
+
+    def find(self, datum, ctx=None):
         return [DatumInContext.wrap(datum)]
 
-    def update(self, data, val):
+    def update(self, data, val, ctx=None):
         return val
 
     def __str__(self):
@@ -220,20 +768,41 @@ class Child(JSONPath):
         self.left = left
         self.right = right
 
-    def find(self, datum):
+    def __reduce__(self):
+        return (self.__class__, (self.left, self.right))
+
+    def find(self, datum, ctx=None):
         """
         Extra special case: auto ids do not have children,
         so cut it off right now rather than auto id the auto id
         """
-        
+        if isinstance(self.right, Aggregate):
+            return self.right.aggregate(_without_pauses(self.left.find_iter(datum, ctx)), datum)
+
         return [submatch
-                for subdata in self.left.find(datum)
+                for subdata in self.left.find(datum, ctx)
                 if not isinstance(subdata, AutoIdForDatum)
-                for submatch in self.right.find(subdata)]
+                for submatch in self.right.find(subdata, ctx)]
+
+    def find_iter(self, datum, ctx=None):
+        if isinstance(self.right, Aggregate):
+            for match in self.find(datum, ctx):
+                yield match
+            return
+
+        for subdata in self.left.find_iter(datum, ctx):
+            if subdata is _PAUSE:
+                yield subdata
+            elif not isinstance(subdata, AutoIdForDatum):
+                for submatch in self.right.find_iter(subdata, ctx):
+                    yield submatch
+
+    def update(self, data, val, ctx=None):
+        if isinstance(self.right, Aggregate):
+            return data
 
-    def update(self, data, val):
-        for datum in self.left.find(data):
-            self.right.update(datum.value, val)
+        for datum in self.left.find(data, ctx):
+            self.right.update(datum.value, val, ctx)
         return data
 
     def __eq__(self, other):
@@ -252,7 +821,10 @@ class Parent(JSONPath):
     Available via named operator `parent`.
     """
 
-    def find(self, datum):
+    def __reduce__(self):
+        return (self.__class__, ())
+
+    def find(self, datum, ctx=None):
         datum = DatumInContext.wrap(datum)
         return [datum.context]
 
@@ -266,6 +838,75 @@ class Parent(JSONPath):
         return 'Parent()'
         
 
+class Aggregate(JSONPath):
+    """
+    Base class for named operators that fold all the matches of the
+    expression to their left into one value, as they are produced, so
+    `foo[*].bar.`sum`` adds up the values of `foo[*].bar` without
+    collecting them. On its own, an aggregate folds just the current datum.
+
+    The result is a single datum whose path is the aggregate, in the
+    context of the datum the expression was evaluated at. It is not a
+    location in the data, so updating it does nothing.
+    """
+    name = None
+
+    def __reduce__(self):
+        return (self.__class__, ())
+
+    def fold(self, matches):
+        raise NotImplementedError()
+
+    def aggregate(self, matches, datum):
+        return [DatumInContext(self.fold(matches), path=self, context=DatumInContext.wrap(datum))]
+
+    def find(self, datum, ctx=None):
+        datum = DatumInContext.wrap(datum)
+        return self.aggregate([datum], datum)
+
+    def update(self, data, val, ctx=None):
+        return data
+
+    def __eq__(self, other):
+        return isinstance(other, self.__class__)
+
+    def __str__(self):
+        return '`%s`' % self.name
+
+    def __repr__(self):
+        return '%s()' % self.__class__.__name__
+
+class Len(Aggregate):
+    """
+    The number of matches. Available via named operator `len`.
+    """
+    name = 'len'
+
+    def fold(self, matches):
+        count = 0
+        for _ in matches:
+            count += 1
+        return count
+
+class Sum(Aggregate):
+    """
+    The sum of the numbers among the matched values; other values,
+    including booleans, are skipped. Available via named operator `sum`.
+    """
+    name = 'sum'
+
+    def fold(self, matches):
+        total = 0
+        for match in matches:
+            value = match.value
+            if isinstance(value, bool):
+                continue
+            try:
+                total = total + value
+            except TypeError:
+                pass
+        return total
+
 class Where(JSONPath):
     """
     JSONPath that first matches the left, and then
@@ -280,12 +921,27 @@ class Where(JSONPath):
         self.left = left
         self.right = right
 
-    def find(self, data):
-        return [subdata for subdata in self.left.find(data) if self.right.find(subdata)]
-
-    def update(self, data, val):
-        for datum in self.find(data):
-            datum.path.update(data, val)
+    def __reduce__(self):
+        return (self.__class__, (self.left, self.right))
+
+    def find(self, data, ctx=None):
+        return [subdata for subdata in self.left.find(data, ctx) if self.right.find(subdata, ctx)]
+
+    def find_iter(self, data, ctx=None):
+        for subdata in self.left.find_iter(data, ctx):
+            if subdata is _PAUSE:
+                yield subdata
+                continue
+            for match in self.right.find_iter(subdata, ctx):
+                if match is _PAUSE:
+                    yield match
+                else:
+                    yield subdata
+                    break
+
+    def update(self, data, val, ctx=None):
+        for datum in self.find(data, ctx):
+            datum.path.update(data, val, ctx)
         return data
 
     def __str__(self):
@@ -304,69 +960,85 @@ class Descendants(JSONPath):
         self.left = left
         self.right = right
 
-    def find(self, datum):
+    def __reduce__(self):
+        return (self.__class__, (self.left, self.right))
+
+    def find(self, datum, ctx=None):
+        return _collect(self.find_iter(datum, ctx), ctx)
+
+    def find_iter(self, datum, ctx=None):
         # <left> .. <right> ==> <left> . (<right> | *..<right> | [*]..<right>)
         #
         # With with a wonky caveat that since Slice() has funky coercions
         # we cannot just delegate to that equivalence or we'll hit an 
         # infinite loop. So right here we implement the coercion-free version.
+        #
+        # The traversal is pre-order like the recursive definition, but keeps
+        # an explicit stack of child iterators so deep documents cannot hit
+        # the recursion limit.
+        budget = _budget(ctx)
+        for left_match in self.left.find_iter(datum, ctx):
+            if left_match is _PAUSE:
+                yield left_match
+                continue
+
+            stack = [iter([left_match])]
+            while stack:
+                try:
+                    current = next(stack[-1])
+                except StopIteration:
+                    stack.pop()
+                    continue
+
+                if budget is not None:
+                    budget.visit()
+                    if budget.pause_due():
+                        yield _PAUSE
+
+                for submatch in self.right.find_iter(current, ctx):
+                    yield submatch
+
+                # Manually do the * or [*] to avoid coercion and recurse just the right-hand pattern
+                value = current.value
+                if isinstance(value, (list, dict)) or isinstance(value, Mapping) or _is_sequence(value):
+                    stack.append(self.iter_children(current))
+
+    @staticmethod
+    def iter_children(datum):
+        if _is_sequence(datum.value):
+            for i in xrange(0, len(datum.value)):
+                yield DatumInContext(datum.value[i], context=datum, path=Index(i))
+        else:
+            for field in datum.value.keys():
+                yield DatumInContext(datum.value[field], context=datum, path=Fields(field))
 
-        # Get all left matches into a list
-        left_matches = self.left.find(datum)
-        if not isinstance(left_matches, list):
-            left_matches = [left_matches]
-
-        def match_recursively(datum):
-            right_matches = self.right.find(datum)
-
-            # Manually do the * or [*] to avoid coercion and recurse just the right-hand pattern
-            if isinstance(datum.value, list):
-                recursive_matches = [submatch
-                                     for i in range(0, len(datum.value))
-                                     for submatch in match_recursively(DatumInContext(datum.value[i], context=datum, path=Index(i)))]
-
-            elif isinstance(datum.value, dict):
-                recursive_matches = [submatch
-                                     for field in datum.value.keys()
-                                     for submatch in match_recursively(DatumInContext(datum.value[field], context=datum, path=Fields(field)))]
-
-            else:
-                recursive_matches = []
-
-            return right_matches + list(recursive_matches)
-                
-        # TODO: repeatable iterator instead of list?
-        return [submatch
-                for left_match in left_matches
-                for submatch in match_recursively(left_match)]
-            
     def is_singular(self):
         return False
 
-    def update(self, data, val):
+    def update(self, data, val, ctx=None):
         # Get all left matches into a list
-        left_matches = self.left.find(data)
+        left_matches = self.left.find(data, ctx)
         if not isinstance(left_matches, list):
             left_matches = [left_matches]
 
-        def update_recursively(data):
-            # Update only mutable values corresponding to JSON types
-            if not (isinstance(data, list) or isinstance(data, dict)):
-                return
-
-            self.right.update(data, val)
+        # An explicit stack rather than recursion, so deep documents cannot hit the recursion limit
+        stack = [submatch.value for submatch in reversed(left_matches)]
+        while stack:
+            current = stack.pop()
 
-            # Manually do the * or [*] to avoid coercion and recurse just the right-hand pattern
-            if isinstance(data, list):
-                for i in range(0, len(data)):
-                    update_recursively(data[i])
+            # Update only mutable values corresponding to JSON types
+            if not (isinstance(current, list) or isinstance(current, dict)):
+                continue
 
-            elif isinstance(data, dict):
-                for field in data.keys():
-                    update_recursively(data[field])
+            self.right.update(current, val, ctx)
 
-        for submatch in left_matches:
-            update_recursively(submatch.value)
+            # Manually do the * or [*] to avoid coercion and recurse just the right-hand pattern,
+            # but not into `val` where it was just put, which may well match again
+            if isinstance(current, list):
+                children = reversed(current)
+            else:
+                children = (current[field] for field in reversed(list(current.keys())))
+            stack.extend(child for child in children if child is not val)
 
         return data
 
@@ -390,11 +1062,23 @@ class Union(JSONPath):
         self.left = left
         self.right = right
 
+    def __reduce__(self):
+        return (self.__class__, (self.left, self.right))
+
     def is_singular(self):
         return False
 
-    def find(self, data):
-        return self.left.find(data) + self.right.find(data)
+    def find(self, data, ctx=None):
+        return self.left.find(data, ctx) + self.right.find(data, ctx)
+
+    def find_iter(self, data, ctx=None):
+        return chain(self.left.find_iter(data, ctx), self.right.find_iter(data, ctx))
+
+    def __str__(self):
+        return '%s|%s' % (self.left, self.right)
+
+    def __eq__(self, other):
+        return isinstance(other, Union) and self.left == other.left and self.right == other.right
 
 class Intersect(JSONPath):
     """
@@ -411,12 +1095,21 @@ class Intersect(JSONPath):
         self.left = left
         self.right = right
 
+    def __reduce__(self):
+        return (self.__class__, (self.left, self.right))
+
     def is_singular(self):
         return False
 
-    def find(self, data):
+    def find(self, data, ctx=None):
         raise NotImplementedError()
 
+    def __str__(self):
+        return '%s&%s' % (self.left, self.right)
+
+    def __eq__(self, other):
+        return isinstance(other, Intersect) and self.left == other.left and self.right == other.right
+
 class Fields(JSONPath):
     """
     JSONPath referring to some field of the current object.
@@ -429,34 +1122,44 @@ class Fields(JSONPath):
     def __init__(self, *fields):
         self.fields = fields
 
-    def get_field_datum(self, datum, field):
+    def __reduce__(self):
+        return (self.__class__, tuple(self.fields))
+
+    def get_field_datum(self, datum, field, ctx=None):
         try:
             field_value = datum.value[field] # Do NOT use `val.get(field)` since that confuses None as a value and None due to `get`
             return DatumInContext(value=field_value, path=Fields(field), context=datum)
         except (TypeError, KeyError, AttributeError):
-            if field == auto_id_field:
-                return AutoIdForDatum(datum)
+            id_field = _auto_id_field(ctx)
+            if field == id_field:
+                return AutoIdForDatum(datum, id_field=id_field)
             return None
 
-    def reified_fields(self, datum):
+    def reified_fields(self, datum, ctx=None):
         if '*' not in self.fields:
             return self.fields
         else:
             try:
                 fields = tuple(datum.value.keys())
-                return fields if auto_id_field is None else fields + (auto_id_field,)
+                id_field = _auto_id_field(ctx)
+                return fields if id_field is None else fields + (id_field,)
             except AttributeError:
                 return ()
 
-    def find(self, datum):
+    def find(self, datum, ctx=None):
         datum  = DatumInContext.wrap(datum)
+        fields = self.reified_fields(datum, ctx)
+
+        budget = _budget(ctx)
+        if budget is not None:
+            budget.visit(len(fields))
         
         return  [field_datum
-                 for field_datum in [self.get_field_datum(datum, field) for field in self.reified_fields(datum)]
+                 for field_datum in [self.get_field_datum(datum, field, ctx) for field in fields]
                  if field_datum is not None]
 
-    def update(self, data, val):
-        for field in self.reified_fields(DatumInContext.wrap(data)):
+    def update(self, data, val, ctx=None):
+        for field in self.reified_fields(DatumInContext.wrap(data), ctx):
             if field in data:
                 data[field] = val
         return data
@@ -470,30 +1173,236 @@ class Fields(JSONPath):
     def __eq__(self, other):
         return isinstance(other, Fields) and tuple(self.fields) == tuple(other.fields)
 
+    @classmethod
+    def build(cls, *fields):
+        """
+        The `Fields` for `fields`, as an instance of the subclass specialized
+        for their kind where there is one. This is what the parser builds.
+        """
+        if fields == ('*',):
+            return AllFields('*')
+        elif '*' in fields:
+            return Fields(*fields)
+        elif len(fields) == 1:
+            return SingleField(fields[0])
+        else:
+            return MultipleFields(*fields)
+
+# The specialized kinds of `Fields` below evaluate with a loop of their own,
+# but are otherwise indistinguishable from the generic `Fields`: they compare,
+# print and repr the same.
+
+class SingleField(Fields):
+    """
+    `Fields` for a single named field, the most common step of all.
+    """
+
+    def __init__(self, field):
+        self.fields = (field,)
+        self.field = field
+
+    def find(self, datum, ctx=None):
+        datum = DatumInContext.wrap(datum)
+
+        budget = _budget(ctx)
+        if budget is not None:
+            budget.visit()
+
+        try:
+            field_value = datum.value[self.field]
+        except (TypeError, KeyError, AttributeError):
+            id_field = _auto_id_field(ctx)
+            if self.field == id_field:
+                return [AutoIdForDatum(datum, id_field=id_field)]
+            return []
+        return [DatumInContext(field_value, path=self, context=datum)]
+
+    def update(self, data, val, ctx=None):
+        if self.field in data:
+            data[self.field] = val
+        return data
+
+    def __repr__(self):
+        return 'Fields(%r)' % (self.field,)
+
+class MultipleFields(Fields):
+    """
+    `Fields` for several named fields, as in `a,b`.
+    """
+
+    def find(self, datum, ctx=None):
+        datum = DatumInContext.wrap(datum)
+        value = datum.value
+
+        budget = _budget(ctx)
+        if budget is not None:
+            budget.visit(len(self.fields))
+
+        matches = []
+        for field in self.fields:
+            try:
+                matches.append(DatumInContext(value[field], path=SingleField(field), context=datum))
+            except (TypeError, KeyError, AttributeError):
+                if field == _auto_id_field(ctx):
+                    matches.append(AutoIdForDatum(datum, id_field=field))
+        return matches
+
+    def update(self, data, val, ctx=None):
+        for field in self.fields:
+            if field in data:
+                data[field] = val
+        return data
+
+    def __repr__(self):
+        return 'Fields(%s)' % ','.join(map(repr, self.fields))
+
+class AllFields(Fields):
+    """
+    `Fields` for every field, as in `*`.
+    """
+
+    def __init__(self, *fields):
+        self.fields = ('*',)
+
+    def find(self, datum, ctx=None):
+        if _auto_id_field(ctx) is not None:
+            return Fields.find(self, datum, ctx)
+
+        datum = DatumInContext.wrap(datum)
+        try:
+            items = datum.value.items()
+        except AttributeError:
+            return []
+
+        budget = _budget(ctx)
+        if budget is not None:
+            budget.visit(len(items))
+
+        return [DatumInContext(field_value, path=SingleField(field), context=datum) for field, field_value in items]
+
+    def update(self, data, val, ctx=None):
+        try:
+            fields = list(data.keys())
+        except AttributeError:
+            return data
+        for field in fields:
+            data[field] = val
+        return data
+
+    def __repr__(self):
+        return "Fields('*')"
+
+
+class FieldPattern(JSONPath):
+    """
+    JSONPath referring to the fields of the current object whose names
+    match a pattern: a glob such as `metric_*` (matching whole names, with
+    `*` and `?` wildcards) or, with `regex=True`, a regular expression
+    found anywhere in the name. Concrete syntax is the bare glob, or the
+    regular expression between slashes as in `/^metric_/`.
+
+    The pattern is compiled once. Objects of the same shape are common, so
+    the matching names are cached per distinct sequence of keys, and only
+    new shapes run the matcher.
+    """
+    max_cached_shapes = 256
+
+    def __init__(self, pattern, regex=False):
+        self.pattern = pattern
+        self.regex = regex
+        if regex:
+            import re
+            self.matcher = re.compile(pattern).search
+        else:
+            import re, fnmatch
+            self.matcher = re.compile(fnmatch.translate(pattern)).match
+        self.shapes = {} # tuple of keys -> frozenset of the matching ones
+
+    def __reduce__(self):
+        return (self.__class__, (self.pattern, self.regex))
+
+    def matching(self, keys):
+        """
+        The set of names among `keys` (a tuple) that match the pattern.
+        """
+        matched = self.shapes.get(keys)
+        if matched is None:
+            matcher = self.matcher
+            matched = frozenset(key for key in keys if isinstance(key, _string_types) and matcher(key))
+            if len(self.shapes) >= self.max_cached_shapes:
+                self.shapes.clear()
+            self.shapes[keys] = matched
+        return matched
+
+    def find(self, datum, ctx=None):
+        datum = DatumInContext.wrap(datum)
+        value = datum.value
+        if not isinstance(value, Mapping):
+            return []
+
+        budget = _budget(ctx)
+        if budget is not None:
+            budget.visit(len(value))
+
+        matched = self.matching(tuple(value))
+        if not matched:
+            return []
+        return [DatumInContext(field_value, path=Fields(field), context=datum)
+                for field, field_value in value.items() if field in matched]
+
+    def update(self, data, val, ctx=None):
+        if isinstance(data, Mapping):
+            for field in self.matching(tuple(data)):
+                data[field] = val
+        return data
+
+    def __str__(self):
+        return '/%s/' % self.pattern.replace('/', '\\/') if self.regex else self.pattern
+
+    def __repr__(self):
+        return '%s(%r%s)' % (self.__class__.__name__, self.pattern, ', regex=True' if self.regex else '')
+
+    def __eq__(self, other):
+        return isinstance(other, FieldPattern) and self.pattern == other.pattern and self.regex == other.regex
 
 class Index(JSONPath):
     """
     JSONPath that matches indices of the current datum, or none if not large enough.
-    Concrete syntax is brackets. 
+    Concrete syntax is brackets. Negative indices count back from the end.
 
-    WARNING: If the datum is None or not long enough, it will not crash but will not match anything.
+    WARNING: If the datum is not a sequence or not long enough, it will not crash but will not match anything.
     NOTE: For the concrete syntax of `[*]`, the abstract syntax is a Slice() with no parameters (equiv to `[:]`
     """
 
     def __init__(self, index):
         self.index = index
 
-    def find(self, datum):
+    def __reduce__(self):
+        return (self.__class__, (self.index,))
+
+    def find(self, datum, ctx=None):
         datum = DatumInContext.wrap(datum)
         
-        if datum.value and len(datum.value) > self.index:
-            return [DatumInContext(datum.value[self.index], path=self, context=datum)]
+        budget = _budget(ctx)
+        if budget is not None:
+            budget.visit()
+
+        value = datum.value
+        if not _is_sequence(value):
+            return []
+
+        index = self.index if self.index >= 0 else self.index + len(value)
+        if 0 <= index < len(value):
+            # The path always holds the actual position, so it is the same however the element was reached
+            return [DatumInContext(value[index], path=self if index == self.index else Index(index), context=datum)]
         else:
             return []
 
-    def update(self, data, val):
-        if len(data) > self.index:
-            data[self.index] = val
+    def update(self, data, val, ctx=None):
+        if _is_sequence(data):
+            index = self.index if self.index >= 0 else self.index + len(data)
+            if 0 <= index < len(data):
+                data[index] = val
         return data
 
     def __eq__(self, other):
@@ -522,6 +1431,10 @@ class Slice(JSONPath):
     should be an array, they can write a slice operator and it will coerce
     a non-array value to an array.
 
+    The bounds and step follow Python's slicing rules, including negative
+    values, and apply to any sequence. Only the selected positions are
+    visited, lazily, so taking a few elements from a huge array is cheap.
+
     This may be a bit unfortunate because it would be nice to always have
     an iterator, but dictionaries and other objects may also be iterable,
     so this is the compromise.
@@ -531,36 +1444,289 @@ class Slice(JSONPath):
         self.end = end
         self.step = step
     
-    def find(self, datum):
+    def __reduce__(self):
+        return (self.__class__, (self.start, self.end, self.step))
+
+    def find(self, datum, ctx=None):
+        return _collect(self.find_iter(datum, ctx), ctx)
+
+    def indices(self, length):
+        """
+        The positions selected in a sequence of the given length, as an `xrange`
+        """
+        if self.start is None and self.end is None and self.step is None:
+            return xrange(0, length)
+        else:
+            return xrange(*slice(self.start, self.end, self.step).indices(length))
+
+    def find_iter(self, datum, ctx=None):
         datum = DatumInContext.wrap(datum)
         
         # Here's the hack. If it is a dictionary or some kind of constant,
-        # put it in a single-element list
-        if (isinstance(datum.value, dict) or isinstance(datum.value, six.integer_types) or isinstance(datum.value, six.string_types)):
-            return self.find(DatumInContext([datum.value], path=datum.path, context=datum.context))
-
-        # Some iterators do not support slicing but we can still
-        # at least work for '*'
-        if self.start == None and self.end == None and self.step == None:
-            return [DatumInContext(datum.value[i], path=Index(i), context=datum) for i in xrange(0, len(datum.value))]
-        else:
-            return [DatumInContext(datum.value[i], path=Index(i), context=datum) for i in range(0, len(datum.value))[self.start:self.end:self.step]]
-
-    def update(self, data, val):
-        for datum in self.find(data):
-            datum.path.update(data, val)
+        # put it in a single-element list, but only if that element is selected
+        if not _is_sequence(datum.value):
+            if not self.indices(1):
+                return iter(())
+            datum = DatumInContext([datum.value], path=datum.path, context=datum.context)
+            datum.coerced = True
+
+        indices = self.indices(len(datum.value))
+
+        budget = _budget(ctx)
+        if budget is not None:
+            return self._charged(budget, datum, indices)
+
+        return (DatumInContext(datum.value[i], path=Index(i), context=datum) for i in indices)
+
+    @staticmethod
+    def _charged(budget, datum, indices):
+        for i in indices:
+            budget.visit()
+            if budget.pause_due():
+                yield _PAUSE
+            yield DatumInContext(datum.value[i], path=Index(i), context=datum)
+
+    def update(self, data, val, ctx=None):
+        # A coerced non-sequence cannot be updated in place, so it is left alone
+        if _is_sequence(data):
+            for i in self.indices(len(data)):
+                data[i] = val
         return data
 
     def __str__(self):
-        if self.start == None and self.end == None and self.step == None:
+        if self.start is None and self.end is None and self.step is None:
             return '[*]'
         else:
-            return '[%s%s%s]' % (self.start or '', 
-                                   ':%d'%self.end if self.end else '',
-                                   ':%d'%self.step if self.step else '')
+            return '[%s:%s%s]' % ('' if self.start is None else self.start,
+                                  '' if self.end is None else self.end,
+                                  '' if self.step is None else ':%d' % self.step)
 
     def __repr__(self):
         return '%s(start=%r,end=%r,step=%r)' % (self.__class__.__name__, self.start, self.end, self.step)
 
     def __eq__(self, other):
         return isinstance(other, Slice) and other.start == self.start and self.end == other.end and other.step == self.step
+
+    @classmethod
+    def build(cls, start=None, end=None, step=None):
+        """
+        The `Slice` for these bounds, as an `AllIndices` if it takes every
+        element. This is what the parser builds.
+        """
+        if start is None and end is None and step is None:
+            return AllIndices()
+        return Slice(start=start, end=end, step=step)
+
+class AllIndices(Slice):
+    """
+    `Slice` of every element, as in `[*]`, with a loop of its own for
+    lists. It compares, prints and reprs the same as the generic `Slice`.
+    """
+
+    def __init__(self, start=None, end=None, step=None):
+        self.start = self.end = self.step = None
+
+    def find(self, datum, ctx=None):
+        datum = DatumInContext.wrap(datum)
+        value = datum.value
+        if type(value) is not list or _budget(ctx) is not None:
+            return Slice.find(self, datum, ctx)
+        return [DatumInContext(item, path=Index(i), context=datum) for i, item in enumerate(value)]
+
+    def find_iter(self, datum, ctx=None):
+        datum = DatumInContext.wrap(datum)
+        value = datum.value
+        if type(value) is not list or _budget(ctx) is not None:
+            return Slice.find_iter(self, datum, ctx)
+        return (DatumInContext(value[i], path=Index(i), context=datum) for i in xrange(len(value)))
+
+    def update(self, data, val, ctx=None):
+        if _is_sequence(data):
+            for i in xrange(len(data)):
+                data[i] = val
+        return data
+
+    def __repr__(self):
+        return 'Slice(start=None,end=None,step=None)'
+
+
+def path_segments(path):
+    """
+    Returns the tuple of field names and indices that a concrete path (as
+    found in `DatumInContext.path`) consists of. Raises `ValueError` for
+    paths that can match more than one location.
+    """
+    if isinstance(path, Fields) and len(path.fields) == 1 and path.fields[0] != '*':
+        return (path.fields[0],)
+    elif isinstance(path, Index):
+        return (path.index,)
+    elif isinstance(path, (This, Root, Aggregate)):
+        return ()
+    elif isinstance(path, Child):
+        return path_segments(path.left) + path_segments(path.right)
+    elif isinstance(path, _string_types): # The path of an AutoIdForDatum is just the id field
+        return (path,)
+    else:
+        raise ValueError('%r is not a path to a single location' % (path,))
+
+def to_json_pointer(segments):
+    """
+    Formats a sequence of field names and indices as an RFC 6901 JSON Pointer.
+    """
+    return ''.join('/' + _text_type(segment).replace('~', '~0').replace('/', '~1') for segment in segments)
+
+def parse_json_pointer(pointer):
+    """
+    Splits an RFC 6901 JSON Pointer into its (unescaped) reference tokens.
+    """
+    if pointer == '':
+        return ()
+    if not pointer.startswith('/'):
+        raise ValueError('Invalid JSON Pointer %r: must be empty or start with "/"' % (pointer,))
+    return tuple(token.replace('~1', '/').replace('~0', '~') for token in pointer[1:].split('/'))
+
+def _pointer_step(container, token):
+    """
+    The key or index in `container` that the reference token `token` is.
+    RFC 6901 only allows array indices written as non-negative decimals
+    without leading zeros.
+    """
+    if not isinstance(container, list):
+        return token
+    if isinstance(token, _integer_types):
+        index = token
+    elif token and all(c in '0123456789' for c in token) and (token == '0' or token[0] != '0'):
+        index = int(token)
+    else:
+        raise KeyError(token)
+    if index < 0:
+        raise IndexError(token)
+    return index
+
+def get_by_pointer(data, pointer):
+    """
+    Returns the value at `pointer` in `data`, by direct indexing. The
+    pointer is either an RFC 6901 string or a sequence of keys and indices
+    such as `DatumInContext.path_tuple`. Raises `KeyError` or `IndexError`
+    if there is no such location.
+    """
+    if isinstance(pointer, _string_types):
+        pointer = parse_json_pointer(pointer)
+
+    for token in pointer:
+        data = data[_pointer_step(data, token)]
+    return data
+
+def set_by_pointer(data, pointer, val):
+    """
+    Sets the value at `pointer` (as for `get_by_pointer`) in `data` to `val`
+    and returns `data`. The location's container must already exist; the
+    empty pointer refers to the whole document, so `val` itself is returned.
+    """
+    if isinstance(pointer, _string_types):
+        pointer = parse_json_pointer(pointer)
+
+    if not pointer:
+        return val
+
+    container = get_by_pointer(data, pointer[:-1])
+    container[_pointer_step(container, pointer[-1])] = val
+    return data
+
+def _deletion_target(match):
+    """
+    `(container, key)` for the location of `match`, or None if it is not
+    one that can be deleted.
+    """
+    if isinstance(match, AutoIdForDatum) or match.context is None:
+        return None
+    try:
+        segments = path_segments(match.path)
+    except ValueError:
+        return None
+    if len(segments) != 1:
+        return None
+
+    # Deleting from the array that a slice wraps a non-array in means deleting the value itself
+    container = match.context
+    if container.coerced:
+        return _deletion_target(container)
+
+    return container, segments[0]
+
+def _remove_all(targets):
+    """
+    Removes the `(container, key)` locations in `targets`, visiting each
+    container once; arrays are compacted in a single pass.
+    """
+    keys_by_container = {}
+    for container, key in targets:
+        entry = keys_by_container.get(id(container))
+        if entry is None:
+            entry = keys_by_container[id(container)] = (container, set())
+        entry[1].add(key)
+
+    for container, keys in keys_by_container.values():
+        if _is_sequence(container):
+            container[:] = [item for i, item in enumerate(container) if i not in keys]
+        else:
+            for key in keys:
+                if key in container:
+                    del container[key]
+
+def _shallow_copy(value):
+    if isinstance(value, (dict, list)):
+        return value.copy() if isinstance(value, dict) else list(value)
+    elif isinstance(value, Mapping):
+        return dict(value)
+    else:
+        return list(value)
+
+def project(data, exprs, ctx=None):
+    """
+    Returns a new document holding only the locations in `data` matched by
+    any of `exprs` (`JSONPath`s or strings to parse), with the objects and
+    arrays on the way to them. Matched values are shared with `data`, not
+    copied. Arrays keep the matched elements in their original order, so
+    the positions of the elements may differ from those in `data`.
+
+    Automatic ids and aggregates are not locations and are left out.
+    Returns None if nothing matches.
+    """
+    root = DatumInContext.wrap(data).root.value
+    tree = {} # Segment -> subtree, or None to keep the whole value
+    for expr in exprs:
+        if isinstance(expr, _string_types):
+            from jsonpath_rw.parser import parse
+            expr = parse(expr)
+        for match in expr.find_iter(data, ctx):
+            path = _projection_path(match)
+            if path is None:
+                continue
+            if not path:
+                return root
+
+            node = tree
+            for segment in path[:-1]:
+                node = node.setdefault(segment, {})
+                if node is None: # Already keeping all of it
+                    break
+            else:
+                node[path[-1]] = None
+
+    return _project(root, tree) if tree else None
+
+def _projection_path(match):
+    if isinstance(match, AutoIdForDatum) or isinstance(match.path, Aggregate):
+        return None
+    try:
+        return match.path_tuple
+    except ValueError:
+        return None
+
+def _project(value, tree):
+    if _is_sequence(value):
+        return [value[i] if tree[i] is None else _project(value[i], tree[i]) for i in sorted(tree)]
+    else:
+        return dict((key, value[key] if tree[key] is None else _project(value[key], tree[key]))
+                    for key in value if key in tree)
@@ -0,0 +1,311 @@
+"""
+Read-only views of JSON text that decode only what is looked at.
+
+`LazyJSON(buffer)` takes the encoded JSON as `bytes`, a `bytearray` or an
+`mmap` (or a `str`, which is encoded first) and returns a `LazyObject`
+(a `Mapping`) or `LazyArray` (a `Sequence`) for the top-level value, or
+the decoded value itself if it is a scalar. These behave like the `dict`
+and `list` that `json.loads` would return, so JSONPath expressions
+evaluate against them unchanged:
+
+    >>> parse('$.a.b[3]').find(LazyJSON(mm))
+
+An object or array finds where its members start and end the first time
+one of them is asked for, stepping over each member's text by matching
+brackets without decoding it. Members are decoded when first accessed
+and then cached, so a query only pays to decode the values along the
+paths it follows.
+"""
+from __future__ import unicode_literals, print_function, absolute_import, division, generators, nested_scopes
+import re
+import json
+
+try:
+    from collections.abc import Mapping, Sequence
+except ImportError: # Python 2
+    from collections import Mapping, Sequence
+
+from jsonpath_rw.jsonpath import _text_type
+
+_WHITESPACE = re.compile(br'[ \t\n\r]*')
+_STRING = re.compile(br'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_SCALAR = re.compile(br'[^,\]}\s]+')
+_STRUCTURE = re.compile(br'["\[\]{}]')
+
+# As ints, which is what `_byte` returns on Python 2 as well
+_QUOTE, _BACKSLASH, _COLON, _COMMA = bytearray(b'"\\:,')
+_OPEN_OBJECT, _CLOSE_OBJECT, _OPEN_ARRAY, _CLOSE_ARRAY = bytearray(b'{}[]')
+_OPEN = frozenset([_OPEN_OBJECT, _OPEN_ARRAY])
+
+def _byte(buffer, pos):
+    # An int for bytes and mmap alike, on Python 2 as well as 3
+    return bytearray(buffer[pos:pos + 1])[0] if pos < len(buffer) else None
+
+def _skip_whitespace(buffer, pos):
+    return _WHITESPACE.match(buffer, pos).end()
+
+def _skip_string(buffer, pos):
+    match = _STRING.match(buffer, pos)
+    if match is None:
+        raise ValueError('Unterminated string starting at byte %d' % pos)
+    return match.end()
+
+def _skip_container(buffer, pos):
+    """
+    Returns the position just after the object or array starting at `pos`,
+    found by matching brackets while stepping over strings.
+    """
+    depth = 0
+    search = _STRUCTURE.search
+    while True:
+        match = search(buffer, pos)
+        if match is None:
+            raise ValueError('Unterminated object or array')
+        start = match.start()
+        char = _byte(buffer, start)
+        if char == _QUOTE:
+            pos = _skip_string(buffer, start)
+            continue
+        depth += 1 if char in _OPEN else -1
+        pos = start + 1
+        if depth == 0:
+            return pos
+
+def _skip_value(buffer, pos):
+    char = _byte(buffer, pos)
+    if char == _QUOTE:
+        return _skip_string(buffer, pos)
+    elif char in _OPEN:
+        return _skip_container(buffer, pos)
+    else:
+        match = _SCALAR.match(buffer, pos)
+        if match is None:
+            raise ValueError('Expected a value at byte %d' % pos)
+        return match.end()
+
+def _decode_string(raw):
+    if _BACKSLASH not in bytearray(raw):
+        return raw[1:-1].decode('utf-8')
+    return json.loads(raw.decode('utf-8'))
+
+def _decode(buffer, start, end):
+    char = _byte(buffer, start)
+    if char == _OPEN_OBJECT:
+        return LazyObject(buffer, start, end)
+    elif char == _OPEN_ARRAY:
+        return LazyArray(buffer, start, end)
+    elif char == _QUOTE:
+        return _decode_string(buffer[start:end])
+    else:
+        return json.loads(buffer[start:end].decode('utf-8'))
+
+def _expect(buffer, pos, char):
+    if _byte(buffer, pos) != char:
+        raise ValueError('Expected %r at byte %d' % (chr(char), pos))
+    return pos + 1
+
+def _check_end(buffer, end):
+    """
+    Raises `ValueError` unless only whitespace follows `end` in `buffer`.
+    """
+    if _skip_whitespace(buffer, end) != len(buffer):
+        raise ValueError('Extra data after the JSON value at byte %d' % end)
+
+def LazyJSON(buffer):
+    """
+    Returns a lazy view of the JSON document encoded in `buffer`. An
+    object or array is not scanned yet, so anything malformed in it, or
+    after it, is only reported once it is looked into.
+    """
+    if isinstance(buffer, _text_type):
+        buffer = buffer.encode('utf-8')
+
+    start = _skip_whitespace(buffer, 0)
+    if _byte(buffer, start) in _OPEN:
+        return _decode(buffer, start, None)
+
+    end = _skip_value(buffer, start)
+    _check_end(buffer, end)
+    return _decode(buffer, start, end)
+
+class LazyObject(Mapping):
+    """
+    A JSON object in a buffer, decoded member by member on access. An
+    `end` of None means the object is the whole buffer, but for whitespace.
+    """
+
+    def __init__(self, buffer, start, end=None):
+        self.buffer = buffer
+        self.start = start
+        self.end = end
+        self._spans = None
+        self._keys = None
+        self._cache = {}
+
+    def _scan(self):
+        buffer = self.buffer
+        spans = {}
+        keys = []
+
+        pos = _skip_whitespace(buffer, _expect(buffer, self.start, _OPEN_OBJECT))
+        if _byte(buffer, pos) == _CLOSE_OBJECT:
+            pos += 1
+        else:
+            while True:
+                key_end = _skip_string(buffer, pos) if _byte(buffer, pos) == _QUOTE else None
+                if key_end is None:
+                    raise ValueError('Expected an object key at byte %d' % pos)
+                key = _decode_string(buffer[pos:key_end])
+
+                pos = _skip_whitespace(buffer, _expect(buffer, _skip_whitespace(buffer, key_end), _COLON))
+                value_end = _skip_value(buffer, pos)
+                if key not in spans:
+                    keys.append(key)
+                spans[key] = (pos, value_end) # As with json.loads, the last duplicate wins
+
+                pos = _skip_whitespace(buffer, value_end)
+                char = _byte(buffer, pos)
+                if char == _COMMA:
+                    pos = _skip_whitespace(buffer, pos + 1)
+                elif char == _CLOSE_OBJECT:
+                    pos += 1
+                    break
+                else:
+                    raise ValueError("Expected ',' or '}' at byte %d" % pos)
+
+        if self.end is None:
+            _check_end(buffer, pos)
+        self.end = pos
+        self._keys = keys
+        self._spans = spans
+
+    def __getitem__(self, key):
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        except TypeError: # Unhashable keys are simply missing
+            raise KeyError(key)
+
+        if self._spans is None:
+            self._scan()
+        start, end = self._spans[key]
+        value = self._cache[key] = _decode(self.buffer, start, end)
+        return value
+
+    def __iter__(self):
+        if self._keys is None:
+            self._scan()
+        return iter(self._keys)
+
+    def __len__(self):
+        if self._keys is None:
+            self._scan()
+        return len(self._keys)
+
+    def __contains__(self, key):
+        if self._spans is None:
+            self._scan()
+        try:
+            return key in self._spans
+        except TypeError:
+            return False
+
+    def to_python(self):
+        """
+        Decodes the whole object with `json.loads`.
+        """
+        if self.end is None:
+            end = _skip_value(self.buffer, self.start)
+            _check_end(self.buffer, end)
+            self.end = end
+        return json.loads(self.buffer[self.start:self.end].decode('utf-8'))
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, dict(self.items()))
+
+class LazyArray(Sequence):
+    """
+    A JSON array in a buffer, decoded element by element on access. An
+    `end` of None means the array is the whole buffer, but for whitespace.
+    """
+
+    def __init__(self, buffer, start, end=None):
+        self.buffer = buffer
+        self.start = start
+        self.end = end
+        self._spans = None
+        self._cache = {}
+
+    def _scan(self):
+        buffer = self.buffer
+        spans = []
+
+        pos = _skip_whitespace(buffer, _expect(buffer, self.start, _OPEN_ARRAY))
+        if _byte(buffer, pos) == _CLOSE_ARRAY:
+            pos += 1
+        else:
+            while True:
+                value_end = _skip_value(buffer, pos)
+                spans.append((pos, value_end))
+
+                pos = _skip_whitespace(buffer, value_end)
+                char = _byte(buffer, pos)
+                if char == _COMMA:
+                    pos = _skip_whitespace(buffer, pos + 1)
+                elif char == _CLOSE_ARRAY:
+                    pos += 1
+                    break
+                else:
+                    raise ValueError("Expected ',' or ']' at byte %d" % pos)
+
+        if self.end is None:
+            _check_end(buffer, pos)
+        self.end = pos
+        self._spans = spans
+
+    def __getitem__(self, index):
+        if self._spans is None:
+            self._scan()
+
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self._spans)))]
+
+        if index < 0:
+            index += len(self._spans)
+        try:
+            return self._cache[index]
+        except KeyError:
+            pass
+        start, end = self._spans[index] # Raises IndexError when out of range
+        value = self._cache[index] = _decode(self.buffer, start, end)
+        return value
+
+    def __len__(self):
+        if self._spans is None:
+            self._scan()
+        return len(self._spans)
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence) or isinstance(other, (bytes, _text_type)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def to_python(self):
+        """
+        Decodes the whole array with `json.loads`.
+        """
+        if self.end is None:
+            end = _skip_value(self.buffer, self.start)
+            _check_end(self.buffer, end)
+            self.end = end
+        return json.loads(self.buffer[self.start:self.end].decode('utf-8'))
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, list(self))
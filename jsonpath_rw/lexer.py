@@ -50,7 +50,7 @@ class JsonPathLexer(object):
 
     reserved_words = { 'where': 'WHERE' }
 
-    tokens = ['DOUBLEDOT', 'NUMBER', 'ID', 'NAMED_OPERATOR'] + list(reserved_words.values())
+    tokens = ['DOUBLEDOT', 'NUMBER', 'ID', 'GLOB', 'REGEX', 'NAMED_OPERATOR'] + list(reserved_words.values())
 
     states = [ ('singlequote', 'exclusive'),
                ('doublequote', 'exclusive'),
@@ -60,6 +60,17 @@ class JsonPathLexer(object):
     t_DOUBLEDOT = r'\.\.'
     t_ignore = ' \t'
 
+    # A field name with wildcards, such as metric_* (a lone * is a literal)
+    def t_GLOB(self, t):
+        r'[a-zA-Z_@][a-zA-Z0-9_@\-]*[*?][a-zA-Z0-9_@\-*?]*|[*?]+[a-zA-Z0-9_@\-][a-zA-Z0-9_@\-*?]*'
+        return t
+
+    # A regular expression for field names, between slashes
+    def t_REGEX(self, t):
+        r'/(?:[^/\\]|\\.)*/'
+        t.value = t.value[1:-1].replace('\\/', '/')
+        return t
+
     def t_ID(self, t):
         r'[a-zA-Z_@][a-zA-Z0-9_@\-]*'
         t.type = self.reserved_words.get(t.value, 'ID')
@@ -0,0 +1,284 @@
+"""
+Compact storage for large numbers of matches.
+
+A list of `DatumInContext`s costs several objects per match: the datum,
+its path node and every datum in its context chain. A `MatchSet` instead
+keeps each location in one slot of parallel arrays:
+
+- `parents`: the slot of the location's context, or -1 at a root
+- `segments`: the step from the context, a field name (`str`) or an array
+  index (`int`), or for anything else the path node itself
+- `values`: a reference to the value found there
+
+and stores the matches as an array of slots. Matches that share ancestors
+share their slots. `DatumInContext`s, and with them `full_path` and the
+`context` chain, are rebuilt only when asked for; `values()` and `paths()`
+read the arrays directly.
+
+    >>> matches = parse('orders[*].lines[*].sku').find_set(data)
+    >>> len(matches), list(matches.values())[:3], matches[0].full_path
+"""
+from __future__ import unicode_literals, print_function, absolute_import, division, generators, nested_scopes
+from array import array
+
+from jsonpath_rw.jsonpath import (DatumInContext, AutoIdForDatum, Fields, Index,
+                                  path_segments, to_json_pointer, _string_types, _integer_types)
+
+class _AutoId(object):
+    """
+    The segment recorded for an `AutoIdForDatum`, whose value is computed.
+    """
+    __slots__ = ('id_field',)
+
+    def __init__(self, id_field):
+        self.id_field = id_field
+
+class MatchStore(object):
+    """
+    The slot arrays shared by a `MatchSet` and the sets derived from it.
+    """
+
+    def __init__(self):
+        self.parents = array('l')
+        self.segments = []
+        self.values = []
+        self.coerced = set() # Slots of the arrays that a slice wraps non-arrays in
+
+    def __len__(self):
+        return len(self.parents)
+
+    def _slot(self, parent, segment, value):
+        self.parents.append(parent)
+        self.segments.append(segment)
+        self.values.append(value)
+        return len(self.parents) - 1
+
+    def add(self, datum, chain=None):
+        """
+        Stores `datum` and returns its slot. `chain` maps the `id()`s of
+        recently stored datums to `(datum, slot)`; ancestors found there are
+        shared rather than stored again, which is what lets siblings share
+        their context.
+        """
+        pending = []
+        parent = -1
+        while datum is not None:
+            if chain is not None:
+                known = chain.get(id(datum))
+                if known is not None and known[0] is datum:
+                    parent = known[1]
+                    break
+            pending.append(datum)
+            datum = datum.context
+
+        for datum in reversed(pending):
+            if isinstance(datum, AutoIdForDatum):
+                segment = _AutoId(datum.id_field)
+                # The id is computed, but kept so that values() need not rebuild the datum
+                parent = self._slot(parent, segment, datum.value)
+            else:
+                path = datum.path
+                if isinstance(path, Fields) and len(path.fields) == 1 and isinstance(path.fields[0], _string_types) and path.fields[0] != '*':
+                    segment = path.fields[0]
+                elif isinstance(path, Index):
+                    segment = path.index
+                else:
+                    segment = path
+                parent = self._slot(parent, segment, datum.value)
+                if datum.coerced:
+                    self.coerced.add(parent)
+            if chain is not None:
+                chain[id(datum)] = (datum, parent)
+
+        return parent
+
+    def datum(self, slot, cache=None):
+        """
+        Rebuilds the `DatumInContext` stored at `slot`, with its context chain.
+        """
+        pending = []
+        context = None
+        while slot != -1:
+            if cache is not None and slot in cache:
+                context = cache[slot]
+                break
+            pending.append(slot)
+            slot = self.parents[slot]
+
+        for slot in reversed(pending):
+            segment = self.segments[slot]
+            if isinstance(segment, _AutoId):
+                context = AutoIdForDatum(context, id_field=segment.id_field)
+            else:
+                if isinstance(segment, _string_types):
+                    path = Fields(segment)
+                elif isinstance(segment, _integer_types):
+                    path = Index(segment)
+                else:
+                    path = segment
+                context = DatumInContext(self.values[slot], path=path, context=context)
+                context.coerced = slot in self.coerced
+            if cache is not None:
+                cache[slot] = context
+
+        return context
+
+    def path(self, slot):
+        """
+        The `path_tuple` of the location at `slot`.
+        """
+        segments = []
+        while slot != -1:
+            segment = self.segments[slot]
+            if self.parents[slot] in self.coerced:
+                pass
+            elif isinstance(segment, _string_types) or isinstance(segment, _integer_types):
+                segments.append(segment)
+            elif isinstance(segment, _AutoId):
+                segments.append(segment.id_field)
+            else:
+                segments.extend(reversed(path_segments(segment)))
+            slot = self.parents[slot]
+        return tuple(reversed(segments))
+
+    def root(self, slot):
+        while self.parents[slot] != -1:
+            slot = self.parents[slot]
+        return slot
+
+class MatchSet(object):
+    """
+    An ordered collection of matches backed by a `MatchStore`. Supports
+    `len()`, indexing and slicing (slices share the store), iteration over
+    rebuilt `DatumInContext`s, and the set operations `|`, `&` and `-`,
+    which compare matches by location (root document and `path_tuple`)
+    and keep the order of the left operand followed by the right.
+    """
+
+    def __init__(self, store=None, slots=None):
+        self.store = MatchStore() if store is None else store
+        self.slots = array('l') if slots is None else slots
+
+    @classmethod
+    def from_matches(cls, matches):
+        """
+        Builds a `MatchSet` from an iterable of `DatumInContext`s, such as
+        the result of `find()` or `find_iter()`, consuming it one at a time.
+        """
+        match_set = cls()
+        match_set.extend(matches)
+        return match_set
+
+    def add(self, datum):
+        self.slots.append(self.store.add(datum))
+
+    def extend(self, matches):
+        store = self.store
+        slots = self.slots
+        chain = {}
+        for datum in matches:
+            # Holding on to every datum would defeat the purpose, so once in a
+            # while the shared ancestors are forgotten and stored afresh
+            if len(chain) > 4096:
+                chain.clear()
+            slots.append(store.add(datum, chain))
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return MatchSet(self.store, self.slots[index])
+        return self.store.datum(self.slots[index])
+
+    def __iter__(self):
+        cache = {}
+        datum = self.store.datum
+        for slot in self.slots:
+            if len(cache) > 1024:
+                cache.clear()
+            yield datum(slot, cache)
+
+    def values(self):
+        """
+        Iterates over the matched values without building any datums.
+        """
+        values = self.store.values
+        return (values[slot] for slot in self.slots)
+
+    def paths(self):
+        """
+        Iterates over the `path_tuple` of each match without building any datums.
+        """
+        path = self.store.path
+        return (path(slot) for slot in self.slots)
+
+    def json_pointers(self):
+        return (to_json_pointer(path) for path in self.paths())
+
+    def parent(self, index):
+        """
+        The context of the match at `index`, or None for a root.
+        """
+        parent = self.store.parents[self.slots[index]]
+        return None if parent == -1 else self.store.datum(parent)
+
+    def to_list(self):
+        return list(self)
+
+    def _keys(self):
+        # The same location may be stored in more than one slot, so matches
+        # are compared by the identity of their root value and their path
+        store = self.store
+        values = store.values
+        return [(id(values[store.root(slot)]), store.path(slot)) for slot in self.slots]
+
+    def _other(self, other):
+        return other if isinstance(other, MatchSet) else MatchSet.from_matches(other)
+
+    def _select(self, other, present):
+        """
+        The matches of `self`, without repeats, that are (or with
+        `present=False`, are not) also in `other`.
+        """
+        other = self._other(other)
+        right = set(other._keys())
+        result = MatchSet(self.store)
+        seen = set()
+        for slot, key in zip(self.slots, self._keys()):
+            if (key in right) == present and key not in seen:
+                seen.add(key)
+                result.slots.append(slot)
+        return result
+
+    def __or__(self, other):
+        other = self._other(other)
+        result = self._select((), False)
+        seen = set(self._keys())
+        for slot, key in zip(other.slots, other._keys()):
+            if key not in seen:
+                seen.add(key)
+                if other.store is self.store:
+                    result.slots.append(slot)
+                else:
+                    result.add(other.store.datum(slot))
+        return result
+
+    def __and__(self, other):
+        return self._select(other, True)
+
+    def __sub__(self, other):
+        return self._select(other, False)
+
+    def __eq__(self, other):
+        if isinstance(other, MatchSet):
+            return list(self.paths()) == list(other.paths()) and list(self.values()) == list(other.values())
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, list(self))
@@ -0,0 +1,123 @@
+from __future__ import unicode_literals, print_function, absolute_import, division, generators, nested_scopes
+import copy
+
+from jsonpath_rw.jsonpath import (JSONPath, DatumInContext, Root, Parent, Child, Where, Descendants, Union,
+                                  Intersect, Aggregate)
+
+def structure(node):
+    """
+    A hashable key that is equal for structurally equal expressions, built
+    from what each node pickles as.
+    """
+    cls, args = node.__reduce__()[:2]
+    return (cls, tuple(structure(arg) if isinstance(arg, JSONPath) else arg for arg in args))
+
+def anchor(node):
+    """
+    What the matches of `node` depend on besides the expression: 'root' if
+    only the root of the datum it is evaluated at, 'parent' if only the
+    datum's parent, and None if the datum itself.
+    """
+    if isinstance(node, Root):
+        return 'root'
+    elif isinstance(node, Parent):
+        return 'parent'
+    elif isinstance(node, Child) and isinstance(node.right, Aggregate):
+        return None # The aggregate is placed in the context of the datum itself
+    elif isinstance(node, (Child, Where, Descendants)):
+        return anchor(node.left)
+    elif isinstance(node, (Union, Intersect)):
+        left = anchor(node.left)
+        return left if left == anchor(node.right) else None
+    else:
+        return None
+
+class Memo(object):
+    """
+    Remembers the matches of every subexpression of an expression for each
+    datum it is evaluated at, for the length of one evaluation. Build a
+    memoizing copy of the expression with `wrap()` and evaluate that, or
+    simply call `JSONPath.find_memoized()`.
+
+    Structurally equal subexpressions, such as the `a.b` in `(a.b.c)|(a.b.d)`,
+    share one copy and so one set of remembered matches. Subexpressions that
+    start with `$` or `` `parent` `` are remembered per root or per parent,
+    so a `where` clause like `` `parent`.enabled `` is evaluated once for all
+    the siblings it filters rather than once for each.
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.hits = 0
+        self.misses = 0
+
+    def wrap(self, expr):
+        """
+        Returns a copy of `expr` in which every node remembers its matches
+        here. The original `expr` is left alone.
+        """
+        try:
+            key = structure(expr)
+            hash(key)
+        except TypeError: # An argument that cannot be compared by value
+            key = ('id', id(expr), expr)
+
+        node = self.nodes.get(key)
+        if node is None:
+            clone = copy.copy(expr)
+            for attr in ('left', 'right'):
+                child = getattr(expr, attr, None)
+                # Aggregates stay unwrapped, as `Child` looks for them on its right
+                if isinstance(child, JSONPath) and not isinstance(child, Aggregate):
+                    setattr(clone, attr, self.wrap(child))
+            node = self.nodes[key] = Memoized(clone, self, anchor(expr))
+        return node
+
+class Memoized(JSONPath):
+    """
+    Wraps a node to remember its matches in a `Memo`, keyed by the identity
+    of the datum (or of its root or parent, per the node's anchor). Built by
+    `Memo.wrap()` rather than directly.
+    """
+
+    def __init__(self, node, memo, anchor=None):
+        self.node = node
+        self.memo = memo
+        self.anchor = anchor
+        self.matches = {} # id(owner) -> (owner, matches); holding the owner keeps its id from being reused
+
+    def find(self, datum, ctx=None):
+        datum = DatumInContext.wrap(datum)
+        if self.anchor == 'root':
+            owner = datum.root
+        elif self.anchor == 'parent':
+            owner = datum.context
+        else:
+            owner = datum
+
+        entry = self.matches.get(id(owner))
+        if entry is not None:
+            self.memo.hits += 1
+            return entry[1]
+
+        self.memo.misses += 1
+        result = self.node.find(datum, ctx)
+        if not isinstance(result, list):
+            result = list(result)
+        self.matches[id(owner)] = (owner, result)
+        return result
+
+    def find_iter(self, datum, ctx=None):
+        return iter(self.find(datum, ctx))
+
+    def update(self, data, val, ctx=None):
+        return self.node.update(data, val, ctx)
+
+    def __str__(self):
+        return str(self.node)
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, self.node)
+
+    def __eq__(self, other):
+        return isinstance(other, Memoized) and self.node == other.node
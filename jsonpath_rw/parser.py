@@ -1,5 +1,6 @@
 from __future__ import print_function, absolute_import, division, generators, nested_scopes
 import sys
+import copy
 import os.path
 import logging
 
@@ -10,8 +11,14 @@ from jsonpath_rw.lexer import JsonPathLexer
 
 logger = logging.getLogger(__name__)
 
+_default_parser = None
+
 def parse(string):
-    return JsonPathParser().parse(string)
+    # A shared parser, so that its tables are only generated once per process
+    global _default_parser
+    if _default_parser is None:
+        _default_parser = JsonPathParser()
+    return _default_parser.parse(string)
 
 class JsonPathParser(object):
     '''
@@ -26,12 +33,22 @@ class JsonPathParser(object):
 
         self.debug = debug
         self.lexer_class = lexer_class or JsonPathLexer # Crufty but works around statefulness in PLY
+        self.ply_parsers = {} # start symbol -> PLY parser, used only as a template
 
     def parse(self, string, lexer = None):
         lexer = lexer or self.lexer_class()
         return self.parse_token_stream(lexer.tokenize(string))
 
     def parse_token_stream(self, token_iterator, start_symbol='jsonpath'):
+        # PLY keeps the state of a parse on the parser object, so each parse
+        # gets its own shallow copy of a parser whose tables are built once
+        new_parser = copy.copy(self.ply_parser(start_symbol))
+        return new_parser.parse(lexer = IteratorToTokenStream(token_iterator))
+
+    def ply_parser(self, start_symbol):
+        ply_parser = self.ply_parsers.get(start_symbol)
+        if ply_parser is not None:
+            return ply_parser
 
         # Since PLY has some crufty aspects and dumps files, we try to keep them local
         # However, we need to derive the name of the output Python file :-/
@@ -43,8 +60,8 @@ class JsonPathParser(object):
         
         parsing_table_module = '_'.join([module_name, start_symbol, 'parsetab'])
 
-        # And we regenerate the parse table every time; it doesn't actually take that long!
-        new_parser = ply.yacc.yacc(module=self,
+        # The tables are generated in memory rather than written out
+        ply_parser = ply.yacc.yacc(module=self,
                                    debug=self.debug,
                                    tabmodule = parsing_table_module,
                                    outputdir = output_directory,
@@ -52,7 +69,8 @@ class JsonPathParser(object):
                                    start = start_symbol,
                                    errorlog = logger)
 
-        return new_parser.parse(lexer = IteratorToTokenStream(token_iterator))
+        self.ply_parsers[start_symbol] = ply_parser
+        return ply_parser
 
     # ===================== PLY Parser specification =====================
     
@@ -89,7 +107,12 @@ class JsonPathParser(object):
 
     def p_jsonpath_fields(self, p):
         "jsonpath : fields_or_any"
-        p[0] = Fields(*p[1])
+        p[0] = Fields.build(*p[1])
+
+    def p_jsonpath_field_pattern(self, p):
+        """jsonpath : GLOB
+                    | REGEX"""
+        p[0] = FieldPattern(p[1], regex=p.slice[1].type == 'REGEX')
 
     def p_jsonpath_named_operator(self, p):
         "jsonpath : NAMED_OPERATOR"
@@ -97,6 +120,10 @@ class JsonPathParser(object):
             p[0] = This()
         elif p[1] == 'parent':
             p[0] = Parent()
+        elif p[1] == 'len':
+            p[0] = Len()
+        elif p[1] == 'sum':
+            p[0] = Sum()
         else:
             raise Exception('Unknown named operator `%s` at %s:%s' % (p[1], p.lineno(1), p.lexpos(1)))
 
@@ -114,11 +141,11 @@ class JsonPathParser(object):
 
     def p_jsonpath_fieldbrackets(self, p):
         "jsonpath : '[' fields ']'"
-        p[0] = Fields(*p[2])
+        p[0] = Fields.build(*p[2])
 
     def p_jsonpath_child_fieldbrackets(self, p):
         "jsonpath : jsonpath '[' fields ']'"
-        p[0] = Child(p[1], Fields(*p[3]))
+        p[0] = Child(p[1], Fields.build(*p[3]))
 
     def p_jsonpath_child_idxbrackets(self, p):
         "jsonpath : jsonpath '[' idx ']'"
@@ -155,11 +182,17 @@ class JsonPathParser(object):
 
     def p_slice_any(self, p):
         "slice : '*'"
-        p[0] = Slice()
+        p[0] = Slice.build()
 
-    def p_slice(self, p): # Currently does not support `step`
+    def p_slice(self, p):
         "slice : maybe_int ':' maybe_int"
-        p[0] = Slice(start=p[1], end=p[3])
+        p[0] = Slice.build(start=p[1], end=p[3])
+
+    def p_slice_step(self, p):
+        "slice : maybe_int ':' maybe_int ':' maybe_int"
+        if p[5] == 0:
+            raise Exception('Slice step cannot be zero at %s:%s' % (p.lineno(4), p.lexpos(4)))
+        p[0] = Slice.build(start=p[1], end=p[3], step=p[5])
 
     def p_maybe_int(self, p):
         """maybe_int : NUMBER
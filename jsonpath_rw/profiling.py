@@ -0,0 +1,158 @@
+from __future__ import unicode_literals, print_function, absolute_import, division, generators, nested_scopes
+import copy
+import time
+
+from jsonpath_rw.jsonpath import JSONPath, Aggregate, Descendants, _PAUSE
+
+timer = getattr(time, 'perf_counter', time.time)
+
+class NodeStats(object):
+    """
+    Counters for one node of a profiled JSONPath: how many times it was
+    evaluated (each time on one datum), the matches produced, and the
+    total wall time spent in it (including its subexpressions).
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.outputs = 0
+        self.time = 0.0
+
+    def __repr__(self):
+        return '%s(calls=%r, outputs=%r, time=%r)' % (self.__class__.__name__, self.calls, self.outputs, self.time)
+
+class ProfileStats(object):
+    """
+    Collects a `NodeStats` per AST node across any number of profiled
+    evaluations. Pass one to `JSONPath.profile()` and then render it with
+    `JSONPath.explain()`.
+    """
+
+    def __init__(self):
+        self.nodes = {}
+
+    def __getitem__(self, node):
+        return self.nodes[id(node)][1]
+
+    def __contains__(self, node):
+        return id(node) in self.nodes
+
+    def stats_for(self, node):
+        entry = self.nodes.get(id(node))
+        if entry is None:
+            # Keep a reference to the node so its id cannot be reused
+            entry = self.nodes[id(node)] = (node, NodeStats())
+        return entry[1]
+
+    def instrument(self, expr):
+        """
+        Returns a copy of `expr` in which every node is wrapped to record its
+        statistics here. The original `expr` is left alone, so evaluating it
+        directly costs nothing extra.
+
+        Aggregates are left unwrapped, since `Child` must still see them to
+        fold the matches to their left.
+        """
+        if isinstance(expr, Aggregate):
+            return expr
+
+        clone = copy.copy(expr)
+        for attr in ('left', 'right'):
+            child = getattr(expr, attr, None)
+            if isinstance(child, JSONPath):
+                setattr(clone, attr, self.instrument(child))
+        return Profiled(clone, self.stats_for(expr))
+
+    def visited(self, node):
+        """
+        The number of datums `node` looked at: one per call, except for
+        descendant queries, which look at every datum below the ones they
+        are called on, evaluating their right-hand side at each.
+        """
+        right = getattr(node, 'right', None)
+        if isinstance(node, Descendants) and right in self:
+            return self[right].calls
+        return self[node].calls if node in self else 0
+
+class Profiled(JSONPath):
+    """
+    Wraps a node to count its evaluations into a `NodeStats`. Built by
+    `ProfileStats.instrument()` rather than directly.
+    """
+
+    def __init__(self, node, stats):
+        self.node = node
+        self.stats = stats
+
+    def find(self, datum, ctx=None):
+        stats = self.stats
+        start = timer()
+        try:
+            result = self.node.find(datum, ctx)
+        finally:
+            stats.time += timer() - start
+        stats.calls += 1
+        stats.outputs += len(result)
+        return result
+
+    def find_iter(self, datum, ctx=None):
+        stats = self.stats
+        stats.calls += 1
+
+        start = timer()
+        iterator = self.node.find_iter(datum, ctx)
+        stats.time += timer() - start
+
+        while True:
+            start = timer()
+            try:
+                match = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                stats.time += timer() - start
+            if match is not _PAUSE:
+                stats.outputs += 1
+            yield match
+
+    def update(self, data, val, ctx=None):
+        return self.node.update(data, val, ctx)
+
+    def __str__(self):
+        return str(self.node)
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, self.node)
+
+    def __eq__(self, other):
+        return isinstance(other, Profiled) and self.node == other.node
+
+def _label(node):
+    if isinstance(getattr(node, 'left', None), JSONPath):
+        return node.__class__.__name__
+    else:
+        return repr(node)
+
+def explain(expr, stats=None):
+    """
+    Renders `expr` as an indented tree, one node per line, annotated with
+    the numbers recorded in `stats` (a `ProfileStats`) if given.
+    """
+    lines = []
+    stack = [(expr, 0)]
+    while stack:
+        node, depth = stack.pop()
+        label = '  ' * depth + _label(node)
+        if stats is not None and node in stats:
+            node_stats = stats[node]
+            label = '%-40s calls=%d out=%d visited=%d time=%.3fms' % (
+                label, node_stats.calls, node_stats.outputs,
+                stats.visited(node), node_stats.time * 1000)
+        lines.append(label)
+
+        for attr in ('right', 'left'):
+            child = getattr(node, attr, None)
+            if isinstance(child, JSONPath):
+                stack.append((child, depth + 1))
+
+    return '\n'.join(lines)
@@ -0,0 +1,213 @@
+"""
+A long-running local process that answers JSONPath queries over a Unix
+socket, keeping parsed expressions and decoded documents in memory
+between queries. Start it with `jsonpath.py serve SOCKET` and pass
+`--server SOCKET` to `jsonpath.py` to have queries answered by it.
+
+Each connection carries one request and one response, each a single line
+of JSON. A request has the `expression` and either the absolute paths of
+the `files` to search or the text of a document as `stdin`, and
+optionally `aggregate` (`'count'` or `'sum'`) and `paths` (whether to
+return each match's JSON Pointer). The response has `matches` (a list
+of `[pointer, value]`), `count` or `sum`, or an `error` message.
+
+Documents are cached by path and read again when their modification
+time, size or inode changes. Both caches evict the least recently used
+entries beyond their size. Nothing is ever sent over a network, and the
+socket is only accessible to its owner.
+"""
+from __future__ import unicode_literals, print_function, absolute_import, division, generators, nested_scopes
+import io
+import os
+import json
+import stat
+import errno
+import socket
+import threading
+from collections import OrderedDict
+
+try:
+    import socketserver
+except ImportError: # Python 2
+    import SocketServer as socketserver
+
+from jsonpath_rw import parse
+from jsonpath_rw.jsonpath import Len, Sum
+
+class JsonPathServerError(Exception):
+    pass
+
+class LRUCache(object):
+    """
+    A mapping that holds at most `maxsize` entries, evicting the least
+    recently used one to make room for a new one.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+
+    def get(self, key, default=None):
+        try:
+            value = self.entries.pop(key)
+        except KeyError:
+            return default
+        self.entries[key] = value # Now the most recently used
+        return value
+
+    def put(self, key, value):
+        self.entries.pop(key, None)
+        self.entries[key] = value
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+def _file_version(st):
+    return (getattr(st, 'st_mtime_ns', st.st_mtime), st.st_size, st.st_ino)
+
+class QueryCache(object):
+    """
+    The parsed expressions and decoded documents kept by a `QueryServer`,
+    and the evaluation of requests against them. Safe to use from several
+    threads at once.
+    """
+
+    def __init__(self, max_expressions=1024, max_documents=64):
+        self.expressions = LRUCache(max_expressions)
+        self.documents = LRUCache(max_documents)
+        self.lock = threading.Lock()
+
+    def expression(self, string):
+        with self.lock:
+            expr = self.expressions.get(string)
+        if expr is None:
+            expr = parse(string)
+            with self.lock:
+                self.expressions.put(string, expr)
+        return expr
+
+    def document(self, filename):
+        version = _file_version(os.stat(filename))
+        with self.lock:
+            entry = self.documents.get(filename)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        with io.open(filename, 'rb') as f:
+            data = json.loads(f.read().decode('utf-8'))
+        with self.lock:
+            self.documents.put(filename, (version, data))
+        return data
+
+    def answer(self, request):
+        """
+        The response to `request`, both as described at the top of this module.
+        """
+        expr = self.expression(request['expression'])
+        if 'stdin' in request:
+            documents = [json.loads(request['stdin'])]
+        else:
+            documents = (self.document(filename) for filename in request['files'])
+        matches = (match for data in documents for match in expr.find_iter(data))
+
+        aggregate = request.get('aggregate')
+        if aggregate == 'count':
+            return {'count': Len().fold(matches)}
+        elif aggregate == 'sum':
+            return {'sum': Sum().fold(matches)}
+        elif aggregate is not None:
+            raise JsonPathServerError('Unknown aggregate %r' % (aggregate,))
+        elif request.get('paths'):
+            return {'matches': [[match.json_pointer, match.value] for match in matches]}
+        else:
+            return {'matches': [[None, match.value] for match in matches]}
+
+class QueryRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line: # A connection made only to see whether the server is running
+            return
+        try:
+            request = json.loads(line.decode('utf-8'))
+            response = self.server.cache.answer(request)
+        except Exception as exc:
+            response = {'error': '%s: %s' % (exc.__class__.__name__, exc)}
+        self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+class QueryServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Serves queries on the Unix socket at `path`, with a thread per connection.
+    """
+    daemon_threads = True
+
+    def __init__(self, path, cache=None):
+        self.cache = cache if cache is not None else QueryCache()
+        _remove_stale_socket(path)
+        socketserver.UnixStreamServer.__init__(self, path, QueryRequestHandler, bind_and_activate=False)
+        try:
+            self.server_bind()
+            # Only the owner may connect, from before anyone can
+            os.chmod(self.server_address, 0o600)
+            self.server_activate()
+        except:
+            self.server_close()
+            raise
+
+    def server_close(self):
+        socketserver.UnixStreamServer.server_close(self)
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+def _remove_stale_socket(path):
+    try:
+        mode = os.stat(path).st_mode
+    except OSError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise JsonPathServerError('%s exists and is not a socket' % path)
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except socket.error as exc:
+        if exc.errno not in (errno.ECONNREFUSED, errno.ENOENT):
+            raise
+        os.unlink(path) # Left behind by a server that is gone
+    else:
+        raise JsonPathServerError('A server is already listening on %s' % path)
+    finally:
+        sock.close()
+
+def serve(path, max_expressions=1024, max_documents=64):
+    """
+    Answers queries on the Unix socket at `path` until interrupted.
+    """
+    server = QueryServer(path, QueryCache(max_expressions=max_expressions, max_documents=max_documents))
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+def query(path, request):
+    """
+    Sends `request` to the server on the Unix socket at `path` and returns
+    its response, raising `JsonPathServerError` if it reports an error.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+        sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        response = json.loads(sock.makefile('rb').readline().decode('utf-8'))
+    finally:
+        sock.close()
+
+    if 'error' in response:
+        raise JsonPathServerError(response['error'])
+    return response
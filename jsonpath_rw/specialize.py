@@ -0,0 +1,388 @@
+"""
+Specializing a JSONPath to the known shape of its documents.
+
+`JSONPath.specialize(schema_or_samples)` takes either a JSON Schema (a
+dict) or some representative documents (any other iterable) and returns
+an equivalent expression in which the steps whose input is known to be
+an object or an array skip the generic type checks, and in which
+descendant queries skip the subtrees that cannot contain the field they
+look for.
+
+Each specialized step still checks, with one cheap type test, that the
+value in front of it has the expected type, and falls back to the
+generic evaluation when it does not, so a document that does not follow
+the schema gives the same results as without specialization. Only the
+pruning of descendant queries relies on the shape without checking it:
+a subtree is skipped if the schema says it is made of objects that have
+no other properties (`"additionalProperties": false`) and none of them
+has the field. Samples cannot promise that about other documents, so
+descendant queries are not pruned by them.
+"""
+from __future__ import unicode_literals, print_function, absolute_import, division, generators, nested_scopes
+
+from jsonpath_rw.jsonpath import (DatumInContext, Root, This, Child, Where, Descendants, Union, Fields, Index,
+                                  Slice, Mapping, _NOTHING, _PAUSE, _auto_id_field, _budget, _is_sequence, _string_types)
+
+def _kind(value):
+    if isinstance(value, dict):
+        return 'object'
+    elif isinstance(value, list):
+        return 'array'
+    elif isinstance(value, _string_types):
+        return 'string'
+    elif isinstance(value, bool):
+        return 'boolean'
+    elif value is None:
+        return 'null'
+    else:
+        return 'number'
+
+class Shape(object):
+    """
+    What is known about the values at one position in a document: the JSON
+    types they can have (`kinds`), the shapes of their known properties
+    and of their array items, and whether their objects can have other
+    properties than the known ones (`closed`). An unknown shape is None.
+    """
+
+    def __init__(self, kinds, properties=None, items=None, closed=False):
+        self.kinds = frozenset(kinds)
+        self.properties = properties or {}
+        self.items = items
+        self.closed = closed
+        self._names = _NOTHING
+
+    @property
+    def names(self):
+        """
+        The field names that can occur in values of this shape or anywhere
+        below them, or None if any name can.
+        """
+        if self._names is _NOTHING:
+            names = set()
+            if 'object' in self.kinds:
+                if not self.closed:
+                    names = None
+                else:
+                    names.update(self.properties)
+                    for shape in self.properties.values():
+                        below = None if shape is None else shape.names
+                        if below is None:
+                            names = None
+                            break
+                        names |= below
+            if names is not None and 'array' in self.kinds:
+                below = None if self.items is None or not self.items.kinds else self.items.names
+                names = None if below is None else names | below
+            self._names = names
+        return self._names
+
+    def merge(self, other):
+        return merge(self, other)
+
+    def __repr__(self):
+        return '%s(%r, properties=%r, items=%r, closed=%r)' % (self.__class__.__name__, sorted(self.kinds),
+                                                               self.properties, self.items, self.closed)
+
+def merge(left, right):
+    """
+    A shape that covers the values of both `left` and `right`.
+    """
+    if left is None or right is None:
+        return None
+    if not left.kinds: # The shape of nothing, such as the items of empty arrays
+        return right
+    if not right.kinds:
+        return left
+
+    properties = dict(left.properties)
+    for name, shape in right.properties.items():
+        properties[name] = merge(properties[name], shape) if name in properties else shape
+
+    if 'array' not in left.kinds:
+        items = right.items
+    elif 'array' not in right.kinds:
+        items = left.items
+    else:
+        items = merge(left.items, right.items)
+
+    return Shape(left.kinds | right.kinds, properties, items, left.closed and right.closed)
+
+def shape_of_samples(samples):
+    """
+    The shape of the given documents, taking them to be representative:
+    their objects are assumed to have no properties beyond those seen.
+    """
+    shape = _NOTHING
+    for sample in samples:
+        sample_shape = _shape_of_sample(sample)
+        shape = sample_shape if shape is _NOTHING else merge(shape, sample_shape)
+    return None if shape is _NOTHING else shape
+
+def _shape_of_sample(value):
+    kind = _kind(value)
+    if kind == 'object':
+        return Shape([kind], dict((name, _shape_of_sample(child)) for name, child in value.items()), closed=True)
+    elif kind == 'array':
+        return Shape([kind], items=shape_of_samples(value) or Shape([]))
+    else:
+        return Shape([kind])
+
+_SCHEMA_TYPES = {'integer': 'number'}
+
+def shape_of_schema(schema):
+    """
+    The shape described by a JSON Schema. Anything the schema leaves open,
+    or that this does not understand (such as `$ref`), is an unknown shape.
+    """
+    if not isinstance(schema, Mapping) or '$ref' in schema or 'allOf' in schema or 'not' in schema:
+        return None
+
+    for keyword in ('anyOf', 'oneOf'):
+        if keyword in schema:
+            shapes = [shape_of_schema(alternative) for alternative in schema[keyword]]
+            shape = shapes[0] if shapes else None
+            for other in shapes[1:]:
+                shape = merge(shape, other)
+            return shape
+
+    if 'const' in schema:
+        kinds = [_kind(schema['const'])]
+    elif 'enum' in schema:
+        kinds = [_kind(value) for value in schema['enum']]
+    elif 'type' in schema:
+        types = schema['type'] if isinstance(schema['type'], list) else [schema['type']]
+        kinds = [_SCHEMA_TYPES.get(kind, kind) for kind in types]
+    elif 'properties' in schema:
+        kinds = ['object']
+    elif 'items' in schema:
+        kinds = ['array']
+    else:
+        return None
+
+    properties = dict((name, shape_of_schema(child)) for name, child in schema.get('properties', {}).items())
+    closed = schema.get('additionalProperties', True) is False and not schema.get('patternProperties')
+
+    items = schema.get('items')
+    if isinstance(items, list): # One schema per position
+        items_shape = Shape([]) if not items else shape_of_schema(items[0])
+        for child in items[1:]:
+            items_shape = merge(items_shape, shape_of_schema(child))
+        if schema.get('additionalItems', True) is not False:
+            items_shape = None
+    else:
+        items_shape = shape_of_schema(items)
+
+    return Shape(kinds, properties, items_shape, closed)
+
+def infer_shape(schema_or_samples):
+    """
+    The shape for `JSONPath.specialize()`: a dict is a JSON Schema, and any
+    other iterable holds sample documents.
+    """
+    if isinstance(schema_or_samples, Mapping):
+        return shape_of_schema(schema_or_samples)
+    return shape_of_samples(schema_or_samples)
+
+def _object_only(shape):
+    return shape is not None and shape.kinds == frozenset(['object'])
+
+def _array_only(shape):
+    return shape is not None and shape.kinds == frozenset(['array'])
+
+def _field_shape(shape, fields):
+    """
+    The shape of the values that `Fields(*fields)` finds in values of `shape`.
+    """
+    if shape is None or 'object' not in shape.kinds:
+        return None
+    if '*' in fields:
+        if not shape.closed:
+            return None
+        fields = list(shape.properties)
+
+    result = _NOTHING
+    for field in fields:
+        field_shape = shape.properties.get(field)
+        if field_shape is None:
+            return None
+        result = field_shape if result is _NOTHING else merge(result, field_shape)
+    return None if result is _NOTHING else result
+
+def _lead_field(expr):
+    """
+    The field name that a datum or its children must have for `expr` to
+    match anything there, if there is one.
+    """
+    if isinstance(expr, Fields):
+        if len(expr.fields) == 1 and isinstance(expr.fields[0], _string_types) and expr.fields[0] != '*':
+            return expr.fields[0]
+        return None
+    elif isinstance(expr, (Child, Where)):
+        return _lead_field(expr.left)
+    else:
+        return None
+
+def specialize(expr, shape, prune=True):
+    """
+    Returns a copy of `expr` specialized to documents of `shape`, as
+    described at the top of this module. Unless `prune` is true, the
+    descendant queries are left alone, as for shapes of samples.
+    """
+    return _specialize(expr, shape, shape, prune)[0]
+
+def _specialize(expr, shape, root, prune):
+    """
+    Returns `(specialized expr, shape of its matches)` for `expr`
+    evaluated at values of `shape`.
+    """
+    if isinstance(expr, Root):
+        return expr, root
+    elif isinstance(expr, This):
+        return expr, shape
+    elif isinstance(expr, Fields):
+        if _object_only(shape) and all(isinstance(field, _string_types) for field in expr.fields):
+            return ShapedFields(*expr.fields), _field_shape(shape, expr.fields)
+        return expr, _field_shape(shape, expr.fields)
+    elif isinstance(expr, Slice):
+        if _array_only(shape):
+            return ShapedSlice(expr.start, expr.end, expr.step), shape.items
+        return expr, None # A slice of anything else may be a made-up one-element array
+    elif isinstance(expr, Index): # Already a single lookup; only the shape is needed
+        return expr, shape.items if _array_only(shape) else None
+    elif isinstance(expr, Child):
+        left, left_shape = _specialize(expr.left, shape, root, prune)
+        right, right_shape = _specialize(expr.right, left_shape, root, prune)
+        return Child(left, right), right_shape
+    elif isinstance(expr, Where):
+        left, left_shape = _specialize(expr.left, shape, root, prune)
+        right, _ = _specialize(expr.right, left_shape, root, prune)
+        return Where(left, right), left_shape
+    elif isinstance(expr, Descendants):
+        left, left_shape = _specialize(expr.left, shape, root, prune)
+        name = _lead_field(expr.right)
+        if not prune or left_shape is None or name is None:
+            return Descendants(left, expr.right), None
+        return ShapedDescendants(left, expr.right, left_shape, name), None
+    elif isinstance(expr, Union):
+        left, left_shape = _specialize(expr.left, shape, root, prune)
+        right, right_shape = _specialize(expr.right, shape, root, prune)
+        return Union(left, right), merge(left_shape, right_shape)
+    else:
+        return expr, None
+
+class ShapedFields(Fields):
+    """
+    `Fields` for values known to be dicts. It compares, prints and pickles
+    as the plain `Fields`.
+    """
+
+    def __reduce__(self):
+        return (Fields, tuple(self.fields))
+
+    def find(self, datum, ctx=None):
+        datum = DatumInContext.wrap(datum)
+        value = datum.value
+        if type(value) is not dict or _auto_id_field(ctx) is not None or _budget(ctx) is not None:
+            return Fields.find(self, datum, ctx)
+
+        if '*' in self.fields:
+            return [DatumInContext(field_value, path=Fields(field), context=datum) for field, field_value in value.items()]
+
+        result = []
+        for field in self.fields:
+            field_value = value.get(field, _NOTHING)
+            if field_value is not _NOTHING:
+                result.append(DatumInContext(field_value, path=Fields(field), context=datum))
+        return result
+
+class ShapedSlice(Slice):
+    """
+    `Slice` for values known to be lists. It compares, prints and pickles
+    as the plain `Slice`.
+    """
+
+    def __reduce__(self):
+        return (Slice, (self.start, self.end, self.step))
+
+    def find_iter(self, datum, ctx=None):
+        datum = DatumInContext.wrap(datum)
+        value = datum.value
+        if type(value) is not list or _budget(ctx) is not None:
+            return Slice.find_iter(self, datum, ctx)
+        return (DatumInContext(value[i], path=Index(i), context=datum) for i in self.indices(len(value)))
+
+class ShapedDescendants(Descendants):
+    """
+    `Descendants` that walks the shape of the values along with them and
+    does not descend into subtrees whose shape shows that they cannot have
+    the field `name`, which the right-hand side needs. It compares, prints
+    and pickles as the plain `Descendants`.
+    """
+
+    def __init__(self, left, right, shape, name):
+        super(ShapedDescendants, self).__init__(left, right)
+        self.shape = shape
+        self.name = name
+
+    def __reduce__(self):
+        return (Descendants, (self.left, self.right))
+
+    def _unneeded(self, shape, value):
+        if shape is None or _kind(value) not in shape.kinds: # Not what the shape says: walk it all
+            return False
+        names = shape.names
+        return names is not None and self.name not in names
+
+    def find_iter(self, datum, ctx=None):
+        if _auto_id_field(ctx) is not None: # Automatic ids can match where the field is missing
+            for match in Descendants.find_iter(self, datum, ctx):
+                yield match
+            return
+
+        budget = _budget(ctx)
+        for left_match in self.left.find_iter(datum, ctx):
+            if left_match is _PAUSE:
+                yield left_match
+                continue
+
+            stack = [iter([(left_match, self.shape)])]
+            while stack:
+                try:
+                    current, shape = next(stack[-1])
+                except StopIteration:
+                    stack.pop()
+                    continue
+
+                if budget is not None:
+                    budget.visit()
+                    if budget.pause_due():
+                        yield _PAUSE
+
+                for submatch in self.right.find_iter(current, ctx):
+                    yield submatch
+
+                value = current.value
+                if shape is not None and _kind(value) not in shape.kinds: # Not what the shape says: walk it all
+                    shape = None
+
+                if type(value) is dict:
+                    stack.append(self._fields(current, value, shape))
+                elif type(value) is list:
+                    stack.append(self._items(current, value, shape))
+                elif isinstance(value, Mapping) or _is_sequence(value):
+                    stack.append((child, None) for child in self.iter_children(current))
+
+    def _fields(self, datum, value, shape):
+        properties = {} if shape is None else shape.properties
+        for field, child in value.items():
+            child_shape = properties.get(field)
+            if not self._unneeded(child_shape, child):
+                yield DatumInContext(child, path=Fields(field), context=datum), child_shape
+
+    def _items(self, datum, value, shape):
+        items = None if shape is None else shape.items
+        for i in range(len(value)):
+            if not self._unneeded(items, value[i]):
+                yield DatumInContext(value[i], path=Index(i), context=datum), items
+
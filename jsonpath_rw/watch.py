@@ -0,0 +1,325 @@
+"""
+Documents that notify subscribers when the matches of their expressions change.
+
+A `WatchedDocument` wraps a mutable document. Expressions are registered
+with `subscribe(expr, callback)`, and changes are made through
+`update(expr, val)` or `set(pointer, val)`, which record the locations
+(as `path_tuple`s) they write to. After each change only the
+subscriptions whose expressions could reach one of those locations are
+looked at, and each is called back as `callback(old, new)` with the
+matches at affected locations before and after the change.
+
+Finding the subscriptions that might be affected goes through a trie of
+the field names and indices their expressions step through, so it does
+not depend on how many subscriptions there are. Expressions that are
+plain chains of fields, indices and slices (`a.b[*].c`) are then
+re-evaluated only below the changed locations, so the cost of a change
+is proportional to its size rather than the document's. Other
+expressions (`where`, `..`, `parent`, unions) are re-evaluated in full.
+"""
+from __future__ import unicode_literals, print_function, absolute_import, division, generators, nested_scopes
+from itertools import count
+
+from jsonpath_rw.jsonpath import (JSONPath, DatumInContext, Root, This, Child, Parent, Where, Descendants,
+                                  Union, Intersect, Fields, FieldPattern, Index, Slice, EvaluationContext,
+                                  set_by_pointer, parse_json_pointer, _pointer_step,
+                                  _auto_id_field, _is_sequence, _string_types)
+
+try:
+    from collections.abc import Mapping
+except ImportError: # Python 2
+    from collections import Mapping
+
+# Trie key for a step that may take any field name or index
+ANY = object()
+
+def _flatten(expr):
+    if isinstance(expr, Child):
+        return _flatten(expr.left) + _flatten(expr.right)
+    return [expr]
+
+def simple_steps(expr):
+    """
+    Returns the list of `Fields`, `Index` and `Slice` nodes that `expr`
+    steps through if it is a plain chain of them (optionally starting at
+    `$`), otherwise None.
+    """
+    nodes = _flatten(expr)
+    if nodes and isinstance(nodes[0], Root):
+        nodes = nodes[1:]
+    steps = [node for node in nodes if not isinstance(node, This)]
+    if all(isinstance(node, (Fields, Index, Slice)) for node in steps):
+        return steps
+    return None
+
+def _keys(step):
+    if isinstance(step, Fields):
+        return [ANY] if '*' in step.fields else list(step.fields)
+    elif isinstance(step, Index) and step.index >= 0:
+        return [step.index]
+    else:
+        return [ANY]
+
+def patterns(expr, prefix=()):
+    """
+    Returns tuples of steps, each a list of trie keys, such that any
+    location `expr` reads from lies at, above or below a location matching
+    one of them. Parts of an expression that are not understood cut the
+    pattern short there, so the answer may be too broad but never too narrow.
+    """
+    if isinstance(expr, Root):
+        return [()]
+    elif isinstance(expr, This):
+        return [prefix]
+    elif isinstance(expr, (Fields, FieldPattern, Index, Slice)):
+        return [prefix + (_keys(expr),)]
+    elif isinstance(expr, Child):
+        return [pattern for left in patterns(expr.left, prefix) for pattern in patterns(expr.right, left)]
+    elif isinstance(expr, Parent):
+        return [prefix[:-1]]
+    elif isinstance(expr, (Where, Descendants)):
+        # The right-hand side usually reads below the left's matches, but it
+        # may also start again from the root
+        lefts = patterns(expr.left, prefix)
+        return lefts + [pattern for left in lefts for pattern in patterns(expr.right, left)]
+    elif isinstance(expr, (Union, Intersect)):
+        return patterns(expr.left, prefix) + patterns(expr.right, prefix)
+    else:
+        return [()]
+
+def _compatible(path, location):
+    """
+    Whether one of the two path tuples is a prefix of the other.
+    """
+    length = min(len(path), len(location))
+    return path[:length] == location[:length]
+
+class _TrieNode(object):
+    __slots__ = ('children', 'here', 'below')
+
+    def __init__(self):
+        self.children = {}
+        self.here = set()  # Subscriptions whose pattern ends here
+        self.below = set() # Subscriptions whose pattern passes through or ends here
+
+class SubscriptionIndex(object):
+    """
+    A trie of subscriptions keyed by the steps of their patterns.
+    """
+
+    def __init__(self):
+        self.root = _TrieNode()
+
+    def _walk(self, pattern):
+        nodes = [self.root]
+        for keys in pattern:
+            nodes = [node.children.setdefault(key, _TrieNode()) for node in nodes for key in keys]
+            yield nodes
+
+    def add(self, subscription):
+        for pattern in subscription.patterns:
+            self.root.below.add(subscription)
+            nodes = [self.root]
+            for nodes in self._walk(pattern):
+                for node in nodes:
+                    node.below.add(subscription)
+            for node in nodes:
+                node.here.add(subscription)
+
+    def remove(self, subscription):
+        # Empty trie nodes are left in place; they cost nothing to look through
+        self.root.below.discard(subscription)
+        self.root.here.discard(subscription)
+        for pattern in subscription.patterns:
+            for nodes in self._walk(pattern):
+                for node in nodes:
+                    node.below.discard(subscription)
+                    node.here.discard(subscription)
+
+    def affected(self, location):
+        """
+        The subscriptions whose patterns are compatible with `location`.
+        """
+        found = set()
+        nodes = [self.root]
+        for segment in location:
+            for node in nodes:
+                found.update(node.here)
+            nodes = [child for node in nodes for child in (node.children.get(segment), node.children.get(ANY)) if child is not None]
+            if not nodes:
+                return found
+        for node in nodes:
+            found.update(node.below)
+        return found
+
+class Subscription(object):
+    """
+    An expression registered with a `WatchedDocument`, returned by
+    `subscribe()`. Call `cancel()` to stop receiving notifications.
+    """
+
+    def __init__(self, document, expr, callback, order):
+        self.document = document
+        self.order = order
+        self.expr = expr
+        self.callback = callback
+        self.steps = simple_steps(expr)
+        self.patterns = patterns(expr)
+
+    def cancel(self):
+        self.document._unsubscribe(self)
+
+    def find(self):
+        return self.expr.find(self.document.data, self.document.ctx)
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, self.expr)
+
+class WatchedDocument(object):
+    """
+    A document whose changes are reported to subscribed expressions.
+    The document itself is available as `data`; changes made to it other
+    than through `update()` and `set()` are not noticed.
+    """
+
+    def __init__(self, data, ctx=None):
+        self.data = data
+        self.ctx = EvaluationContext.resolve(ctx)
+        self.index = SubscriptionIndex()
+        self.subscriptions = set()
+        self._counter = count()
+
+    def subscribe(self, expr, callback):
+        """
+        Calls `callback(old, new)` after each change that affects the matches
+        of `expr` (a `JSONPath` or a string to parse), with lists of the
+        matches at the affected locations before and after the change.
+        """
+        if not isinstance(expr, JSONPath):
+            from jsonpath_rw.parser import parse
+            expr = parse(expr)
+
+        subscription = Subscription(self, expr, callback, next(self._counter))
+        self.subscriptions.add(subscription)
+        self.index.add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+            self.index.remove(subscription)
+
+    def update(self, expr, val):
+        """
+        Replaces whatever `expr` matches with `val`, as `expr.update()` does,
+        and notifies the affected subscriptions.
+        """
+        if not isinstance(expr, JSONPath):
+            from jsonpath_rw.parser import parse
+            expr = parse(expr)
+
+        locations = [match.path_tuple for match in expr.find(self.data, self.ctx)]
+        return self._change(locations, lambda: expr.update(self.data, val, self.ctx))
+
+    def set(self, pointer, val):
+        """
+        Sets the value at `pointer` (a JSON Pointer string or a path tuple,
+        whose container must exist) to `val` and notifies the affected
+        subscriptions.
+        """
+        if isinstance(pointer, _string_types):
+            pointer = parse_json_pointer(pointer)
+
+        location = []
+        container = self.data
+        for token in pointer:
+            token = _pointer_step(container, token)
+            location.append(token)
+            if len(location) < len(pointer):
+                container = container[token]
+
+        return self._change([tuple(location)], lambda: set_by_pointer(self.data, location, val))
+
+    def _change(self, locations, apply):
+        affected = set()
+        for location in locations:
+            affected.update(self.index.affected(location))
+        # Notify in the order of subscription
+        affected = sorted(affected, key=lambda subscription: subscription.order)
+
+        before = [self._matches(subscription, locations) for subscription in affected]
+        self.data = apply()
+
+        for subscription, (incremental, old) in zip(affected, before):
+            if incremental:
+                new = self._matches(subscription, locations)[1]
+            else:
+                found = subscription.find()
+                new = self._filter(found, locations, old)
+                old = self._filter(old, locations, found)
+            if old or new:
+                subscription.callback(old, new)
+
+        return self.data
+
+    def _matches(self, subscription, locations):
+        """
+        Returns `(incremental, matches)`: the matches of `subscription` at
+        `locations`, evaluated below those locations only if possible, and
+        otherwise all of its matches.
+        """
+        steps = subscription.steps
+        if steps is None or _auto_id_field(self.ctx) is not None:
+            return False, subscription.find()
+
+        matches = []
+        seen = set()
+        for location in locations:
+            try:
+                found = self._matches_at(steps, location)
+            except (KeyError, IndexError, TypeError):
+                # A path through a value that `Slice` coerces into a list
+                return False, subscription.find()
+            for match in found:
+                if match.path_tuple not in seen:
+                    seen.add(match.path_tuple)
+                    matches.append(match)
+        return True, matches
+
+    def _matches_at(self, steps, location):
+        datum = DatumInContext(self.data)
+        depth = min(len(steps), len(location))
+        for step, segment in zip(steps[:depth], location[:depth]):
+            value = datum.value
+            if isinstance(step, Fields):
+                if not isinstance(value, Mapping) or ('*' not in step.fields and segment not in step.fields):
+                    return []
+                path = Fields(segment)
+            else:
+                if not _is_sequence(value):
+                    raise TypeError('%r steps through a non-sequence' % step)
+                selected = [step.index % len(value)] if isinstance(step, Index) and -len(value) <= step.index < len(value) else \
+                           step.indices(len(value)) if isinstance(step, Slice) else []
+                if segment not in selected:
+                    return []
+                path = Index(segment)
+            datum = DatumInContext(value[segment], path=path, context=datum)
+
+        rest = steps[depth:]
+        if not rest:
+            return [datum]
+
+        suffix = rest[0]
+        for step in rest[1:]:
+            suffix = Child(suffix, step)
+        return suffix.find(datum, self.ctx)
+
+    @staticmethod
+    def _filter(matches, locations, others):
+        """
+        The matches at or around `locations`, and any whose location is not
+        among `others` (which may have appeared or disappeared elsewhere).
+        """
+        other_paths = set(match.path_tuple for match in others)
+        return [match for match in matches
+                if match.path_tuple not in other_paths or any(_compatible(match.path_tuple, location) for location in locations)]
@@ -18,7 +18,7 @@ setuptools.setup(
         'console_scripts':  ['jsonpath.py = jsonpath_rw.bin.jsonpath:entry_point'],
     },
     test_suite = 'tests',
-    install_requires = [ 'ply', 'decorator', 'six' ],
+    install_requires = [ 'ply', 'decorator' ],
     classifiers = [
         'Development Status :: 5 - Production/Stable',
         'Intended Audience :: Developers',
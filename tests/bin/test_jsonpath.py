@@ -8,6 +8,9 @@ import io
 import sys
 import os
 import json
+import shutil
+import tempfile
+import threading
 
 from jsonpath_rw.bin.jsonpath import main
 
@@ -25,14 +28,19 @@ class TestJsonPathScript(unittest.TestCase):
         self.output = io.StringIO()
         self.saved_stdout = sys.stdout
         self.saved_stdin = sys.stdin
+        self.saved_stderr = sys.stderr
+        self.errors = io.StringIO()
         sys.stdout = self.output
         sys.stdin = self.input
+        sys.stderr = self.errors
 
     def tearDown(self):
         self.output.close()
         self.input.close()
+        self.errors.close()
         sys.stdout = self.saved_stdout
         sys.stdin = self.saved_stdin
+        sys.stderr = self.saved_stderr
 
     def test_stdin_mode(self):
         # 'format' is a benign Python 2/3 way of ensuring it is a text type rather than binary
@@ -54,3 +62,102 @@ class TestJsonPathScript(unittest.TestCase):
         main('jsonpath.py', 'foo..baz', test1, test2)
         self.assertEqual(self.output.getvalue(), '1\n2\n3\n4\n')
 
+
+    def test_profile(self):
+        test1 = os.path.join(os.path.dirname(__file__), 'test1.json')
+        main('jsonpath.py', '--profile', 'foo..baz', test1)
+        self.assertEqual(self.output.getvalue(), '1\n2\n')
+        lines = self.errors.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith('Descendants'))
+        self.assertTrue('out=2' in lines[0])
+
+    def test_output_formats(self):
+        test1 = os.path.join(os.path.dirname(__file__), 'test1.json')
+        test2 = os.path.join(os.path.dirname(__file__), 'test2.json')
+        expected = {
+            'raw': '1\n2\n3\n4\n',
+            'ndjson': '1\n2\n3\n4\n',
+            'json': '[\n1,\n2,\n3,\n4\n]\n',
+            'path-value': '/foo/baz\t1\n/foo/bizzle/baz\t2\n/foo/foo/baz\t3\n/foo/foo/merp/baz\t4\n',
+        }
+        for output, text in expected.items():
+            self.output.seek(0)
+            self.output.truncate()
+            main('jsonpath.py', '--output', output, 'foo..baz', test1, test2)
+            self.assertEqual(self.output.getvalue(), text)
+
+    def test_output_json_values(self):
+        self.input.write('{0}'.format(json.dumps({'foo': [{'a': 'x'}, None, True]})))
+        self.input.seek(0)
+        main('jsonpath.py', '--output', 'ndjson', 'foo[*]')
+        self.assertEqual([json.loads(line) for line in self.output.getvalue().splitlines()], [{'a': 'x'}, None, True])
+
+    def test_output_json_empty(self):
+        self.input.write('{}')
+        self.input.seek(0)
+        main('jsonpath.py', '--output', 'json', 'foo')
+        self.assertEqual(json.loads(self.output.getvalue()), [])
+
+    def test_index(self):
+        test1 = os.path.join(os.path.dirname(__file__), 'test1.json')
+        test2 = os.path.join(os.path.dirname(__file__), 'test2.json')
+        directory = tempfile.mkdtemp()
+        try:
+            database = os.path.join(directory, 'test.idx')
+            main('jsonpath.py', 'index', database, test1, test2)
+            self.assertEqual(self.errors.getvalue(), 'Indexed 2 of 2 files\n')
+
+            main('jsonpath.py', '--index', database, 'foo..baz', test1, test2)
+            self.assertEqual(self.output.getvalue(), '1\n2\n3\n4\n')
+
+            self.output.seek(0)
+            self.output.truncate()
+            main('jsonpath.py', '--index', database, 'foo..missing', test1, test2)
+            self.assertEqual(self.output.getvalue(), '')
+        finally:
+            shutil.rmtree(directory)
+
+    def test_aggregates(self):
+        test1 = os.path.join(os.path.dirname(__file__), 'test1.json')
+        test2 = os.path.join(os.path.dirname(__file__), 'test2.json')
+        main('jsonpath.py', '--count', 'foo..baz', test1, test2)
+        self.assertEqual(self.output.getvalue(), '4\n')
+
+        self.output.seek(0)
+        self.output.truncate()
+        main('jsonpath.py', '--sum', 'foo..baz', test1, test2)
+        self.assertEqual(self.output.getvalue(), '10\n')
+
+    def test_server(self):
+        from jsonpath_rw.server import QueryServer
+        test1 = os.path.join(os.path.dirname(__file__), 'test1.json')
+        test2 = os.path.join(os.path.dirname(__file__), 'test2.json')
+        directory = tempfile.mkdtemp()
+        server = QueryServer(os.path.join(directory, 'jsonpath.sock'))
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            for options in [['--output', 'path-value'], ['--output', 'json'], ['--count'], ['--sum'], []]:
+                self.output.seek(0)
+                self.output.truncate()
+                main('jsonpath.py', *(options + ['foo..baz', test1, test2]))
+                expected = self.output.getvalue()
+
+                self.output.seek(0)
+                self.output.truncate()
+                main('jsonpath.py', '--server', server.server_address, *(options + ['foo..baz', test1, test2]))
+                self.assertEqual(self.output.getvalue(), expected)
+
+            self.output.seek(0)
+            self.output.truncate()
+            self.input.write('{"foo": [1, 2]}')
+            self.input.seek(0)
+            main('jsonpath.py', '--server', server.server_address, 'foo[*]')
+            self.assertEqual(self.output.getvalue(), '1\n2\n')
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+            shutil.rmtree(directory)
+        self.assertFalse(os.path.exists(server.server_address))
@@ -0,0 +1,100 @@
+from __future__ import unicode_literals, print_function, absolute_import, division, generators, nested_scopes
+import sys
+import logging
+import unittest
+
+from jsonpath_rw import jsonpath
+from jsonpath_rw.parser import parse
+
+if sys.version_info >= (3, 6):
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    from jsonpath_rw.aio import afind, afind_iter
+
+class AsyncDocs(object):
+    """
+    A minimal async iterable, written without `async def` syntax
+    """
+    def __init__(self, docs):
+        self.docs = iter(docs)
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        future = asyncio.get_event_loop().create_future()
+        try:
+            future.set_result(next(self.docs))
+        except StopIteration:
+            future.set_exception(StopAsyncIteration())
+        return future
+
+@unittest.skipIf(sys.version_info < (3, 6), 'asyncio API requires Python 3.6+')
+class TestAsync(unittest.TestCase):
+
+    @classmethod
+    def setup_class(cls):
+        logging.basicConfig()
+
+    def setUp(self):
+        jsonpath.auto_id_field = None
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+
+    def run_async(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def collect(self, agen):
+        results = []
+        while True:
+            try:
+                results.append(self.run_async(agen.__anext__()))
+            except StopAsyncIteration:
+                return results
+
+    def test_afind(self):
+        data = {'foo': [{'baz': i, 'bing': {'baz': -i}} for i in range(10)]}
+        for string in ['foo..baz', 'foo[*].baz', 'foo[2:8].bing.baz', 'foo[*] where bing', 'foo[*].baz.`sum`',
+                       '(foo[*]) where (bing..baz)', '$..bing[*]']:
+            expr = parse(string)
+            expected = [m.value for m in expr.find(data)]
+            assert [m.value for m in self.run_async(expr.afind(data, yield_every=3))] == expected
+            assert [m.value for m in self.run_async(afind(expr, data, offload=True))] == expected
+
+    def test_yields_while_visiting(self):
+        # Nothing matches, so only counting the visits gives the loop a turn
+        data = {'rows': [{'v': i, 'w': [i]} for i in range(200)]}
+        turns = []
+
+        async def other_task():
+            while True:
+                turns.append(None)
+                await asyncio.sleep(0)
+
+        async def run():
+            task = asyncio.ensure_future(other_task())
+            await asyncio.sleep(0)
+            before = len(turns)
+            matches = await afind(parse('$..rare_key'), data, yield_every=50)
+            task.cancel()
+            return matches, len(turns) - before
+
+        matches, turns_taken = self.run_async(run())
+        assert matches == []
+        assert turns_taken >= 10
+
+    def test_offload_predicate(self):
+        expr = parse('foo')
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            result = self.run_async(afind(expr, {'foo': 1}, offload=lambda doc: len(doc) > 0, executor=executor))
+        assert [m.value for m in result] == [1]
+
+    def test_afind_iter(self):
+        expr = parse('foo')
+        docs = [{'foo': 1}, {'bar': 2}, {'foo': 3}]
+        for source in [docs, AsyncDocs(docs)]:
+            results = self.collect(afind_iter(expr, source))
+            assert [[m.value for m in matches] for matches in results] == [[1], [], [3]]
@@ -0,0 +1,106 @@
+from __future__ import unicode_literals, print_function, absolute_import, division, generators, nested_scopes
+import os
+import pickle
+import shutil
+import logging
+import tempfile
+import unittest
+
+from jsonpath_rw.parser import parse, JsonPathParser
+from jsonpath_rw.jsonpath import *
+from jsonpath_rw.bundle import save_bundle, load_bundle, source_hash, JsonPathBundleError, _version
+
+class TestPickle(unittest.TestCase):
+
+    @classmethod
+    def setup_class(cls):
+        logging.basicConfig()
+
+    def test_roundtrip(self):
+        for expr in [Root(), This(), Parent(), Fields('foo', 'bar'), Index(3), Slice(1, -1, 2),
+                     Child(Fields('foo'), Slice()), Where(Fields('foo'), Fields('bar')),
+                     Descendants(Root(), Fields('foo')), Union(Fields('a'), Index(0)),
+                     Intersect(Fields('a'), Fields('b')), FieldPattern('m*'), FieldPattern('^m', regex=True),
+                     parse('foo[*].bar..baz.`parent` where x')]:
+            for protocol in range(2, pickle.HIGHEST_PROTOCOL + 1):
+                assert pickle.loads(pickle.dumps(expr, protocol)) == expr
+
+    def test_compact(self):
+        expr = parse('foo[*].bar')
+        # No attribute dictionaries, just the constructor arguments
+        assert b'left' not in pickle.dumps(expr, 2)
+        assert b'fields' not in pickle.dumps(expr, 2)
+
+class TestBundle(unittest.TestCase):
+
+    @classmethod
+    def setup_class(cls):
+        logging.basicConfig()
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'expressions.bundle')
+        self.saved_parse = JsonPathParser.parse
+
+    def tearDown(self):
+        JsonPathParser.parse = self.saved_parse
+        shutil.rmtree(self.directory)
+
+    def forbid_parsing(self):
+        def parse_forbidden(self, string, lexer=None):
+            raise AssertionError('Parsed %r' % string)
+        JsonPathParser.parse = parse_forbidden
+
+    def test_roundtrip(self):
+        save_bundle(self.path, {'a': 'foo.bar', 'b': Child(Fields('baz'), Index(1)), 'c': 'foo.bar'})
+        self.forbid_parsing()
+        foo_bar = Child(Fields('foo'), Fields('bar'))
+        assert load_bundle(self.path) == {'a': foo_bar, 'b': Child(Fields('baz'), Index(1)), 'c': foo_bar}
+
+    def test_sources(self):
+        save_bundle(self.path, {'a': 'foo.bar', 'b': 'baz'})
+        assert load_bundle(self.path, sources={'a': 'foo.bar', 'b': 'bizzle', 'd': 'x[0]'}) == {
+            'a': Child(Fields('foo'), Fields('bar')),
+            'b': Fields('bizzle'),
+            'd': Child(Fields('x'), Index(0)),
+        }
+
+    def test_sources_not_round_tripping(self):
+        # str() gives 'a.b.c', which parses to a different tree
+        expr = Child(Fields('a.b'), Fields('c'))
+        save_bundle(self.path, {'x': expr})
+        assert load_bundle(self.path) == {'x': expr}
+        assert load_bundle(self.path, sources={'y': 'a.b.c'}) == {'y': parse('a.b.c')}
+
+    def test_version_check(self):
+        save_bundle(self.path, {'a': 'foo'})
+        with open(self.path, 'rb') as f:
+            header = pickle.load(f)
+        header['version'] = '0.0.1'
+        with open(self.path, 'wb') as f:
+            pickle.dump(header, f)
+            f.write(b'expressions an older version could not unpickle')
+        self.assertRaises(JsonPathBundleError, load_bundle, self.path)
+
+        # Written in the first format, as one pickle
+        with open(self.path, 'wb') as f:
+            pickle.dump({'format': 1, 'version': '1.3.0', 'expressions': {}, 'names': {}}, f)
+        self.assertRaises(JsonPathBundleError, load_bundle, self.path)
+
+        with open(self.path, 'wb') as f:
+            f.write(b'not a bundle')
+        self.assertRaises(JsonPathBundleError, load_bundle, self.path)
+
+    def test_version_follows_classes(self):
+        from jsonpath_rw import jsonpath
+        before = _version()
+        jsonpath.AddedNode = type(str('AddedNode'), (JSONPath,), {})
+        try:
+            assert _version() != before
+        finally:
+            del jsonpath.AddedNode
+        assert _version() == before
+
+    def test_source_hash(self):
+        assert source_hash('foo') == source_hash('foo')
+        assert source_hash('foo') != source_hash('bar')
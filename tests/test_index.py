@@ -0,0 +1,115 @@
+from __future__ import unicode_literals, print_function, absolute_import, division, generators, nested_scopes
+import io
+import os
+import json
+import shutil
+import logging
+import tempfile
+import unittest
+
+from jsonpath_rw import parse
+from jsonpath_rw.jsonpath import EvaluationContext
+from jsonpath_rw.index import CorpusIndex, record_spans, key_paths, requirements
+
+class TestCorpusIndex(unittest.TestCase):
+
+    @classmethod
+    def setup_class(cls):
+        logging.basicConfig()
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.files = []
+        for i in range(6):
+            filename = os.path.join(self.dir, 'doc%d.json' % i)
+            with io.open(filename, 'w', encoding='utf-8') as f:
+                if i % 2:
+                    # Newline-delimited records
+                    for j in range(5):
+                        f.write(json.dumps({'kind': 'event', 'n': j}) + '\n')
+                else:
+                    json.dump({'orders': [{'order_id': 'o%d' % i}] if i == 4 else [], 'meta': {'v': i}}, f, indent=2)
+            self.files.append(filename)
+        self.index = CorpusIndex(os.path.join(self.dir, 'corpus.idx'))
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.dir)
+
+    def test_record_spans(self):
+        buffer = b' {"a": [1, "]"]}\n{"b": 2}\n3'
+        assert [buffer[start:end] for start, end in record_spans(buffer)] == [b'{"a": [1, "]"]}', b'{"b": 2}', b'3']
+
+    def test_key_paths(self):
+        buffer = b'{"a": [{"b": 1}, {"b": "x"}], "c": {}}'
+        found = [(segments, buffer[start:end], scalar) for segments, start, end, scalar in key_paths(buffer, 0, len(buffer))]
+        assert found == [((), buffer, None),
+                         (('a',), b'[{"b": 1}, {"b": "x"}]', None),
+                         (('a', '*'), b'{"b": 1}', None),
+                         (('a', '*', 'b'), b'1', b'1'),
+                         (('a', '*'), b'{"b": "x"}', None),
+                         (('a', '*', 'b'), b'"x"', b'"x"'),
+                         (('c',), b'{}', None)]
+
+    def test_requirements(self):
+        assert requirements(parse('$..order_id')) == (set(['order_id']), '')
+        assert requirements(parse('orders[0].order_id')) == (set(['orders', 'order_id']), '/orders/*/order_id')
+        assert requirements(parse('(orders[*]) where order_id')) == (set(['orders', 'order_id']), '/orders')
+        assert requirements(parse('(a)|(b.c)')) == (set(), '')
+        assert requirements(parse('*.c')) == (set(['c']), '')
+        assert requirements(parse('foo.`len`')) == (set(), '')
+        assert requirements(parse('(foo.`len`) where bar')) == (set(['bar']), '')
+        assert requirements(parse('$.bar.id'), EvaluationContext(auto_id_field='id')) == (set(), '')
+
+    def test_candidates(self):
+        assert self.index.add(self.files) == 6
+        assert self.index.add(self.files) == 0 # Unchanged files are skipped
+
+        path = os.path.abspath(self.files[4])
+        candidates = self.index.candidates(parse('$..order_id'))
+        assert [(filename, start) for filename, start, end in candidates] == [(path, 0)]
+        assert len(self.index.candidates(parse('n'))) == 15
+        assert len(self.index.candidates(parse('meta.v'))) == 3
+        assert self.index.candidates(parse('meta.nothing')) == []
+
+    def test_find_matches_full_scan(self):
+        self.index.add(self.files)
+        for string in ['$..order_id', 'n', 'meta.v', '(orders[*]) where order_id', 'kind|meta']:
+            expr = parse(string)
+            expected = []
+            for filename in self.files:
+                with io.open(filename, 'rb') as f:
+                    buffer = f.read()
+                for start, end in record_spans(buffer):
+                    expected.extend(match.value for match in expr.find(json.loads(buffer[start:end].decode('utf-8'))))
+            assert [match.value for match in self.index.find(expr, self.files)] == expected, string
+
+        # Only the candidate record is decoded
+        assert list(self.index.documents(parse('$..order_id'), self.files)) == [{'orders': [{'order_id': 'o4'}], 'meta': {'v': 4}}]
+
+    def test_find_aggregate(self):
+        self.index.add(self.files)
+        # One count for each of the 18 records, none of which has foo
+        assert [match.value for match in self.index.find(parse('foo.`len`'), self.files)] == [0] * 18
+
+    def test_find_auto_id(self):
+        filename = os.path.join(self.dir, 'bar.json')
+        with io.open(filename, 'w', encoding='utf-8') as f:
+            f.write('{"bar": {"x": 1}}')
+        self.index.add([filename])
+        ctx = EvaluationContext(auto_id_field='id')
+        assert [match.value for match in self.index.find(parse('$.bar.id'), [filename], ctx)] == ['bar']
+
+    def test_changed_files_are_searched(self):
+        self.index.add(self.files)
+        with io.open(self.files[1], 'a', encoding='utf-8') as f:
+            f.write('{"order_id": "late"}\n')
+        assert [match.value for match in self.index.find(parse('$..order_id'), self.files)] == ['late', 'o4']
+
+        assert self.index.add(self.files) == 1
+        assert len(self.index.candidates(parse('$..order_id'))) == 2
+
+    def test_lookup(self):
+        self.index.add(self.files, values=True)
+        assert [start for filename, start, end in self.index.lookup('/n', 3)] == [78, 78, 78]
+        assert self.index.lookup('/meta/v', 2) == [(os.path.abspath(self.files[2]), 0, os.path.getsize(self.files[2]))]
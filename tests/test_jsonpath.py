@@ -1,4 +1,7 @@
 from __future__ import unicode_literals, print_function, absolute_import, division, generators, nested_scopes
+import sys
+import copy
+import logging
 import unittest
 
 from jsonpath_rw import jsonpath # For setting the global auto_id_field flag
@@ -44,6 +47,58 @@ class TestDatumInContext(unittest.TestCase):
                 ==
                 DatumInContext(3).in_context(path=Fields('foo'), context=DatumInContext('whatever').in_context(path=Fields('baz'), context='whatever')))
 
+    def test_DatumInContext_root(self):
+        root = DatumInContext({'foo': {'baz': 3}})
+        foo = DatumInContext({'baz': 3}, path=Fields('foo'), context=root)
+        baz = DatumInContext(3, path=Fields('baz'), context=foo)
+        assert baz.root is root
+        assert root.root is root
+        assert AutoIdForDatum(baz, id_field='id').root is root
+        assert Root().find(baz) == [DatumInContext({'foo': {'baz': 3}}, path=Root())]
+
+    def test_DatumInContext_cached_paths(self):
+        foo = DatumInContext({'id': 'bizzle', 'baz': 3}, path=Fields('foo'), context=DatumInContext({}))
+        baz = DatumInContext(3, path=Fields('baz'), context=foo)
+        assert baz.full_path is baz.full_path
+        assert baz.full_path.left is foo.full_path
+        assert str(baz.get_id_pseudopath('id')) == 'bizzle.baz'
+        assert str(baz.get_id_pseudopath('other')) == 'foo.baz'
+        assert str(baz.get_id_pseudopath('id')) == 'bizzle.baz'
+
+    def test_DatumInContext_deep(self):
+        datum = DatumInContext({})
+        for i in range(10000):
+            datum = DatumInContext({'id': i} if i % 2 else i, path=Fields('f%d' % i), context=datum)
+
+        full_path = datum.full_path
+        for i in reversed(range(1, 10000)):
+            assert full_path.right == Fields('f%d' % i)
+            full_path = full_path.left
+        assert full_path == Fields('f0')
+
+        pseudopath = datum.get_id_pseudopath('id')
+        assert pseudopath.right == Fields('9999')
+        assert pseudopath.left.right == Fields('f9998')
+        assert Root().find(datum)[0].value == {}
+
+    def test_AutoIdForDatum_shared_pseudopaths(self):
+        class Counting(dict):
+            lookups = 0
+            def get(self, key, default=None):
+                Counting.lookups += 1
+                return dict.get(self, key, default)
+
+        root = DatumInContext(Counting(rows=[Counting(id='r%d' % i) for i in range(3)] + [Counting(v=1)]))
+        rows = Fields('rows').find(root)[0]
+        ids = [AutoIdForDatum(row, id_field='id') for row in Slice().find(rows)]
+        assert [auto_id.value for auto_id in ids] == ['rows.r0', 'rows.r1', 'rows.r2', 'rows.[3]']
+        assert ids[3].value == str(rows.get_id_pseudopath('id').child(Index(3)))
+        assert Counting.lookups == 5 # The root and `rows` are looked at once for all four rows
+
+        assert [auto_id.value for auto_id in ids] == ['rows.r0', 'rows.r1', 'rows.r2', 'rows.[3]']
+        assert Counting.lookups == 5
+        assert AutoIdForDatum(DatumInContext(3, path=This(), context=root), id_field='id').value == '`this`'
+
     # def test_AutoIdForDatum_pseudopath(self):
     #     assert AutoIdForDatum(DatumInContext(value=3, path=Fields('foo')), id_field='id').pseudopath == Fields('foo')
     #     assert AutoIdForDatum(DatumInContext(value={'id': 'bizzle'}, path=Fields('foo')), id_field='id').pseudopath == Fields('bizzle')
@@ -110,6 +165,24 @@ class TestJsonPath(unittest.TestCase):
         jsonpath.auto_id_field = 'id'
         self.check_cases([ ('*', {'foo': 1, 'baz': 2}, set([1, 2, '`this`'])) ])
 
+    def test_field_pattern_value(self):
+        jsonpath.auto_id_field = None
+        data = {'metric_a': 1, 'metric_b': 2, 'other': 3, 'x/y': 4, 5: 'five'}
+        self.check_cases([ ('metric_*', data, [1, 2]),
+                           ('*_b', data, [2]),
+                           ('metric_?', data, [1, 2]),
+                           ('/^metric_[a]$/', data, [1]),
+                           (r'/x\/y/', data, [4]),
+                           ('/th/', data, [3]),
+                           ('nothing_*', data, []),
+                           ('metric_*', [{'metric_a': 1}], []) ])
+
+    def test_field_pattern_shape_cache(self):
+        expr = FieldPattern('metric_*')
+        rows = [{'metric_a': i, 'other': i} for i in range(10)] + [{'metric_z': 10}]
+        assert [m.value for row in rows for m in expr.find(row)] == list(range(11))
+        assert expr.shapes == {('metric_a', 'other'): frozenset(['metric_a']), ('metric_z',): frozenset(['metric_z'])}
+
     def test_root_value(self):
         jsonpath.auto_id_field = None
         self.check_cases([ 
@@ -134,6 +207,41 @@ class TestJsonPath(unittest.TestCase):
             ('[0]', None, [])
         ])
 
+    def test_negative_index_value(self):
+        self.check_cases([
+            ('[-1]', [34, 65, 29, 59], [59]),
+            ('[-4]', [34, 65, 29, 59], [34]),
+            ('[-5]', [34, 65, 29, 59], []),
+            ('[0]', (7, 8), [7]),
+            ('[0]', 'string', []),
+            ('[0]', {'foo': 1}, []),
+            ('foo[0]', {'foo': 5}, []),
+        ])
+        self.check_paths([('[-1]', [34, 65, 29, 59], ['[3]'])])
+
+    def test_slice_step_value(self):
+        self.check_cases([
+            ('[::2]', [0, 1, 2, 3, 4], [0, 2, 4]),
+            ('[1::2]', (0, 1, 2, 3, 4), [1, 3]),
+            ('[-2:]', [0, 1, 2, 3, 4], [3, 4]),
+            ('[::-1]', [0, 1, 2], [2, 1, 0]),
+            ('[-2::-2]', list(range(6)), [4, 2, 0]),
+            ('[1:]', 1.5, []),
+            ('[*]', 1.5, [1.5]),
+            ('[*]', None, [None]),
+        ])
+        self.check_paths([('[::-2]', [0, 1, 2], ['[2]', '[0]'])])
+
+    def test_slice_lazy(self):
+        class Huge(object):
+            # Looks like a sequence of a billion elements; only the ones read are computed
+            def __len__(self):
+                return 10 ** 9
+            def __getitem__(self, i):
+                return i
+        matches = parse('[-3:]').find_iter(Huge())
+        assert [m.value for m in matches] == [10 ** 9 - 3, 10 ** 9 - 2, 10 ** 9 - 1]
+
     def test_slice_value(self):
         self.check_cases([('[*]', [1, 2, 3], [1, 2, 3]),
                           ('[*]', xrange(1, 4), [1, 2, 3]),
@@ -159,6 +267,21 @@ class TestJsonPath(unittest.TestCase):
             ('foo..baz', {'foo': [{'baz': 1}, {'baz': 2}]}, [1, 2] ), 
         ])
 
+    def test_find_iter(self):
+        jsonpath.auto_id_field = None
+        data = {'foo': [{'baz': 1, 'bing': {'baz': 2}}, {'baz': 3}], 'bar': 4}
+        for string in ['foo..baz', 'foo[*].baz', 'foo[1:]', '$..*', 'foo[*] where bing', 'foo|bar', '`this`']:
+            expr = parse(string)
+            assert list(expr.find_iter(data)) == expr.find(data)
+
+    def test_deep_descendants(self):
+        data = leaf = {}
+        for i in range(5000):
+            leaf['next'] = {}
+            leaf = leaf['next']
+        leaf['baz'] = 1
+        assert [match.value for match in parse('$..baz').find(data)] == [1]
+
     def test_parent_value(self):
         self.check_cases([('foo.baz.`parent`', {'foo': {'baz': 3}}, [{'baz': 3}]),
                           ('foo.`parent`.foo.baz.`parent`.baz.bizzle', {'foo': {'baz': {'bizzle': 5}}}, [5])])
@@ -200,6 +323,11 @@ class TestJsonPath(unittest.TestCase):
         jsonpath.auto_id_field = 'id'
         self.check_paths([ ('*', {'foo': 1, 'baz': 2}, set(['foo', 'baz', 'id'])) ])
 
+    def test_field_pattern_paths(self):
+        jsonpath.auto_id_field = None
+        self.check_paths([ ('foo.metric_*', {'foo': {'metric_a': 1, 'other': 2}}, ['foo.metric_a']),
+                           ('$..m*', {'a': {'m1': 1}, 'm2': 2}, set(['a.m1', 'm2'])) ])
+
     def test_root_paths(self):
         jsonpath.auto_id_field = None
         self.check_paths([ 
@@ -233,6 +361,64 @@ class TestJsonPath(unittest.TestCase):
         self.check_paths([('foo..baz', {'foo': {'baz': 1, 'bing': {'baz': 2}}}, ['foo.baz', 'foo.bing.baz'] )])
 
 
+    def test_path_tuples(self):
+        jsonpath.auto_id_field = None
+        data = {'foo': [{'baz': 1, 'a/b~c': 2}, {'baz': 3}]}
+        cases = [('foo[*].baz', [('foo', 0, 'baz'), ('foo', 1, 'baz')], ['/foo/0/baz', '/foo/1/baz']),
+                 ('foo[0]."a/b~c"', [('foo', 0, 'a/b~c')], ['/foo/0/a~1b~0c']),
+                 ('$', [()], ['']),
+                 ('foo.$.foo', [('foo',)], ['/foo']),
+                 ('foo[1].baz.`parent`', [('foo', 1)], ['/foo/1']),
+                 ('foo[0].baz[*]', [('foo', 0, 'baz')], ['/foo/0/baz']), # The slice wraps 1 in an array that is not in data
+                 ('foo[0][*].baz', [('foo', 0, 'baz')], ['/foo/0/baz'])]
+        for string, tuples, pointers in cases:
+            result = parse(string).find(data)
+            assert [r.path_tuple for r in result] == tuples
+            assert [r.json_pointer for r in result] == pointers
+            for r, pointer in zip(result, pointers):
+                assert get_by_pointer(data, pointer) == r.value
+                assert get_by_pointer(data, r.path_tuple) == r.value
+
+        ctx = EvaluationContext(auto_id_field='id')
+        assert [r.path_tuple for r in parse('foo[1].id').find(data, ctx)] == [('foo', 1, 'id')]
+
+    def test_pointers(self):
+        data = {'foo': [{'baz': 1}], '': {'': 2}}
+        assert get_by_pointer(data, '') is data
+        assert get_by_pointer(data, '//') == 2
+        self.assertRaises(KeyError, get_by_pointer, data, '/bar')
+        self.assertRaises(KeyError, get_by_pointer, data, '/foo/x')
+        self.assertRaises(IndexError, get_by_pointer, data, '/foo/5')
+        self.assertRaises(ValueError, get_by_pointer, data, 'foo')
+        for pointer in ['/foo/-1', '/foo/00', '/foo/+0', '/foo/', ('foo', -1)]:
+            self.assertRaises(LookupError, get_by_pointer, data, pointer)
+
+        assert set_by_pointer(data, '/foo/0/baz', 5) == {'foo': [{'baz': 5}], '': {'': 2}}
+        assert set_by_pointer(data, ('foo', 0), 'x') == {'foo': ['x'], '': {'': 2}}
+        assert set_by_pointer(data, '', 'y') == 'y'
+
+        assert parse_json_pointer('/a~1b/~0') == ('a/b', '~')
+        assert to_json_pointer(('a/b', '~', 3)) == '/a~1b/~0/3'
+        self.assertRaises(ValueError, path_segments, Fields('*'))
+
+    def test_specialized_nodes_match_generic(self):
+        data = {'foo': [{'baz': 1, 'id': 'x'}, {'bing': 2}, 3], 'baz': None, 'bing': {'a': 1}}
+        cases = [(SingleField('baz'), Fields('baz')),
+                 (SingleField('id'), Fields('id')),
+                 (MultipleFields('baz', 'bing', 'nope'), Fields('baz', 'bing', 'nope')),
+                 (AllFields('*'), Fields('*')),
+                 (Child(Fields('foo'), AllIndices()), Child(Fields('foo'), Slice())),
+                 (AllIndices(), Slice())]
+        for ctx in [None, EvaluationContext(auto_id_field='id'), EvaluationContext(budget=Budget())]:
+            for specialized, generic in cases:
+                for datum in [data, data['foo'], data['foo'][0], 3, 'str', None]:
+                    assert specialized.find(datum, ctx) == generic.find(datum, ctx), (specialized, datum, ctx)
+                    assert list(specialized.find_iter(datum, ctx)) == list(generic.find_iter(datum, ctx))
+
+        for specialized, generic in cases:
+            for original in [{'baz': 1, 'bing': 2, 'id': 3}, [1, 2], 'str']:
+                assert specialized.update(copy.deepcopy(original), 0) == generic.update(copy.deepcopy(original), 0)
+
     #
     # Check the "auto_id_field" feature
     #
@@ -354,7 +540,10 @@ class TestJsonPath(unittest.TestCase):
             ({'outer': {'nestedfield': 1}}, '$..nestedfield', 42, {'outer': {'nestedfield': 42}}),
             ({'outs': {'bar': 1, 'ins': {'bar': 9}}, 'outs2': {'bar': 2}},
              '$..bar', 42,
-             {'outs': {'bar': 42, 'ins': {'bar': 42}}, 'outs2': {'bar': 42}})
+             {'outs': {'bar': 42, 'ins': {'bar': 42}}, 'outs2': {'bar': 42}}),
+            # The new value matches too, but is not walked into
+            ({'b': 1}, '$..b', {'b': 1}, {'b': {'b': 1}}),
+            ({'a': [{'b': 1}, {'c': 2}]}, '$..b', {'b': 0}, {'a': [{'b': {'b': 0}}, {'c': 2}]}),
         ])
 
     def test_update_index(self):
@@ -364,5 +553,353 @@ class TestJsonPath(unittest.TestCase):
 
     def test_update_slice(self):
         self.check_update_cases([
-            (['foo', 'bar', 'baz'], '[0:2]', 'test', ['test', 'test', 'baz'])
+            (['foo', 'bar', 'baz'], '[0:2]', 'test', ['test', 'test', 'baz']),
+            (['foo', 'bar', 'baz'], '[::2]', 'test', ['test', 'bar', 'test']),
+            ({'foo': 1}, '[*]', 'test', {'foo': 1})
+        ])
+
+    def test_update_field_pattern(self):
+        self.check_update_cases([
+            ({'metric_a': 1, 'metric_b': 2, 'other': 3}, 'metric_*', 0, {'metric_a': 0, 'metric_b': 0, 'other': 3}),
+            ({'metric_a': 1, 'other': 3}, '/^o/', 0, {'metric_a': 1, 'other': 0}),
+        ])
+
+    def test_update_negative_index(self):
+        self.check_update_cases([
+            (['foo', 'bar', 'baz'], '[-1]', 'test', ['foo', 'bar', 'test']),
+            (['foo', 'bar', 'baz'], '[-4]', 'test', ['foo', 'bar', 'baz'])
+        ])
+
+class TestFindBatch(unittest.TestCase):
+    """
+    Tests of `JSONPath.find_batch` over many documents
+    """
+
+    @classmethod
+    def setup_class(cls):
+        logging.basicConfig()
+
+    def setUp(self):
+        jsonpath.auto_id_field = None
+        self.docs = [{'foo': [{'baz': i}, {'baz': i + 1}]} for i in range(10)] + [{}]
+
+    def test_values(self):
+        expr = parse('foo[*].baz')
+        assert expr.find_batch(self.docs) == [[r.value for r in expr.find(doc)] for doc in self.docs]
+
+    def test_datums(self):
+        expr = parse('foo[*].baz')
+        result = expr.find_batch(self.docs, mode='datums')
+        assert [[str(r.full_path) for r in rs] for rs in result][0] == ['foo.[0].baz', 'foo.[1].baz']
+        assert result[-1] == []
+
+    def test_bad_mode(self):
+        self.assertRaises(ValueError, parse('foo').find_batch, self.docs, mode='paths')
+
+    def test_executor(self):
+        try:
+            from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+        except ImportError:
+            return # Python 2 without the `futures` backport
+
+        expr = parse('foo[*].baz')
+        expected = expr.find_batch(self.docs)
+        for executor_class in [ThreadPoolExecutor, ProcessPoolExecutor]:
+            with executor_class(max_workers=2) as executor:
+                assert expr.find_batch(iter(self.docs), executor=executor, chunksize=3) == expected
+                assert [[r.value for r in rs] for rs in expr.find_batch(self.docs, mode='datums', executor=executor)] == expected
+
+    @unittest.skipIf(sys.version_info < (3, 7), 'Process pool initializers require Python 3.7+')
+    def test_workers(self):
+        expr = parse('foo[*].baz')
+        expected = expr.find_batch(self.docs)
+        assert expr.find_batch(iter(self.docs), workers=2, chunksize=3) == expected
+        assert [[r.value for r in rs] for rs in expr.find_batch(self.docs, mode='datums', workers=2)] == expected
+
+    def test_workers_unpickle_once(self):
+        # As a worker would be started, then sent chunks
+        import pickle
+        expr = parse('foo[*].baz')
+        jsonpath._find_batch_init(pickle.dumps(expr), 'values', EvaluationContext())
+        try:
+            assert jsonpath._worker_batch[0] == expr
+            assert jsonpath._find_batch_worker(self.docs[:2]) == expr.find_batch(self.docs[:2])
+        finally:
+            jsonpath._worker_batch = None
+
+class TestEvaluationContext(unittest.TestCase):
+    """
+    Tests of per-call options passed as an `EvaluationContext`
+    """
+
+    @classmethod
+    def setup_class(cls):
+        logging.basicConfig()
+
+    def setUp(self):
+        jsonpath.auto_id_field = None
+
+    def test_immutable(self):
+        ctx = EvaluationContext(auto_id_field='id')
+        self.assertRaises(AttributeError, setattr, ctx, 'auto_id_field', 'other')
+        assert ctx.replace(auto_id_field='other') == EvaluationContext(auto_id_field='other')
+        assert ctx.auto_id_field == 'id'
+
+    def test_pickle(self):
+        import pickle
+        ctx = EvaluationContext(auto_id_field='id')
+        assert pickle.loads(pickle.dumps(ctx)) == ctx
+
+    def test_auto_id_field(self):
+        data = {'foo': {'baz': 3}, 'bar': {'id': 'bizzle', 'baz': 4}}
+        ctx = EvaluationContext(auto_id_field='id')
+        assert [m.value for m in parse('foo.baz.id').find(data, ctx)] == ['foo.baz']
+        assert [m.value for m in parse('bar.baz.id').find(data, ctx)] == ['bizzle.baz']
+        assert set(m.value for m in parse('foo.*').find(data, ctx)) == set([3, 'foo'])
+
+        # The global default is untouched, and is ignored when a context is given
+        assert [m.value for m in parse('foo.baz.id').find(data)] == []
+        jsonpath.auto_id_field = 'id'
+        assert [m.value for m in parse('foo.baz.id').find(data, EvaluationContext())] == []
+
+    def test_update(self):
+        ctx = EvaluationContext(auto_id_field='id')
+        assert parse('$.*').update({'foo': 1}, 2, ctx) == {'foo': 2}
+
+    def test_threads(self):
+        import threading
+
+        expr = parse('foo[*].id')
+        data = {'foo': [{'id': 'a'}, {'key': 'b'}]}
+        expected = {None: ['a'], 'id': ['a', 'foo.[1]'], 'key': ['a']}
+        errors = []
+
+        def worker(id_field):
+            ctx = EvaluationContext(auto_id_field=id_field)
+            for _ in range(200):
+                result = [m.value for m in expr.find(data, ctx)]
+                if result != expected[id_field]:
+                    errors.append((id_field, result))
+
+        threads = [threading.Thread(target=worker, args=(id_field,)) for id_field in list(expected) * 3]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+
+class TestFindBounded(unittest.TestCase):
+    """
+    Tests of `JSONPath.find_bounded` and evaluation budgets
+    """
+
+    @classmethod
+    def setup_class(cls):
+        logging.basicConfig()
+
+    def setUp(self):
+        jsonpath.auto_id_field = None
+        self.data = {'foo': [{'baz': i, 'bing': {'baz': -i}} for i in range(100)]}
+
+    def test_unbounded(self):
+        for string in ['foo..baz', 'foo[*].baz', 'foo[10:20]']:
+            expr = parse(string)
+            assert expr.find_bounded(self.data) == expr.find(self.data)
+
+    def test_limit(self):
+        assert [m.value for m in parse('foo..baz').find_bounded(self.data, limit=3)] == [0, 0, 1]
+        assert [m.value for m in parse('foo[*].baz').find_bounded(self.data, limit=2)] == [0, 1]
+        assert parse('foo[*].baz').find_bounded(self.data, limit=0) == []
+
+    def test_max_nodes_visited(self):
+        expr = parse('foo..baz')
+        try:
+            expr.find_bounded(self.data, max_nodes_visited=50)
+            assert False, 'Expected JsonPathBudgetExceeded'
+        except JsonPathBudgetExceeded as exc:
+            assert 0 < len(exc.matches) < 100
+            assert exc.matches == expr.find(self.data)[:len(exc.matches)]
+
+        partial = expr.find_bounded(self.data, max_nodes_visited=50, partial=True)
+        assert 0 < len(partial) < 100
+
+        self.assertRaises(JsonPathBudgetExceeded, parse('foo[*]').find_bounded, self.data, max_nodes_visited=10)
+        assert len(parse('foo[*]').find_bounded(self.data, max_nodes_visited=101)) == 100
+
+    def test_deadline(self):
+        import time
+        self.assertRaises(JsonPathBudgetExceeded, parse('foo..baz').find_bounded, self.data, deadline=time.time() - 1)
+        assert parse('foo..baz').find_bounded(self.data, deadline=time.time() - 1, partial=True) == []
+        assert len(parse('foo..baz').find_bounded(self.data, deadline=time.time() + 60)) == 200
+
+class TestAggregates(unittest.TestCase):
+    """
+    Tests of the aggregate methods and the `len` and `sum` named operators
+    """
+
+    @classmethod
+    def setup_class(cls):
+        logging.basicConfig()
+
+    def setUp(self):
+        jsonpath.auto_id_field = None
+        self.data = {'foo': [{'bar': 1}, {'bar': 2.5}, {'bar': 'x'}, {'bar': True}, {'bar': [1]}, {'bar': 1}]}
+
+    def test_methods(self):
+        expr = parse('foo[*].bar')
+        assert expr.count(self.data) == 6
+        assert expr.sum(self.data) == 4.5
+        assert expr.distinct(self.data) == [1, 2.5, 'x', True, [1]]
+        assert expr.reduce(self.data, lambda names, value: names + [type(value).__name__], []) == ['int', 'float', 'str', 'bool', 'list', 'int']
+        assert parse('foo[0:2].bar').min(self.data) == 1
+        assert parse('foo[0:2].bar').max(self.data) == 2.5
+        assert parse('missing').count(self.data) == 0
+        assert parse('missing').min(self.data) is None
+
+    def test_min_max_skip_unordered(self):
+        data = {'a': [3, 'x', None, True, {'b': 1}, [0], -1.5, 'a'], 'b': ['m', None, 'c'], 'c': [None, False]}
+        assert parse('a[*]').min(data) == -1.5
+        assert parse('a[*]').max(data) == 3
+        assert parse('b[*]').min(data) == 'c'
+        assert parse('b[*]').max(data) == 'm'
+        assert parse('c[*]').min(data) is None
+
+    def test_counts_lazily(self):
+        # Aggregating consumes the matches one at a time from find_iter
+        class Counted(Fields):
+            def find(self, datum, ctx=None):
+                raise AssertionError('find() would build all the matches at once')
+            def find_iter(self, datum, ctx=None):
+                return iter(Fields.find(self, datum, ctx))
+        assert Child(Child(Fields('foo'), Slice()), Counted('bar')).count(self.data) == 6
+
+    def test_named_operators(self):
+        for string, value in [('foo[*].bar.`len`', 6),
+                              ('foo[*].bar.`sum`', 4.5),
+                              ('foo.`len`', 1),
+                              ('`len`', 1),
+                              ('($..bar).`sum`', 4.5),
+                              ('missing.`sum`', 0)]:
+            matches = parse(string).find(self.data)
+            assert [match.value for match in matches] == [value], string
+            assert matches[0].json_pointer == ''
+
+    def test_update_aggregate(self):
+        expr = parse('foo[*].bar.`len`')
+        assert expr.update(self.data, 0) == self.data
+        assert expr.count(self.data) == 1
+
+class TestDelete(unittest.TestCase):
+    """
+    Tests of `delete()` and its copy-on-write variant `deleted()`
+    """
+
+    @classmethod
+    def setup_class(cls):
+        logging.basicConfig()
+
+    def setUp(self):
+        jsonpath.auto_id_field = None
+
+    def check_delete_cases(self, test_cases):
+        for original, expr_str, expected in test_cases:
+            expr = parse(expr_str)
+            snapshot = copy.deepcopy(original)
+            assert expr.deleted(original) == expected, expr_str
+            assert original == snapshot, expr_str
+            assert expr.delete(original) == expected, expr_str
+
+    def test_delete_fields(self):
+        self.check_delete_cases([
+            ({'foo': 1, 'bar': 2}, 'foo', {'bar': 2}),
+            ({'foo': 1, 'bar': 2}, '*', {}),
+            ({'foo': {'bar': 1, 'baz': 2}}, 'foo.bar', {'foo': {'baz': 2}}),
+            ({'metric_a': 1, 'other': 2}, 'metric_*', {'other': 2}),
+            ({'foo': 1}, 'missing', {'foo': 1}),
+        ])
+
+    def test_delete_slice(self):
+        self.check_delete_cases([
+            ([0, 1, 2, 3, 4, 5], '[1:5:2]', [0, 2, 4, 5]),
+            ([0, 1, 2, 3, 4, 5], '[*]', []),
+            ([0, 1, 2], '[-1]', [0, 1]),
+            ({'foo': {'bar': 1}}, 'foo[*]', {}), # The slice wraps a non-array, so the value itself goes
+            ({'foo': {'bar': 1}}, 'foo[*].bar', {'foo': {}}),
         ])
+
+    def test_delete_where_and_descendants(self):
+        self.check_delete_cases([
+            ({'rows': [{'k': 1}, {'k': 2, 'drop': 1}, {'k': 3, 'drop': 1}, {'k': 4}]},
+             'rows[*] where drop', {'rows': [{'k': 1}, {'k': 4}]}),
+            ({'outs': {'bar': 1, 'ins': {'bar': 9}}, 'outs2': [{'bar': 2}]},
+             '$..bar', {'outs': {'ins': {}}, 'outs2': [{}]}),
+            ({'a': {'b': {'b': 1}}}, '$..b', {'a': {}}), # Matches inside other matches
+        ])
+
+    def test_delete_not_locations(self):
+        self.check_delete_cases([
+            ({'foo': 1}, '$', {'foo': 1}),
+            ({'foo': [1, 2]}, 'foo.`len`', {'foo': [1, 2]}),
+        ])
+        data = {'foo': {'bar': 1}}
+        assert parse('foo.id').delete(data, EvaluationContext(auto_id_field='id')) == {'foo': {'bar': 1}}
+
+    def test_delete_compacts_once(self):
+        class Rows(list):
+            assignments = 0
+            def __setitem__(self, index, value):
+                Rows.assignments += 1
+                list.__setitem__(self, index, value)
+
+        data = {'rows': Rows(range(10))}
+        parse('rows[::3]').delete(data)
+        assert data['rows'] == [1, 2, 4, 5, 7, 8]
+        assert Rows.assignments == 1
+
+    def test_deleted_shares_untouched_parts(self):
+        data = {'keep': {'x': [1]}, 'edit': {'rows': [{'a': 1}, {'a': 2}]}}
+        result = parse('edit.rows[1].a').deleted(data)
+        assert result == {'keep': {'x': [1]}, 'edit': {'rows': [{'a': 1}, {}]}}
+        assert result['keep'] is data['keep']
+        assert result['edit']['rows'][0] is data['edit']['rows'][0]
+        assert result['edit'] is not data['edit']
+        assert data['edit']['rows'][1] == {'a': 2}
+        assert parse('missing').deleted(data) is data
+
+class TestProject(unittest.TestCase):
+
+    @classmethod
+    def setup_class(cls):
+        logging.basicConfig()
+
+    def setUp(self):
+        jsonpath.auto_id_field = None
+        self.data = {'id': 7, 'meta': {'source': 'web', 'debug': {'trace': [1, 2]}},
+                     'rows': [{'k': 1, 'v': 'a'}, {'k': 2, 'v': 'b'}, {'k': 3, 'v': 'c'}]}
+
+    def test_project(self):
+        for exprs, expected in [
+            (['id'], {'id': 7}),
+            (['meta.source', 'rows[*].k'], {'meta': {'source': 'web'}, 'rows': [{'k': 1}, {'k': 2}, {'k': 3}]}),
+            (['rows[2].v', 'rows[0].v'], {'rows': [{'v': 'a'}, {'v': 'c'}]}), # Elements stay in order
+            (['rows[*] where (v)', 'rows[0].k'], {'rows': [{'k': 1, 'v': 'a'}, {'k': 2, 'v': 'b'}, {'k': 3, 'v': 'c'}]}),
+            (['meta', 'meta.debug.trace[0]'], {'meta': {'source': 'web', 'debug': {'trace': [1, 2]}}}),
+            (['$..trace[1]'], {'meta': {'debug': {'trace': [2]}}}),
+            ([parse('id'), 'rows[*].`len`'], {'id': 7}), # Aggregates are not locations
+            (['missing'], None),
+        ]:
+            snapshot = copy.deepcopy(self.data)
+            assert project(self.data, exprs) == expected, exprs
+            assert self.data == snapshot, exprs
+
+    def test_project_shares_values(self):
+        result = project(self.data, ['meta.debug', 'rows[1]'])
+        assert result['meta']['debug'] is self.data['meta']['debug']
+        assert result['rows'][0] is self.data['rows'][1]
+        assert result['meta'] is not self.data['meta']
+        assert project(self.data, ['$']) is self.data
+
+    def test_project_coerced_and_auto_id(self):
+        assert project({'foo': {'bar': 1, 'baz': 2}}, ['foo[*].bar']) == {'foo': {'bar': 1}}
+        ctx = EvaluationContext(auto_id_field='id')
+        assert project(self.data, ['meta.id', 'rows[0].k'], ctx) == {'rows': [{'k': 1}]}
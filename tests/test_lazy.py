@@ -0,0 +1,83 @@
+from __future__ import unicode_literals, print_function, absolute_import, division, generators, nested_scopes
+import os
+import json
+import mmap
+import logging
+import tempfile
+import unittest
+
+from jsonpath_rw import parse
+from jsonpath_rw.lazy import LazyJSON, LazyObject, LazyArray
+
+DOCUMENT = {
+    'a': {'b': [10, 11, 12, {'c': 'x"}]'}], 'ké': True},
+    'escaped': 'tab\there \\ "quoted"',
+    'empty': {'list': [], 'dict': {}},
+    'numbers': [-1, 2.5, 1e3, None, False],
+}
+
+class TestLazyJSON(unittest.TestCase):
+
+    @classmethod
+    def setup_class(cls):
+        logging.basicConfig()
+
+    def setUp(self):
+        self.text = json.dumps(DOCUMENT, indent=2)
+        self.doc = LazyJSON(self.text.encode('utf-8'))
+
+    def test_types(self):
+        assert isinstance(self.doc, LazyObject)
+        assert isinstance(self.doc['a']['b'], LazyArray)
+        assert LazyJSON(b' 42 ') == 42
+        assert LazyJSON('"x"') == 'x'
+
+    def test_values_match_json_loads(self):
+        assert self.doc == DOCUMENT
+        assert self.doc.to_python() == DOCUMENT
+        assert self.doc['a'].to_python() == DOCUMENT['a']
+        assert self.doc['escaped'] == DOCUMENT['escaped']
+        assert list(self.doc) == list(json.loads(self.text))
+        assert self.doc['numbers'][-1] is False
+        assert self.doc['numbers'][1:3] == [2.5, 1000.0]
+        assert 'ké' in self.doc['a']
+        assert 'missing' not in self.doc
+        self.assertRaises(KeyError, lambda: self.doc['missing'])
+        self.assertRaises(IndexError, lambda: self.doc['numbers'][5])
+
+    def test_only_visited_children_are_decoded(self):
+        assert self.doc['a']['b'][3]['c'] == 'x"}]'
+        assert sorted(self.doc._cache) == ['a']
+        assert sorted(self.doc['a']['b']._cache) == [3]
+
+    def test_queries(self):
+        for string in ['a.b[3].c', 'a.b[*]', 'a.b[-1]', 'a.b[1:3]', 'numbers[::2]', '$..c', '$..list', 'empty.*', 'a.*']:
+            expr = parse(string)
+            expected = expr.find(json.loads(self.text))
+            found = expr.find(self.doc)
+            assert [m.value for m in found] == [m.value for m in expected], string
+            assert [str(m.full_path) for m in found] == [str(m.full_path) for m in expected], string
+
+    def test_mmap(self):
+        fd, path = tempfile.mkstemp(suffix='.json')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self.text.encode('utf-8'))
+            with open(path, 'rb') as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                try:
+                    doc = LazyJSON(mm)
+                    assert [m.value for m in parse('$.a.b[3]').find(doc)] == [{'c': 'x"}]'}]
+                    assert [m.value for m in parse('$..c').find(doc)] == ['x"}]']
+                finally:
+                    del doc
+                    mm.close()
+        finally:
+            os.remove(path)
+
+    def test_malformed(self):
+        for text in ['{"a": 1', '[1, 2', '{"a" 1}', '{1: 2}', '[1 2]', '{} x']:
+            doc = LazyJSON(text) # Nothing is scanned until something is looked up
+            assert doc.end is None
+            self.assertRaises(ValueError, lambda: list(doc))
+        self.assertRaises(ValueError, LazyJSON, '1 x')
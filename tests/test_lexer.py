@@ -53,6 +53,12 @@ class TestLexer(unittest.TestCase):
         self.assert_lex_equiv('`this`', [self.token('this', 'NAMED_OPERATOR')])
         self.assert_lex_equiv('|', [self.token('|', '|')])
         self.assert_lex_equiv('where', [self.token('where', 'WHERE')])
+        self.assert_lex_equiv('metric_*', [self.token('metric_*', 'GLOB')])
+        self.assert_lex_equiv('*_count', [self.token('*_count', 'GLOB')])
+        self.assert_lex_equiv('a?c', [self.token('a?c', 'GLOB')])
+        self.assert_lex_equiv('[*]', [self.token('[', '['), self.token('*', '*'), self.token(']', ']')])
+        self.assert_lex_equiv('/^metric_/', [self.token('^metric_', 'REGEX')])
+        self.assert_lex_equiv(r'/a\/b/', [self.token('a/b', 'REGEX')])
 
     def test_basic_errors(self):
         def tokenize(s):
@@ -67,3 +73,4 @@ class TestLexer(unittest.TestCase):
         self.assertRaises(JsonPathLexerError, tokenize, "'`")
         self.assertRaises(JsonPathLexerError, tokenize, '?')
         self.assertRaises(JsonPathLexerError, tokenize, '$.foo.bar.#')
+        self.assertRaises(JsonPathLexerError, tokenize, '/unterminated')
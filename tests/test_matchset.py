@@ -0,0 +1,81 @@
+from __future__ import unicode_literals, print_function, absolute_import, division, generators, nested_scopes
+import logging
+import unittest
+
+from jsonpath_rw import parse
+from jsonpath_rw.jsonpath import *
+from jsonpath_rw.matchset import MatchSet
+
+class TestMatchSet(unittest.TestCase):
+
+    @classmethod
+    def setup_class(cls):
+        logging.basicConfig()
+
+    def setUp(self):
+        self.data = {
+            'orders': [{'id': i, 'lines': [{'sku': 's%d' % j} for j in range(3)]} for i in range(3)],
+            'numbers': {1: 'one'},
+        }
+
+    def test_same_matches_as_find(self):
+        for string in ['orders[*].lines[*].sku', '$..sku', 'orders[1:].id', 'orders[*].lines[-1]',
+                       'numbers.*', '$', '(orders[0].id)|(orders[2].id)', '(orders[*].lines[*]) where sku',
+                       'orders[0].lines[0].sku[*]', 'numbers[*][*]']:
+            expr = parse(string)
+            expected = expr.find(self.data)
+            found = expr.find_set(self.data)
+            assert len(found) == len(expected), string
+            assert list(found) == expected, string
+            assert list(found.values()) == [match.value for match in expected], string
+            assert list(found.paths()) == [match.path_tuple for match in expected], string
+            assert [str(match.full_path) for match in found] == [str(match.full_path) for match in expected], string
+
+    def test_auto_id(self):
+        ctx = EvaluationContext(auto_id_field='id')
+        expr = parse('orders[*].lines[*].id')
+        found = expr.find_set(self.data, ctx)
+        assert [match.value for match in found] == [match.value for match in expr.find(self.data, ctx)]
+        assert list(found.json_pointers())[0] == '/orders/0/lines/0/id'
+
+        found = parse('foo.id').find_set({'foo': {'x': 1}}, ctx)
+        assert [match.value for match in found] == ['foo']
+        assert list(found.values()) == ['foo']
+
+    def test_shares_ancestors(self):
+        found = parse('orders[*].lines[*].sku').find_set(self.data)
+        # $, orders, 3 orders, 3 lines arrays, 9 lines and 9 skus
+        assert len(found.store) == 26
+        # Stored as plain names and indices, whichever kind of node found them
+        for string in ['orders[*].lines[*].sku', 'orders[*].*', 'orders[0].id,lines']:
+            segments = parse(string).find_set(self.data).store.segments
+            assert not any(isinstance(segment, (Fields, Index)) for segment in segments), string
+
+    def test_indexing_and_parents(self):
+        found = parse('orders[*].id').find_set(self.data)
+        assert found[-1].value == 2
+        assert found[1].context.value is self.data['orders'][1]
+        assert found.parent(0).value is self.data['orders'][0]
+        assert parse('$').find_set(self.data).parent(0) is None
+
+        tail = found[1:]
+        assert isinstance(tail, MatchSet)
+        assert tail.store is found.store
+        assert list(tail.values()) == [1, 2]
+
+    def test_set_operations(self):
+        all_ids = parse('orders[*].id').find_set(self.data)
+        some_ids = parse('orders[1:].id').find_set(self.data)
+
+        assert list((all_ids - some_ids).values()) == [0]
+        assert list((all_ids & some_ids).values()) == [1, 2]
+        assert list((some_ids | all_ids).values()) == [1, 2, 0]
+        assert list((all_ids | all_ids).values()) == [0, 1, 2]
+        assert list((all_ids & parse('orders[0].id').find(self.data)).values()) == [0]
+
+        # Equal values at different locations are different matches
+        other = parse('orders[*].lines[0].sku').find_set(self.data)
+        assert len(other - parse('orders[0].lines[0].sku').find_set(self.data)) == 2
+        # As are the same paths into different documents
+        copy = {'orders': [{'id': 0}]}
+        assert len(all_ids & parse('orders[*].id').find_set(copy)) == 0
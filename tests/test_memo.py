@@ -0,0 +1,65 @@
+from __future__ import unicode_literals, print_function, absolute_import, division, generators, nested_scopes
+import logging
+import unittest
+
+from jsonpath_rw import jsonpath
+from jsonpath_rw.parser import parse
+from jsonpath_rw.jsonpath import *
+from jsonpath_rw.memo import Memo, Memoized, anchor, structure
+
+class TestMemo(unittest.TestCase):
+
+    @classmethod
+    def setup_class(cls):
+        logging.basicConfig()
+
+    def setUp(self):
+        jsonpath.auto_id_field = None
+        self.data = {'items': [{'on': i % 2, 'v': i, 'tags': ['t%d' % i]} for i in range(20)],
+                     'enabled': True,
+                     'a': {'b': {'c': 1, 'd': 2}}}
+
+    def test_same_results(self):
+        for string in ['items[*] where (`parent`.`parent`.enabled)', '(items[*]) where ($.enabled)', '(a.b.c)|(a.b.d)',
+                       '$..v', 'items[*].v.`sum`', 'items[*].`parent`', 'items..tags[0]', '(a.*)|(a.*)',
+                       'items[*] where on', 'a.*.`this`.c', '`len`']:
+            expr = parse(string)
+            expected = expr.find(self.data)
+            matches = expr.find_memoized(self.data)
+            assert matches == expected, string
+            assert [m.full_path for m in matches] == [m.full_path for m in expected], string
+
+    def test_auto_id(self):
+        ctx = EvaluationContext(auto_id_field='id')
+        expr = parse('(items[*].id)|(items[*].v)')
+        assert [m.value for m in expr.find_memoized(self.data, ctx)] == [m.value for m in expr.find(self.data, ctx)]
+
+    def test_common_subexpressions(self):
+        memo = Memo()
+        expr = memo.wrap(parse('(a.b.c)|(a.b.d)'))
+        assert isinstance(expr, Memoized)
+        assert expr.node.left.node.left is expr.node.right.node.left # The one `a.b`
+
+        assert [m.value for m in expr.find(self.data)] == [1, 2]
+        assert memo.hits == 1
+
+    def test_anchored_where(self):
+        for string in ['items[*] where (`parent`.`parent`.enabled)', '(items[*]) where ($.enabled)']:
+            memo = Memo()
+            assert len(memo.wrap(parse(string)).find(self.data)) == 20
+            assert memo.hits == 19 # The clause is evaluated once, not once per item
+
+    def test_anchor(self):
+        assert anchor(parse('$.a.b')) == 'root'
+        assert anchor(parse('`parent`.a')) == 'parent'
+        assert anchor(parse('($.a)|(`parent`.b)')) is None
+        assert anchor(parse('$.a.`len`')) is None
+        assert anchor(parse('a.b')) is None
+        assert structure(parse('a.b[1]')) == structure(parse('a.b.[1]'))
+        assert structure(parse('a.b')) != structure(parse('a.c'))
+
+    def test_original_untouched(self):
+        expr = parse('(a.b.c)|(a.b.d)')
+        Memo().wrap(expr)
+        assert expr == parse('(a.b.c)|(a.b.d)')
+        assert not isinstance(expr.left, Memoized)
@@ -1,4 +1,5 @@
 from __future__ import unicode_literals, print_function, absolute_import, division, generators, nested_scopes
+import logging
 import unittest
 
 from jsonpath_rw.lexer import JsonPathLexer
@@ -29,12 +30,75 @@ class TestParser(unittest.TestCase):
                                 ('[*]', Slice()),
                                 ('[:2]', Slice(end=2)),
                                 ('[1:2]', Slice(start=1, end=2)),
-                                ('[5:-2]', Slice(start=5, end=-2))
+                                ('[5:-2]', Slice(start=5, end=-2)),
+                                ('[-1]', Index(-1)),
+                                ('[::2]', Slice(step=2)),
+                                ('[1:-1:3]', Slice(start=1, end=-1, step=3)),
+                                ('[-3::-1]', Slice(start=-3, step=-1))
                                ])
 
+    def test_zero_step(self):
+        parser = JsonPathParser()
+        for string in ['[::0]', 'foo[1:5:0]']:
+            self.assertRaises(Exception, parser.parse, string)
+
+    def test_specialized_nodes(self):
+        parser = JsonPathParser()
+        for string, cls, generic in [('foo', SingleField, Fields('foo')),
+                                     ('[foo]', SingleField, Fields('foo')),
+                                     ('baz,bizzle', MultipleFields, Fields('baz', 'bizzle')),
+                                     ('*', AllFields, Fields('*')),
+                                     ('[*]', AllIndices, Slice()),
+                                     ('[:]', AllIndices, Slice()),
+                                     ('[1:]', Slice, Slice(start=1))]:
+            parsed = parser.parse(string)
+            assert parsed.__class__ is cls, string
+            assert parsed == generic and generic == parsed, string
+            assert repr(parsed) == repr(generic), string
+            assert str(parsed) == str(generic), string
+
+    def test_field_patterns(self):
+        self.check_parse_cases([('metric_*', FieldPattern('metric_*')),
+                                ('foo.*_count', Child(Fields('foo'), FieldPattern('*_count'))),
+                                ('foo./^m[0-9]+$/', Child(Fields('foo'), FieldPattern('^m[0-9]+$', regex=True))),
+                                ('foo.*', Child(Fields('foo'), Fields('*')))])
+
+    def test_named_operators(self):
+        self.check_parse_cases([('`this`', This()),
+                                ('`parent`', Parent()),
+                                ('foo[*].`len`', Child(Child(Fields('foo'), Slice()), Len())),
+                                ('foo.bar.`sum`', Child(Child(Fields('foo'), Fields('bar')), Sum()))])
+
+    def test_str_roundtrip(self):
+        for expr in [Slice(), Slice(start=1), Slice(end=2), Slice(start=0, end=0), Slice(start=5, end=-2),
+                     Slice(step=2), Slice(start=-3, step=-1), Index(-1), Child(Fields('foo'), Len()),
+                     FieldPattern('a*b?'), FieldPattern('^a/b$', regex=True)]:
+            self.check_parse_cases([(str(expr), expr)])
+
     def test_nested(self):
         self.check_parse_cases([('foo.baz', Child(Fields('foo'), Fields('baz'))),
                                 ('foo.baz,bizzle', Child(Fields('foo'), Fields('baz', 'bizzle'))),
                                 ('foo where baz', Where(Fields('foo'), Fields('baz'))),
                                 ('foo..baz', Descendants(Fields('foo'), Fields('baz'))),
                                 ('foo..baz.bing', Descendants(Fields('foo'), Child(Fields('baz'), Fields('bing'))))])
+
+    def test_shared_parser_threads(self):
+        import threading
+
+        parser = JsonPathParser()
+        cases = [('foo.baz', Child(Fields('foo'), Fields('baz'))),
+                 ('foo..baz', Descendants(Fields('foo'), Fields('baz'))),
+                 ('[1:2]', Slice(start=1, end=2))]
+        errors = []
+
+        def worker(string, parsed):
+            for _ in range(20):
+                if parser.parse(string) != parsed:
+                    errors.append(string)
+
+        threads = [threading.Thread(target=worker, args=case) for case in cases * 3]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
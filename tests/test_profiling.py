@@ -0,0 +1,69 @@
+from __future__ import unicode_literals, print_function, absolute_import, division, generators, nested_scopes
+import logging
+import unittest
+
+from jsonpath_rw import jsonpath
+from jsonpath_rw.parser import parse
+from jsonpath_rw.jsonpath import *
+from jsonpath_rw.profiling import ProfileStats, Profiled
+
+class TestProfiling(unittest.TestCase):
+
+    @classmethod
+    def setup_class(cls):
+        logging.basicConfig()
+
+    def setUp(self):
+        jsonpath.auto_id_field = None
+        self.data = {'foo': [{'baz': 1, 'bing': {'baz': 2}}, {'baz': 3}]}
+
+    def test_same_results(self):
+        for string in ['foo[*].baz', 'foo..baz', 'foo[*] where bing', '(foo[0].baz)|(foo[1].baz)',
+                       'foo[*].baz.`len`', 'foo[*].baz.`sum`', '($..baz).`sum`', '`len`']:
+            expr = parse(string)
+            assert [m.value for m in expr.profile(self.data, ProfileStats())] == [m.value for m in expr.find(self.data)]
+
+    def test_counts(self):
+        expr = parse('foo[*].baz')
+        stats = ProfileStats()
+        expr.profile(self.data, stats)
+        expr.profile(self.data, stats)
+
+        assert stats[expr].calls == 2
+        assert stats[expr].outputs == 4
+        assert stats[expr.right].calls == 4
+        assert stats[expr.left.right].outputs == 4
+        assert stats[expr].time >= stats[expr.right].time
+
+    def test_descendants_visited(self):
+        expr = parse('foo..baz')
+        stats = ProfileStats()
+        expr.profile(self.data, stats)
+        assert stats.visited(expr) == 7 # the list, two objects, and four values
+        assert stats[expr.right].outputs == 3
+
+        specialized = parse('$..baz').specialize({'type': 'object', 'properties': {'foo': {'type': 'array'}}})
+        stats = ProfileStats()
+        specialized.profile(self.data, stats)
+        assert stats.visited(specialized) == 8 # and the root
+
+    def test_expression_untouched(self):
+        expr = parse('foo[*].baz')
+        expr.profile(self.data, ProfileStats())
+        assert expr == Child(Child(Fields('foo'), Slice()), Fields('baz'))
+        assert not isinstance(expr.left, Profiled)
+
+    def test_explain(self):
+        expr = parse('foo[*].baz')
+        assert expr.explain() == '\n'.join(['Child',
+                                            '  Child',
+                                            "    Fields('foo')",
+                                            '    Slice(start=None,end=None,step=None)',
+                                            "  Fields('baz')"])
+
+        stats = ProfileStats()
+        expr.profile(self.data, stats)
+        lines = expr.explain(stats).split('\n')
+        assert len(lines) == 5
+        assert lines[-1].startswith("  Fields('baz')")
+        assert 'calls=2 out=2 visited=2' in lines[-1]
@@ -0,0 +1,94 @@
+from __future__ import unicode_literals, print_function, absolute_import, division, generators, nested_scopes
+import io
+import os
+import json
+import shutil
+import socket
+import logging
+import tempfile
+import unittest
+import threading
+
+from jsonpath_rw.server import LRUCache, QueryCache, QueryServer, JsonPathServerError, query
+
+class TestServer(unittest.TestCase):
+
+    @classmethod
+    def setup_class(cls):
+        logging.basicConfig()
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'doc.json')
+        self.write({'foo': [1, 2]})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, data):
+        with io.open(self.filename, 'w') as f:
+            f.write('{0}'.format(json.dumps(data)))
+
+    def test_lru_cache(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        assert cache.get('a') == 1
+        cache.put('c', 3) # Evicts b, the least recently used
+        assert 'b' not in cache
+        assert cache.get('a') == 1 and cache.get('c') == 3
+        assert cache.get('b', 'missing') == 'missing'
+        assert len(cache) == 2
+
+    def test_answer(self):
+        cache = QueryCache()
+        request = {'expression': 'foo[*]', 'files': [self.filename], 'paths': True}
+        assert cache.answer(request) == {'matches': [['/foo/0', 1], ['/foo/1', 2]]}
+        assert cache.answer(dict(request, aggregate='sum')) == {'sum': 3}
+        assert cache.answer({'expression': 'foo', 'stdin': '{"foo": 1}'}) == {'matches': [[None, 1]]}
+        assert cache.expression('foo[*]') is cache.expression('foo[*]')
+
+    def test_documents_invalidated_by_changes(self):
+        cache = QueryCache(max_documents=1)
+        first = cache.document(self.filename)
+        assert cache.document(self.filename) is first
+
+        self.write({'foo': [1, 2, 3]})
+        os.utime(self.filename, (0, 0)) # However coarse the clock, the modification time now differs
+        assert cache.document(self.filename) == {'foo': [1, 2, 3]}
+
+    def test_query(self):
+        server = QueryServer(os.path.join(self.directory, 'jsonpath.sock'))
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            assert query(server.server_address, {'expression': 'foo.`len`', 'files': [self.filename]}) == {'matches': [[None, 1]]}
+            self.assertRaises(JsonPathServerError, query, server.server_address, {'expression': 'foo[', 'files': []})
+            self.assertRaises(JsonPathServerError, query, server.server_address, {'expression': 'foo', 'files': ['/nonexistent']})
+            self.assertRaises(JsonPathServerError, QueryServer, server.server_address) # Already serving
+            self.assertRaises(JsonPathServerError, QueryServer, self.filename) # Not a socket
+            assert os.path.exists(self.filename)
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+    def test_stale_socket_replaced(self):
+        path = os.path.join(self.directory, 'stale.sock')
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(path) # Left behind, with nothing listening
+        sock.close()
+
+        server = QueryServer(path)
+        server.server_close()
+        assert not os.path.exists(path)
+
+    def test_socket_permissions(self):
+        umask = os.umask(0o022)
+        os.umask(umask)
+        server = QueryServer(os.path.join(self.directory, 'jsonpath.sock'))
+        try:
+            assert os.stat(server.server_address).st_mode & 0o777 == 0o600
+            assert os.umask(umask) == umask # The process umask is left alone
+        finally:
+            server.server_close()
@@ -0,0 +1,120 @@
+from __future__ import unicode_literals, print_function, absolute_import, division, generators, nested_scopes
+import pickle
+import logging
+import unittest
+
+from jsonpath_rw import jsonpath
+from jsonpath_rw.parser import parse
+from jsonpath_rw.jsonpath import *
+from jsonpath_rw.specialize import (ShapedFields, ShapedSlice, ShapedDescendants, shape_of_schema,
+                                    shape_of_samples, infer_shape)
+
+class Untouchable(dict):
+    def items(self):
+        raise AssertionError('Walked into a subtree that cannot match')
+    __getitem__ = keys = __iter__ = items
+
+SCHEMA = {
+    'type': 'object',
+    'additionalProperties': False,
+    'properties': {
+        'meta': {'type': 'object', 'additionalProperties': False,
+                 'properties': {'source': {'type': 'string'}, 'tags': {'type': 'array', 'items': {'type': 'string'}}}},
+        'orders': {'type': 'array', 'items': {
+            'type': 'object', 'additionalProperties': False,
+            'properties': {'id': {'type': 'integer'},
+                           'lines': {'type': 'array', 'items': {
+                               'type': 'object', 'additionalProperties': False,
+                               'properties': {'sku': {'type': 'string'}, 'qty': {'type': 'integer'}}}}}}},
+        'extra': {'type': 'object'},
+    },
+}
+
+class TestSpecialize(unittest.TestCase):
+
+    @classmethod
+    def setup_class(cls):
+        logging.basicConfig()
+
+    def setUp(self):
+        jsonpath.auto_id_field = None
+        self.doc = {'meta': {'source': 'web', 'tags': ['a', 'b']},
+                    'orders': [{'id': 1, 'lines': [{'sku': 's1', 'qty': 2}, {'sku': 's2', 'qty': 1}]},
+                               {'id': 2, 'lines': []}],
+                    'extra': {'sku': 'hidden'}}
+
+    def test_same_results(self):
+        strings = ['orders[*].lines[*].sku', '$..sku', 'orders..qty', 'meta.*', 'orders[*] where lines[0]',
+                   '(meta.source)|(orders[0].id)', 'orders[-1].id', 'orders[0:1].lines[*]', 'meta.tags[*]']
+        for shape_source in [SCHEMA, [self.doc]]:
+            for string in strings:
+                expr = parse(string)
+                matches = expr.specialize(shape_source).find(self.doc)
+                assert matches == expr.find(self.doc), string
+                assert [m.full_path for m in matches] == [m.full_path for m in expr.find(self.doc)], string
+
+    def test_compatible(self):
+        expr = parse('orders[*].lines[*].sku')
+        specialized = expr.specialize(SCHEMA)
+        assert isinstance(specialized.left.left.left.left, ShapedFields)
+        assert isinstance(specialized.left.left.left.right, ShapedSlice)
+        assert specialized == expr
+        assert str(specialized) == str(expr)
+        assert pickle.loads(pickle.dumps(specialized)).left.left.left.left.__class__ is Fields
+
+        descendants = parse('$..sku').specialize(SCHEMA)
+        assert isinstance(descendants, ShapedDescendants)
+        assert pickle.loads(pickle.dumps(descendants)).__class__ is Descendants
+
+    def test_prunes_descendants(self):
+        self.doc['meta'] = Untouchable(self.doc['meta'])
+        expr = parse('$..qty').specialize(SCHEMA)
+        assert [m.value for m in expr.find(self.doc)] == [2, 1]
+
+        # `extra` is an open object, so it may have a sku anywhere below it
+        expr = parse('$..sku').specialize(SCHEMA)
+        assert [m.value for m in expr.find(self.doc)] == ['s1', 's2', 'hidden']
+
+    def test_samples_do_not_prune(self):
+        # Other documents may have fields the samples did not
+        expr = parse('$..y')
+        specialized = expr.specialize([{'a': {'x': 1}, 'b': 2}, {'a': {'x': [1]}}])
+        assert not isinstance(specialized, ShapedDescendants)
+        for doc in [{'a': {'y': 2}, 'b': 3}, {'a': {'x': [{'y': 4}]}}]:
+            assert specialized.find(doc) == expr.find(doc)
+            assert len(specialized.find(doc)) == 1
+
+    def test_fallback(self):
+        # Documents that do not follow the schema are evaluated generically
+        docs = [{'orders': {'id': 3, 'lines': {'sku': 's3'}}},
+                {'orders': [{'id': 4, 'lines': [{'sku': 's4', 'extra': {'qty': 5}}]}], 'meta': [1]},
+                [{'orders': 1}]]
+        for string in ['orders[*].lines[*].sku', '$..qty', 'orders[*].id', 'meta.*']:
+            expr = parse(string)
+            specialized = expr.specialize(SCHEMA)
+            for doc in docs:
+                assert specialized.find(doc) == expr.find(doc), string
+
+        # `a` is a closed object without `y`, but here it is not an object at all
+        schema = {'type': 'object', 'properties': {'a': {'type': 'object', 'properties': {'x': {'type': 'integer'}},
+                                                         'additionalProperties': False}}}
+        for doc in [{'a': [{'y': 1}]}, {'a': {'x': 1}, 'b': [{'a': [{'y': 1}]}]}]:
+            assert [m.value for m in parse('$..y').specialize(schema).find(doc)] == [1]
+
+        ctx = EvaluationContext(auto_id_field='id')
+        expr = parse('orders[*].lines[*].id')
+        assert [m.value for m in expr.specialize(SCHEMA).find(self.doc, ctx)] == [m.value for m in expr.find(self.doc, ctx)]
+
+    def test_shapes(self):
+        shape = shape_of_schema(SCHEMA)
+        assert shape.names is None # Because of `extra`
+        assert shape.properties['orders'].names == set(['id', 'lines', 'sku', 'qty'])
+        assert shape.properties['meta'].names == set(['source', 'tags'])
+        assert shape_of_schema({'type': ['integer', 'null']}).kinds == frozenset(['number', 'null'])
+        assert shape_of_schema({'$ref': '#/definitions/x'}) is None
+
+        samples = shape_of_samples([{'a': [], 'b': 1}, {'a': [{'c': None}], 'b': 'x'}])
+        assert samples.properties['a'].names == set(['c'])
+        assert samples.properties['b'].kinds == frozenset(['number', 'string'])
+        assert shape_of_samples([{'a': []}]).names is None # Nothing is known about the items
+        assert infer_shape([]) is None
@@ -0,0 +1,96 @@
+from __future__ import unicode_literals, print_function, absolute_import, division, generators, nested_scopes
+import logging
+import unittest
+
+from jsonpath_rw import parse
+from jsonpath_rw.watch import WatchedDocument, patterns, simple_steps, ANY
+
+class Untouchable(dict):
+    def __getitem__(self, key):
+        raise AssertionError('Read %r from a part of the document that did not change' % key)
+
+class TestWatchedDocument(unittest.TestCase):
+
+    @classmethod
+    def setup_class(cls):
+        logging.basicConfig()
+
+    def setUp(self):
+        self.doc = WatchedDocument({
+            'services': {'a': {'port': 1, 'tags': ['x']}, 'b': {'port': 2, 'tags': []}},
+            'flag': True,
+            'items': [{'on': 1}, {'on': 0}],
+        })
+        self.log = []
+
+    def watch(self, string):
+        def callback(old, new):
+            self.log.append((string, [(m.path_tuple, m.value) for m in old], [(m.path_tuple, m.value) for m in new]))
+        return self.doc.subscribe(string, callback)
+
+    def test_simple_steps(self):
+        assert simple_steps(parse('$.a[*].b[2]')) == [parse('a'), parse('[*]'), parse('b'), parse('[2]')]
+        assert simple_steps(parse('a..b')) is None
+        assert simple_steps(parse('a.`parent`')) is None
+
+    def test_patterns(self):
+        assert patterns(parse('a.*[3]')) == [(['a'], [ANY], [3])]
+        assert patterns(parse('a[-1]')) == [(['a'], [ANY])]
+        assert patterns(parse('a.b.`parent`')) == [(['a'],)]
+        assert patterns(parse('a|b')) == [(['a'],), (['b'],)]
+        assert (['x'],) in patterns(parse('(a[*]) where ($.x)'))
+
+    def test_update_notifies_affected_subscriptions(self):
+        for string in ['services.*.port', 'services.a', 'services.b.tags[*]', '$..port', 'flag']:
+            self.watch(string)
+
+        self.doc.update('services.a.port', 10)
+        assert [entry[0] for entry in self.log] == ['services.*.port', 'services.a', '$..port']
+        assert self.log[0][1:] == ([(('services', 'a', 'port'), 1)], [(('services', 'a', 'port'), 10)])
+        assert self.log[2][1:] == ([(('services', 'a', 'port'), 1)], [(('services', 'a', 'port'), 10)])
+        assert self.doc.data['services']['a']['port'] == 10
+
+    def test_set_below_and_above_matches(self):
+        self.watch('services.b.tags[*]')
+        self.watch('services.*.port')
+
+        self.doc.set('/services/b/tags', ['q', 'r'])
+        assert self.log == [('services.b.tags[*]', [], [(('services', 'b', 'tags', 0), 'q'), (('services', 'b', 'tags', 1), 'r')])]
+
+        del self.log[:]
+        self.doc.set(('services', 'b'), {'port': 3})
+        assert self.log == [('services.b.tags[*]', [(('services', 'b', 'tags', 0), 'q'), (('services', 'b', 'tags', 1), 'r')], []),
+                            ('services.*.port', [(('services', 'b', 'port'), 2)], [(('services', 'b', 'port'), 3)])]
+
+    def test_filters(self):
+        self.watch('items[*] where on')
+        self.watch('(items[*]) where ($.enabled)')
+
+        self.doc.set('/items/1/on', 1)
+        assert self.log == [('items[*] where on', [(('items', 1), {'on': 1})], [(('items', 1), {'on': 1})])]
+
+        # Matches that appear or disappear elsewhere are reported too
+        del self.log[:]
+        self.doc.set('/enabled', True)
+        assert self.log == [('(items[*]) where ($.enabled)', [], [(('items', 0), {'on': 1}), (('items', 1), {'on': 1})])]
+
+    def test_unaffected_parts_are_not_evaluated(self):
+        self.doc.data['rows'] = [Untouchable(v=0), {'v': 1}]
+        self.watch('rows[*].v')
+        self.watch('rows[1]')
+
+        self.doc.set('/rows/1/v', 2)
+        assert self.log == [('rows[*].v', [(('rows', 1, 'v'), 1)], [(('rows', 1, 'v'), 2)]),
+                            ('rows[1]', [(('rows', 1), {'v': 2})], [(('rows', 1), {'v': 2})])]
+
+    def test_cancel(self):
+        subscription = self.watch('flag')
+        subscription.cancel()
+        self.doc.update('flag', False)
+        assert self.log == []
+        assert self.doc.subscriptions == set()
+
+    def test_replace_root(self):
+        self.watch('flag')
+        self.doc.update('$', {'flag': 3})
+        assert self.log == [('flag', [(('flag',), True)], [(('flag',), 3)])]